@@ -27,6 +27,9 @@ from app.models.criterio import Criterio
 from app.models.clasificacion import Clasificacion
 from app.models.indicador_periodo import IndicadorPeriodo
 from app.models.resena_destacada import ResenaDestacada
+from app.models.estado_importacion import EstadoImportacion
+from app.models.indice_palabra import IndicePalabra
+from app.models.metrica_diaria import MetricaDiaria, MetricaDiariaCriterio
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
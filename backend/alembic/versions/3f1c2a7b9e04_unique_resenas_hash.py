@@ -0,0 +1,37 @@
+"""Unique index on resenas.hash_contenido
+
+Revision ID: 3f1c2a7b9e04
+Revises: d9178442809e
+Create Date: 2026-10-18 09:12:40.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9e04'
+down_revision = 'd9178442809e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Eliminar duplicados previos conservando la reseña más antigua
+    op.execute(
+        """
+        DELETE FROM resenas r
+        USING resenas d
+        WHERE r.hash_contenido = d.hash_contenido
+          AND (r.creado_en, r.id) > (d.creado_en, d.id)
+        """
+    )
+    op.drop_index('ix_resenas_hash_contenido', table_name='resenas')
+    op.drop_index('ix_resenas_hash', table_name='resenas')
+    op.create_index('ix_resenas_hash', 'resenas', ['hash_contenido'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_resenas_hash', table_name='resenas')
+    op.create_index('ix_resenas_hash', 'resenas', ['hash_contenido'], unique=False)
+    op.create_index(op.f('ix_resenas_hash_contenido'), 'resenas', ['hash_contenido'], unique=False)
@@ -0,0 +1,24 @@
+"""Index resenas.creado_en for incremental hash filter sync
+
+Revision ID: 5b7d3e9f1a26
+Revises: 8a4e61d0c2f7
+Create Date: 2026-10-18 12:41:05.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d3e9f1a26'
+down_revision = '8a4e61d0c2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_resenas_creado_en', 'resenas', ['creado_en'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_resenas_creado_en', table_name='resenas')
@@ -0,0 +1,37 @@
+"""Import state table for incremental imports
+
+Revision ID: 8a4e61d0c2f7
+Revises: 3f1c2a7b9e04
+Create Date: 2026-10-18 10:03:11.274961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e61d0c2f7'
+down_revision = '3f1c2a7b9e04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('estados_importacion',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('archivo', sa.String(length=255), nullable=False),
+    sa.Column('tamano', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('mtime', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.Column('digest', sa.String(length=64), nullable=True),
+    sa.Column('registros_procesados', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('completado', sa.Boolean(), server_default=sa.text('FALSE'), nullable=False),
+    sa.Column('creado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_estados_importacion_archivo', 'estados_importacion', ['archivo'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_estados_importacion_archivo', table_name='estados_importacion')
+    op.drop_table('estados_importacion')
@@ -0,0 +1,26 @@
+"""Processed-prefix offset and hash on import state
+
+Revision ID: a3c7e2f9d415
+Revises: f1d8a6c3b572
+Create Date: 2026-10-18 21:14:37.602194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c7e2f9d415'
+down_revision = 'f1d8a6c3b572'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('estados_importacion', sa.Column('bytes_procesados', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    op.add_column('estados_importacion', sa.Column('digest_procesado', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('estados_importacion', 'digest_procesado')
+    op.drop_column('estados_importacion', 'bytes_procesados')
@@ -0,0 +1,24 @@
+"""Reader resume context on import state
+
+Revision ID: b8e1d4c7a290
+Revises: a3c7e2f9d415
+Create Date: 2026-10-18 23:02:51.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e1d4c7a290'
+down_revision = 'a3c7e2f9d415'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('estados_importacion', sa.Column('reanudacion', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('estados_importacion', 'reanudacion')
@@ -0,0 +1,27 @@
+"""Add version_nlp to sentimientos and clasificaciones
+
+Revision ID: c4e8a2d61f93
+Revises: 5b7d3e9f1a26
+Create Date: 2026-10-18 15:02:37.104582
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2d61f93'
+down_revision = '5b7d3e9f1a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL = analizado antes de versionar; el reprocesador lo trata como desactualizado
+    op.add_column('sentimientos', sa.Column('version_nlp', sa.String(length=16), nullable=True))
+    op.add_column('clasificaciones', sa.Column('version_nlp', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('clasificaciones', 'version_nlp')
+    op.drop_column('sentimientos', 'version_nlp')
@@ -0,0 +1,33 @@
+"""Inverted keyword index and applied keywords per criterio
+
+Revision ID: d2a7f5b8e314
+Revises: c4e8a2d61f93
+Create Date: 2026-10-18 16:20:11.842907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7f5b8e314'
+down_revision = 'c4e8a2d61f93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('indice_palabras',
+    sa.Column('termino', sa.String(length=64), nullable=False),
+    sa.Column('resena_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['resena_id'], ['resenas.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('termino', 'resena_id')
+    )
+    op.create_index('ix_indice_palabras_resena', 'indice_palabras', ['resena_id'], unique=False)
+    op.add_column('criterios', sa.Column('palabras_clave_aplicadas', sa.ARRAY(sa.String()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('criterios', 'palabras_clave_aplicadas')
+    op.drop_index('ix_indice_palabras_resena', table_name='indice_palabras')
+    op.drop_table('indice_palabras')
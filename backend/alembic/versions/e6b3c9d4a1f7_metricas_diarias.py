@@ -0,0 +1,59 @@
+"""Daily rollup tables for dashboard metrics
+
+Revision ID: e6b3c9d4a1f7
+Revises: d2a7f5b8e314
+Create Date: 2026-10-18 17:42:36.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3c9d4a1f7'
+down_revision = 'd2a7f5b8e314'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('metricas_diarias',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('hotel_id', sa.UUID(), nullable=False),
+    sa.Column('plataforma_id', sa.UUID(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=True),
+    sa.Column('total_resenas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('con_puntuacion', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('suma_puntuacion', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.Column('total_positivas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('total_negativas', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('total_neutras', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hoteles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['plataforma_id'], ['plataformas.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hotel_id', 'plataforma_id', 'dia', name='uq_metrica_diaria', postgresql_nulls_not_distinct=True)
+    )
+    op.create_index('ix_metricas_diarias_dia', 'metricas_diarias', ['dia'], unique=False)
+    op.create_table('metricas_diarias_criterio',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('hotel_id', sa.UUID(), nullable=False),
+    sa.Column('plataforma_id', sa.UUID(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=True),
+    sa.Column('criterio_id', sa.UUID(), nullable=False),
+    sa.Column('suma_valoracion', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.Column('total_clasificaciones', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hoteles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['plataforma_id'], ['plataformas.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['criterio_id'], ['criterios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hotel_id', 'plataforma_id', 'dia', 'criterio_id', name='uq_metrica_diaria_criterio', postgresql_nulls_not_distinct=True)
+    )
+    op.create_index('ix_metricas_diarias_criterio_dia', 'metricas_diarias_criterio', ['dia'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_metricas_diarias_criterio_dia', table_name='metricas_diarias_criterio')
+    op.drop_table('metricas_diarias_criterio')
+    op.drop_index('ix_metricas_diarias_dia', table_name='metricas_diarias')
+    op.drop_table('metricas_diarias')
@@ -0,0 +1,26 @@
+"""Pending-period flag on daily metrics for incremental period materialization
+
+Revision ID: f1d8a6c3b572
+Revises: e6b3c9d4a1f7
+Create Date: 2026-10-18 19:05:48.130527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1d8a6c3b572'
+down_revision = 'e6b3c9d4a1f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('metricas_diarias', sa.Column('periodos_pendientes', sa.Boolean(), server_default=sa.text('TRUE'), nullable=False))
+    op.create_index('ix_metricas_diarias_periodos_pendientes', 'metricas_diarias', ['periodos_pendientes'], unique=False, postgresql_where=sa.text('periodos_pendientes'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_metricas_diarias_periodos_pendientes', table_name='metricas_diarias', postgresql_where=sa.text('periodos_pendientes'))
+    op.drop_column('metricas_diarias', 'periodos_pendientes')
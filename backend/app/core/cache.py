@@ -0,0 +1,232 @@
+"""
+Caché en dos niveles: LRU en memoria del proceso y Redis compartido
+
+El nivel Redis es opcional. Si no se configura la caché funciona solo en
+memoria; si deja de responder se omite durante una espera creciente
+(REDIS_ESPERA_MIN a REDIS_ESPERA_MAX segundos) y luego se vuelve a probar. Los valores deben poder
+serializarse a JSON.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+REDIS_ESPERA_MIN = 5
+REDIS_ESPERA_MAX = 300
+
+
+class CacheLRU:
+    """Diccionario acotado que descarta la entrada usada hace más tiempo"""
+
+    def __init__(self, tamano: int):
+        self.tamano = tamano
+        self._datos: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is not None:
+                self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave: str, valor: Any) -> None:
+        if self.tamano <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano:
+                self._datos.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+
+class CacheDosNiveles:
+    """
+    LRU local delante de Redis
+
+    Las consultas van por lotes (un MGET y un pipeline de SET por lote). Un
+    acierto en Redis se copia al LRU local.
+
+    Args:
+        prefijo: Prefijo de las claves en Redis
+        tamano: Entradas del LRU local
+        redis_url: URL de Redis; None = solo memoria
+        ttl: Segundos de vida de las claves en Redis (None = sin vencimiento)
+        cliente: Cliente ya creado con la interfaz de redis-py (mget,
+            pipeline); reemplaza a redis_url, p. ej. fakeredis en pruebas
+    """
+
+    def __init__(
+        self,
+        prefijo: str,
+        tamano: int,
+        redis_url: Optional[str] = None,
+        ttl: Optional[int] = None,
+        cliente: Any = None
+    ):
+        self.prefijo = prefijo
+        self.ttl = ttl
+        self.local = CacheLRU(tamano)
+        self._redis_url = redis_url
+        self._redis = cliente
+        self._suspendido_hasta = 0.0
+        self._espera = REDIS_ESPERA_MIN
+        self._lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_redis = 0
+        self.fallos = 0
+
+    def _cliente(self, forzar: bool = False) -> Any:
+        """Cliente Redis, creado al primer uso (None mientras está suspendido, salvo `forzar`)"""
+        if not forzar and time.monotonic() < self._suspendido_hasta:
+            return None
+        if self._redis is None and self._redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(
+                    self._redis_url, socket_timeout=1, socket_connect_timeout=1
+                )
+            except ImportError:
+                logger.warning("Paquete redis no instalado: caché solo en memoria")
+                self._redis_url = None
+        return self._redis
+
+    def _suspender_redis(self, error: Exception) -> None:
+        """Omitir Redis durante la espera actual y duplicarla para el próximo fallo"""
+        with self._lock:
+            espera = self._espera
+            self._suspendido_hasta = time.monotonic() + espera
+            self._espera = min(espera * 2, REDIS_ESPERA_MAX)
+        logger.warning(
+            f"Caché {self.prefijo}: Redis no disponible, solo memoria por {espera}s ({error})"
+        )
+
+    def _redis_respondio(self) -> None:
+        if self._espera != REDIS_ESPERA_MIN:
+            with self._lock:
+                self._espera = REDIS_ESPERA_MIN
+                self._suspendido_hasta = 0.0
+
+    def obtener_muchos(self, claves: Iterable[str]) -> Dict[str, Any]:
+        """Valores encontrados para las claves (las ausentes no aparecen)"""
+        encontrados = {}
+        faltantes = []
+        for clave in claves:
+            valor = self.local.obtener(clave)
+            if valor is None:
+                faltantes.append(clave)
+            else:
+                encontrados[clave] = valor
+        aciertos_memoria = len(encontrados)
+
+        cliente = self._cliente() if faltantes else None
+        if cliente is not None:
+            try:
+                valores = cliente.mget([self.prefijo + clave for clave in faltantes])
+                self._redis_respondio()
+            except Exception as e:
+                self._suspender_redis(e)
+                valores = []
+            for clave, valor in zip(faltantes, valores):
+                if valor is not None:
+                    valor = json.loads(valor)
+                    self.local.guardar(clave, valor)
+                    encontrados[clave] = valor
+
+        with self._lock:
+            self.aciertos_memoria += aciertos_memoria
+            self.aciertos_redis += len(encontrados) - aciertos_memoria
+            self.fallos += len(faltantes) - (len(encontrados) - aciertos_memoria)
+        return encontrados
+
+    def guardar_muchos(self, valores: Dict[str, Any]) -> None:
+        """Guardar en ambos niveles"""
+        if not valores:
+            return
+        for clave, valor in valores.items():
+            self.local.guardar(clave, valor)
+
+        cliente = self._cliente()
+        if cliente is not None:
+            try:
+                pipeline = cliente.pipeline(transaction=False)
+                for clave, valor in valores.items():
+                    pipeline.set(self.prefijo + clave, json.dumps(valor), ex=self.ttl)
+                pipeline.execute()
+                self._redis_respondio()
+            except Exception as e:
+                self._suspender_redis(e)
+
+    @property
+    def usa_redis(self) -> bool:
+        """Redis configurado (aunque esté suspendido por un fallo reciente)"""
+        return self._redis is not None or bool(self._redis_url)
+
+    def leer_contador(self, nombre: str) -> Optional[int]:
+        """Valor de un contador compartido en Redis (0 si no existe; None sin Redis)"""
+        cliente = self._cliente()
+        if cliente is None:
+            return None
+        try:
+            valor = cliente.get(self.prefijo + nombre)
+        except Exception as e:
+            self._suspender_redis(e)
+            return None
+        self._redis_respondio()
+        return int(valor) if valor is not None else 0
+
+    def incrementar_contador(
+        self, nombre: str, intentos: int = 1, pausa: float = 0.2, forzar: bool = True
+    ) -> Optional[int]:
+        """
+        Incrementar un contador compartido en Redis (None sin Redis o si falló)
+
+        Con `forzar` se intenta aunque Redis esté suspendido: perder un
+        incremento es peor que esperar el timeout. Entre intentos se espera
+        `pausa`, duplicándola.
+        """
+        for intento in range(intentos):
+            cliente = self._cliente(forzar=forzar)
+            if cliente is None:
+                return None
+            try:
+                valor = int(cliente.incr(self.prefijo + nombre))
+            except Exception as e:
+                if intento + 1 == intentos:
+                    self._suspender_redis(e)
+                    return None
+                time.sleep(pausa * 2 ** intento)
+                continue
+            self._redis_respondio()
+            return valor
+        return None
+
+    def limpiar(self) -> None:
+        """Vaciar el nivel local y los contadores (Redis no se toca)"""
+        self.local.limpiar()
+        with self._lock:
+            self.aciertos_memoria = self.aciertos_redis = self.fallos = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        consultas = self.aciertos_memoria + self.aciertos_redis + self.fallos
+        aciertos = self.aciertos_memoria + self.aciertos_redis
+        return {
+            "entradas_memoria": len(self.local),
+            "redis": self.usa_redis,
+            "redis_suspendido": time.monotonic() < self._suspendido_hasta,
+            "aciertos_memoria": self.aciertos_memoria,
+            "aciertos_redis": self.aciertos_redis,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(aciertos / consultas, 4) if consultas else 0.0,
+        }
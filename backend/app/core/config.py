@@ -41,11 +41,38 @@ class Settings(BaseSettings):
     SCRAPING_RETRY_DELAY: int = 5  # segundos
     CHROMEDRIVER_PATH: str = "/usr/bin/chromedriver"
     HEADLESS_BROWSER: bool = True
+    SCRAPING_TAMANO_LOTE: int = 1000  # Reseñas por INSERT/commit al importar
+    SCRAPING_INCREMENTAL: bool = True  # Omitir archivos sin cambios y reanudar desde el último checkpoint
+    SCRAPING_PARALELO: bool = False  # Importar cada plataforma en su propio hilo y sesión
+    SCRAPING_WORKERS: int = 3
+    SCRAPING_MODO_CARGA: str = "lotes"  # "lotes" (INSERT por lote) o "copy" (COPY + tabla de paso, para backfills)
+    SCRAPING_INGESTA_LOTE: int = 500  # Registros por lote en POST /scraping/ingest
+    SCRAPING_INGESTA_MAX_LINEA: int = 1024 * 1024  # Bytes máximos por línea NDJSON
+    SCRAPING_EMPAREJAMIENTO_DIFUSO: bool = True  # Resolver nombres de hotel por similitud de trigramas
+    SCRAPING_SIMILITUD_MINIMA: float = 0.5  # Índice de Jaccard entre trigramas
+    SCRAPING_DISTANCIA_MAXIMA_KM: float = 1.0  # Solo si el hotel y el registro tienen coordenadas
+    SCRAPING_FILTRO_HASHES: bool = True  # Filtro de Bloom para evitar consultas de duplicados
+    SCRAPING_FILTRO_RUTA: str = "data/filtro_hashes.bin"
+    SCRAPING_FILTRO_TASA_ERROR: float = 0.01
     
     # NLP Configuration
     SPACY_MODEL: str = "es_core_news_sm"
     SENTIMENT_THRESHOLD_POSITIVE: float = 0.2
     SENTIMENT_THRESHOLD_NEGATIVE: float = -0.2
+    NLP_MOTOR_SENTIMIENTO: str = "vader"  # "vader" (NLTK, léxico inglés) o "lexico" (léxico español con NumPy)
+    NLP_CLASIFICADOR: str = "palabras"  # "palabras" (palabras clave) o "modelo" (lineal sobre TF-IDF)
+    NLP_MODELO_DIR: str = "data/modelo_criterios"  # Artefactos del clasificador (python -m app.services.clasificador_criterios)
+    NLP_TAMANO_LOTE: int = 200  # Reseñas por lote (un INSERT por tabla y un commit)
+    NLP_PROCESOS: int = 1  # >1 reparte el análisis entre procesos (MotorNLPParalelo)
+    NLP_TAMANO_TAREA: int = 50  # Reseñas por tarea enviada a cada proceso
+    NLP_CACHE_TAMANO: int = 50000  # Resultados en el LRU en memoria (0 = sin caché)
+    NLP_CACHE_REDIS: bool = False  # Compartir resultados entre workers y ejecuciones en Redis
+    NLP_CACHE_TTL: int = 7 * 24 * 3600  # Segundos de vida de cada resultado en Redis
+    
+    # Caché de respuestas de los indicadores
+    INDICADORES_CACHE_TAMANO: int = 1000  # Respuestas en el LRU en memoria (0 = sin caché)
+    INDICADORES_CACHE_REDIS: bool = True  # Compartir respuestas y versión de datos en Redis
+    INDICADORES_CACHE_TTL: int = 24 * 3600  # Segundos de vida de cada respuesta en Redis
     
     # Export Configuration
     EXPORT_DIR: str = "exports"
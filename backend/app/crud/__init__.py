@@ -7,6 +7,9 @@ from app.crud.crud_plataforma import crud_plataforma, crud_hotel_plataforma
 from app.crud.crud_resena import crud_resena, crud_sentimiento, crud_clasificacion
 from app.crud.crud_criterio import crud_criterio
 from app.crud.crud_indicador import crud_indicador_periodo, crud_resena_destacada
+from app.crud.crud_estado_importacion import crud_estado_importacion
+from app.crud.crud_indice_palabras import crud_indice_palabras
+from app.crud.crud_metrica_diaria import crud_metrica_diaria
 
 __all__ = [
     "CRUDBase",
@@ -19,4 +22,7 @@ __all__ = [
     "crud_criterio",
     "crud_indicador_periodo",
     "crud_resena_destacada",
+    "crud_estado_importacion",
+    "crud_indice_palabras",
+    "crud_metrica_diaria",
 ]
@@ -0,0 +1,20 @@
+"""
+CRUD para EstadoImportacion
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.estado_importacion import EstadoImportacion
+
+
+class CRUDEstadoImportacion(CRUDBase[EstadoImportacion, dict, dict]):
+    """CRUD para EstadoImportacion"""
+    
+    def get_by_archivo(self, db: Session, *, archivo: str) -> Optional[EstadoImportacion]:
+        """Obtener estado de importación de un archivo"""
+        return db.query(EstadoImportacion).filter(EstadoImportacion.archivo == archivo).first()
+
+
+crud_estado_importacion = CRUDEstadoImportacion(EstadoImportacion)
@@ -3,16 +3,118 @@ CRUD para IndicadorPeriodo y ResenaDestacada
 """
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, text
 
 from app.crud.base import CRUDBase
 from app.models.indicador_periodo import IndicadorPeriodo
 from app.models.resena_destacada import ResenaDestacada
 from app.schemas.indicador import IndicadorPeriodoBase
 
+# Unidades de date_trunc de los períodos materializados
+UNIDADES_PERIODO = ("week", "month", "quarter")
+
+# Períodos (hotel, unidad, inicio UTC) con algún día marcado en metricas_diarias.
+# Solo se toman las marcas de hoteles activos: las de un hotel inactivo
+# quedan pendientes y se materializan cuando se reactiva. Las marcas se
+# quitan en orden de clave, como las escribe el procesamiento NLP, para no
+# bloquearse en cruz con un lote concurrente; un lote que cambie esos días
+# después espera al commit y los vuelve a marcar.
+_SQL_PERIODOS_AFECTADOS = """
+WITH marcadas AS (
+    UPDATE metricas_diarias
+    SET periodos_pendientes = FALSE
+    WHERE id IN (
+        SELECT metricas_diarias.id
+        FROM metricas_diarias
+        JOIN hoteles ON hoteles.id = metricas_diarias.hotel_id AND hoteles.activo
+        WHERE {condiciones}
+        ORDER BY metricas_diarias.hotel_id, metricas_diarias.plataforma_id, metricas_diarias.dia
+        FOR UPDATE OF metricas_diarias
+    )
+    RETURNING hotel_id, dia
+)
+INSERT INTO periodos_afectados (hotel_id, unidad, inicio)
+SELECT DISTINCT marcadas.hotel_id, unidades.unidad, date_trunc(unidades.unidad, marcadas.dia::timestamp)
+FROM marcadas CROSS JOIN unnest(CAST(:unidades AS text[])) AS unidades(unidad)
+WHERE marcadas.dia IS NOT NULL
+"""
+
+# Períodos afectados que se quedaron sin reseñas (reanálisis, reseñas quitadas
+# de los acumulados): su fila en indicadores_periodo ya no corresponde
+_SQL_BORRAR_VACIOS = """
+DELETE FROM indicadores_periodo
+USING periodos_afectados AS afectados
+WHERE indicadores_periodo.hotel_id = afectados.hotel_id
+  AND indicadores_periodo.periodo_inicio = afectados.inicio AT TIME ZONE 'UTC'
+  AND indicadores_periodo.periodo_fin = (afectados.inicio + ('1 ' || afectados.unidad)::interval) AT TIME ZONE 'UTC' - interval '1 microsecond'
+  AND NOT EXISTS (
+      SELECT 1 FROM metricas_diarias
+      WHERE metricas_diarias.hotel_id = afectados.hotel_id
+        AND metricas_diarias.dia >= afectados.inicio::date
+        AND metricas_diarias.dia < (afectados.inicio + ('1 ' || afectados.unidad)::interval)::date
+        AND metricas_diarias.total_resenas > 0
+  )
+"""
+
+# Un período completo por fila afectada, de los hoteles activos
+_SQL_MATERIALIZAR = """
+INSERT INTO indicadores_periodo (
+    hotel_id, periodo_inicio, periodo_fin, total_resenas,
+    promedio_sostenibilidad, promedio_calidad, promedio_general,
+    total_positivas, total_negativas, total_neutras
+)
+SELECT
+    afectados.hotel_id,
+    afectados.inicio AT TIME ZONE 'UTC',
+    (afectados.inicio + ('1 ' || afectados.unidad)::interval) AT TIME ZONE 'UTC' - interval '1 microsecond',
+    totales.total_resenas,
+    criterios.sostenibilidad,
+    criterios.calidad,
+    totales.suma_puntuacion / NULLIF(totales.con_puntuacion, 0),
+    totales.total_positivas,
+    totales.total_negativas,
+    totales.total_neutras
+FROM periodos_afectados AS afectados
+JOIN hoteles ON hoteles.id = afectados.hotel_id AND hoteles.activo
+JOIN LATERAL (
+    SELECT
+        sum(total_resenas) AS total_resenas,
+        sum(con_puntuacion) AS con_puntuacion,
+        sum(suma_puntuacion) AS suma_puntuacion,
+        sum(total_positivas) AS total_positivas,
+        sum(total_negativas) AS total_negativas,
+        sum(total_neutras) AS total_neutras
+    FROM metricas_diarias
+    WHERE metricas_diarias.hotel_id = afectados.hotel_id
+      AND metricas_diarias.dia >= afectados.inicio::date
+      AND metricas_diarias.dia < (afectados.inicio + ('1 ' || afectados.unidad)::interval)::date
+) AS totales ON totales.total_resenas > 0
+LEFT JOIN LATERAL (
+    SELECT
+        sum(mc.suma_valoracion) FILTER (WHERE c.codigo = 'SOSTENIBILIDAD')
+            / NULLIF(sum(mc.total_clasificaciones) FILTER (WHERE c.codigo = 'SOSTENIBILIDAD'), 0) AS sostenibilidad,
+        sum(mc.suma_valoracion) FILTER (WHERE c.codigo = 'CALIDAD')
+            / NULLIF(sum(mc.total_clasificaciones) FILTER (WHERE c.codigo = 'CALIDAD'), 0) AS calidad
+    FROM metricas_diarias_criterio AS mc
+    JOIN criterios AS c ON c.id = mc.criterio_id
+    WHERE mc.hotel_id = afectados.hotel_id
+      AND mc.dia >= afectados.inicio::date
+      AND mc.dia < (afectados.inicio + ('1 ' || afectados.unidad)::interval)::date
+) AS criterios ON TRUE
+ON CONFLICT ON CONSTRAINT uq_hotel_periodo DO UPDATE SET
+    total_resenas = excluded.total_resenas,
+    promedio_sostenibilidad = excluded.promedio_sostenibilidad,
+    promedio_calidad = excluded.promedio_calidad,
+    promedio_general = excluded.promedio_general,
+    total_positivas = excluded.total_positivas,
+    total_negativas = excluded.total_negativas,
+    total_neutras = excluded.total_neutras,
+    actualizado_en = now()
+"""
+
 
 class CRUDIndicadorPeriodo(CRUDBase[IndicadorPeriodo, IndicadorPeriodoBase, dict]):
     """CRUD para IndicadorPeriodo"""
@@ -52,6 +154,50 @@ class CRUDIndicadorPeriodo(CRUDBase[IndicadorPeriodo, IndicadorPeriodoBase, dict
         )
 
 
+    def materializar(
+        self,
+        db: Session,
+        *,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        solo_pendientes: bool = True
+    ) -> int:
+        """
+        Calcular en bloque los indicadores semanales, mensuales y trimestrales (sin commit)
+        
+        Lee los acumulados diarios: cada período (semana ISO, mes o trimestre,
+        en UTC) de un hotel activo con algún día marcado como pendiente se
+        recalcula completo y se guarda con INSERT ... ON CONFLICT sobre
+        uq_hotel_periodo; los que quedaron sin reseñas se borran. Con
+        solo_pendientes=False se recalculan todos los períodos con datos
+        entre `desde` y `hasta`.
+        
+        Returns:
+            Períodos escritos o borrados
+        """
+        condiciones = [
+            "metricas_diarias.periodos_pendientes" if solo_pendientes else "TRUE"
+        ]
+        parametros = {"unidades": list(UNIDADES_PERIODO)}
+        if desde is not None:
+            condiciones.append("metricas_diarias.dia >= :desde")
+            parametros["desde"] = desde
+        if hasta is not None:
+            condiciones.append("metricas_diarias.dia <= :hasta")
+            parametros["hasta"] = hasta
+        
+        db.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS periodos_afectados "
+            "(hotel_id uuid, unidad text, inicio timestamp) ON COMMIT DROP"
+        ))
+        db.execute(
+            text(_SQL_PERIODOS_AFECTADOS.format(condiciones=" AND ".join(condiciones))),
+            parametros
+        )
+        borrados = db.execute(text(_SQL_BORRAR_VACIOS)).rowcount
+        return borrados + db.execute(text(_SQL_MATERIALIZAR)).rowcount
+
+
 class CRUDResenaDestacada(CRUDBase[ResenaDestacada, dict, dict]):
     """CRUD para ResenaDestacada"""
     
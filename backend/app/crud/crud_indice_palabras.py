@@ -0,0 +1,51 @@
+"""
+CRUD para IndicePalabra
+"""
+from typing import Collection, Dict, Set
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.indice_palabra import IndicePalabra
+
+# Filas por INSERT (cada reseña aporta decenas de términos)
+FILAS_POR_INSERT = 5000
+
+
+class CRUDIndicePalabras(CRUDBase[IndicePalabra, dict, dict]):
+    """CRUD para el índice invertido término -> reseña"""
+    
+    def indexar(self, db: Session, *, terminos_por_resena: Dict[UUID, Set[str]]) -> int:
+        """Agregar los términos de cada reseña, ignorando los ya indexados (sin commit)"""
+        filas = [
+            {"termino": termino[:64], "resena_id": resena_id}
+            for resena_id, terminos in terminos_por_resena.items()
+            for termino in terminos
+        ]
+        for inicio in range(0, len(filas), FILAS_POR_INSERT):
+            db.execute(
+                pg_insert(IndicePalabra)
+                .values(filas[inicio:inicio + FILAS_POR_INSERT])
+                .on_conflict_do_nothing()
+            )
+        return len(filas)
+    
+    def resenas_con_terminos(self, db: Session, *, terminos: Collection[str]) -> Set[UUID]:
+        """Reseñas que contienen todos los términos"""
+        terminos = {termino[:64] for termino in terminos}
+        if not terminos:
+            return set()
+        filas = (
+            db.query(IndicePalabra.resena_id)
+            .filter(IndicePalabra.termino.in_(terminos))
+            .group_by(IndicePalabra.resena_id)
+            .having(func.count() == len(terminos))
+            .all()
+        )
+        return {fila.resena_id for fila in filas}
+
+
+crud_indice_palabras = CRUDIndicePalabras(IndicePalabra)
@@ -0,0 +1,160 @@
+"""
+CRUD para MetricaDiaria y MetricaDiariaCriterio
+"""
+from typing import Collection, Optional
+
+from sqlalchemy import Date, cast, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.clasificacion import Clasificacion
+from app.models.hotel_plataforma import HotelPlataforma
+from app.models.metrica_diaria import MetricaDiaria, MetricaDiariaCriterio
+from app.models.resena import Resena
+from app.models.sentimiento import Sentimiento
+
+
+def dia_resena():
+    """Día (UTC) de publicación de una reseña, clave de los acumulados"""
+    return cast(func.timezone(literal_column("'UTC'"), Resena.fecha_publicacion), Date)
+
+
+class CRUDMetricaDiaria(CRUDBase[MetricaDiaria, dict, dict]):
+    """
+    CRUD para los acumulados diarios por hotel y plataforma
+    
+    Los acumulados se mantienen sumando deltas (INSERT ... ON CONFLICT DO
+    UPDATE SET x = x + excluded.x): el bloqueo de cada fila ordena las
+    sumas de transacciones concurrentes sin perder ninguna, y las filas se
+    escriben en orden de clave para que dos lotes no se bloqueen en cruz.
+    """
+    
+    def _agregados(self, resena_ids: Optional[Collection], signo: int):
+        """SELECT de los acumulados de las reseñas procesadas (todas si resena_ids es None)"""
+        dia = dia_resena().label("dia")
+        filtro = [Resena.procesada == True]
+        if resena_ids is not None:
+            filtro.append(Resena.id.in_(list(resena_ids)))
+        
+        metricas = (
+            select(
+                HotelPlataforma.hotel_id,
+                HotelPlataforma.plataforma_id,
+                dia,
+                (signo * func.count(Resena.id)).label("total_resenas"),
+                (signo * func.count(Resena.puntuacion)).label("con_puntuacion"),
+                (signo * func.coalesce(func.sum(Resena.puntuacion), 0.0)).label("suma_puntuacion"),
+                *[
+                    (
+                        signo * func.count(Sentimiento.id).filter(Sentimiento.tipo_sentimiento == tipo)
+                    ).label(columna)
+                    for tipo, columna in (
+                        ("POSITIVO", "total_positivas"),
+                        ("NEGATIVO", "total_negativas"),
+                        ("NEUTRO", "total_neutras"),
+                    )
+                ]
+            )
+            .select_from(Resena)
+            .join(HotelPlataforma, HotelPlataforma.id == Resena.hotel_plataforma_id)
+            .outerjoin(Sentimiento, Sentimiento.resena_id == Resena.id)
+            .where(*filtro)
+            .group_by(HotelPlataforma.hotel_id, HotelPlataforma.plataforma_id, dia)
+            .order_by(HotelPlataforma.hotel_id, HotelPlataforma.plataforma_id, dia)
+        )
+        criterios = (
+            select(
+                HotelPlataforma.hotel_id,
+                HotelPlataforma.plataforma_id,
+                dia,
+                Clasificacion.criterio_id,
+                (signo * func.sum(Clasificacion.valoracion)).label("suma_valoracion"),
+                (signo * func.count(Clasificacion.id)).label("total_clasificaciones")
+            )
+            .select_from(Resena)
+            .join(HotelPlataforma, HotelPlataforma.id == Resena.hotel_plataforma_id)
+            .join(Clasificacion, Clasificacion.resena_id == Resena.id)
+            .where(*filtro)
+            .group_by(
+                HotelPlataforma.hotel_id, HotelPlataforma.plataforma_id, dia, Clasificacion.criterio_id
+            )
+            .order_by(
+                HotelPlataforma.hotel_id, HotelPlataforma.plataforma_id, dia, Clasificacion.criterio_id
+            )
+        )
+        return metricas, criterios
+    
+    def acumular(self, db: Session, *, resena_ids: Collection, signo: int = 1) -> None:
+        """
+        Sumar (o restar, con signo=-1) a los acumulados las reseñas procesadas dadas (sin commit)
+        
+        Para reemplazar el análisis de reseñas ya acumuladas: restar antes
+        de escribir los resultados nuevos y sumar después, en la misma
+        transacción.
+        """
+        if not resena_ids:
+            return
+        metricas, criterios = self._agregados(resena_ids, signo)
+        
+        columnas = [c.name for c in metricas.selected_columns]
+        sentencia = pg_insert(MetricaDiaria).from_select(columnas, metricas)
+        tabla = MetricaDiaria.__table__
+        db.execute(
+            sentencia.on_conflict_do_update(
+                constraint="uq_metrica_diaria",
+                set_={
+                    **{
+                        columna: tabla.c[columna] + sentencia.excluded[columna]
+                        for columna in columnas[3:]
+                    },
+                    "periodos_pendientes": True,
+                    "actualizado_en": func.now(),
+                }
+            )
+        )
+        
+        columnas = [c.name for c in criterios.selected_columns]
+        sentencia = pg_insert(MetricaDiariaCriterio).from_select(columnas, criterios)
+        tabla = MetricaDiariaCriterio.__table__
+        db.execute(
+            sentencia.on_conflict_do_update(
+                constraint="uq_metrica_diaria_criterio",
+                set_={
+                    columna: tabla.c[columna] + sentencia.excluded[columna]
+                    for columna in columnas[4:]
+                }
+            )
+        )
+    
+    def reconstruir(self, db: Session) -> int:
+        """
+        Recalcular todos los acumulados desde las reseñas (sin commit)
+        
+        Las tablas quedan bloqueadas para escritura hasta el commit: los
+        lotes NLP concurrentes esperan y suman su delta sobre el resultado.
+        
+        Returns:
+            Filas de metricas_diarias
+        """
+        db.execute(text(
+            "LOCK TABLE metricas_diarias, metricas_diarias_criterio IN EXCLUSIVE MODE"
+        ))
+        db.query(MetricaDiariaCriterio).delete(synchronize_session=False)
+        db.query(MetricaDiaria).delete(synchronize_session=False)
+        
+        metricas, criterios = self._agregados(None, 1)
+        resultado = db.execute(
+            pg_insert(MetricaDiaria).from_select(
+                [c.name for c in metricas.selected_columns], metricas
+            )
+        )
+        db.execute(
+            pg_insert(MetricaDiariaCriterio).from_select(
+                [c.name for c in criterios.selected_columns], criterios
+            )
+        )
+        return resultado.rowcount
+
+
+crud_metrica_diaria = CRUDMetricaDiaria(MetricaDiaria)
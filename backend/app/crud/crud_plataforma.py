@@ -1,11 +1,12 @@
 """
 CRUD para Plataforma y HotelPlataforma
 """
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.crud.base import CRUDBase
 from app.models.plataforma import Plataforma
@@ -41,6 +42,27 @@ class CRUDHotelPlataforma(CRUDBase[HotelPlataforma, HotelPlataformaCreate, dict]
             .first()
         )
     
+    def create_many(self, db: Session, *, objs_in: List[Dict[str, Any]]) -> List[UUID]:
+        """
+        Insertar varias relaciones hotel-plataforma con un solo INSERT
+        
+        Los pares (hotel_id, plataforma_id) que ya existen se omiten.
+        El commit queda a cargo del llamador.
+        
+        Returns:
+            IDs de las relaciones efectivamente insertadas
+        """
+        if not objs_in:
+            return []
+        
+        stmt = (
+            pg_insert(HotelPlataforma)
+            .values(objs_in)
+            .on_conflict_do_nothing(constraint="uq_hotel_plataforma")
+            .returning(HotelPlataforma.id)
+        )
+        return list(db.execute(stmt).scalars())
+    
     def get_by_hotel(self, db: Session, *, hotel_id: UUID) -> List[HotelPlataforma]:
         """Obtener todas las plataformas de un hotel"""
         return (
@@ -1,13 +1,17 @@
 """
 CRUD para Reseña, Sentimiento y Clasificación
 """
-from typing import List, Optional
+from typing import Any, Collection, Dict, List, Optional, Set
 from uuid import UUID
 from datetime import datetime
 import hashlib
+import io
+import uuid
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.crud.base import CRUDBase
 from app.models.resena import Resena
@@ -15,35 +19,184 @@ from app.models.sentimiento import Sentimiento
 from app.models.clasificacion import Clasificacion
 from app.schemas.resena import ResenaCreate, SentimientoBase, ClasificacionBase
 
+# Columnas que escribe la carga masiva por COPY
+COLUMNAS_CARGA = (
+    "hotel_plataforma_id", "nombre_autor", "ubicacion_autor",
+    "texto_positivo", "texto_negativo", "texto_completo",
+    "puntuacion", "fecha_publicacion", "tipo_estadia", "titulo",
+    "hash_contenido",
+)
+
+
+def _valor_copy(valor) -> str:
+    """Valor en el formato de texto de COPY (\\N para NULL)"""
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    return (
+        str(valor)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
 
 class CRUDResena(CRUDBase[Resena, ResenaCreate, dict]):
     """CRUD para Reseña"""
     
-    def create_with_hash(self, db: Session, *, obj_in: ResenaCreate) -> Resena:
-        """Crear reseña con hash para evitar duplicados"""
-        # Generar hash del contenido
+    def calcular_hash(self, obj_in: ResenaCreate) -> str:
+        """Calcular el hash de contenido usado para detectar duplicados"""
         texto_para_hash = ""
         if obj_in.texto_completo:
             texto_para_hash = obj_in.texto_completo
         elif obj_in.texto_positivo or obj_in.texto_negativo:
             texto_para_hash = f"{obj_in.texto_positivo or ''}{obj_in.texto_negativo or ''}"
         
-        hash_contenido = hashlib.sha256(texto_para_hash.encode()).hexdigest()
+        return hashlib.sha256(texto_para_hash.encode()).hexdigest()
+    
+    def create_with_hash(self, db: Session, *, obj_in: ResenaCreate, filtro=None) -> Resena:
+        """
+        Crear reseña con hash para evitar duplicados
+        
+        Con un `filtro` de hashes (FiltroHashes), la consulta previa solo se
+        hace si el filtro no descarta el hash.
+        """
+        # Generar hash del contenido
+        hash_contenido = self.calcular_hash(obj_in)
         
         # Verificar si ya existe
-        existing = self.get_by_hash(db, hash_contenido=hash_contenido)
-        if existing:
-            return existing
+        if filtro is None or hash_contenido in filtro:
+            existing = self.get_by_hash(db, hash_contenido=hash_contenido)
+            if existing:
+                return existing
         
         # Crear nueva reseña
         resena_data = obj_in.model_dump()
         resena_data["hash_contenido"] = hash_contenido
         db_obj = Resena(**resena_data)
         db.add(db_obj)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Insertada entretanto por otro proceso
+            db.rollback()
+            return self.get_by_hash(db, hash_contenido=hash_contenido)
         db.refresh(db_obj)
+        if filtro is not None:
+            filtro.agregar(hash_contenido)
         return db_obj
     
+    def create_many_with_hash(
+        self,
+        db: Session,
+        *,
+        objs_in: List[ResenaCreate],
+        hashes: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Insertar un lote de reseñas con un solo INSERT ... ON CONFLICT DO NOTHING
+        
+        Las reseñas cuyo hash ya existe (en la BD o repetido dentro del lote)
+        se descartan. `hashes`, si se pasa, son los ya calculados para cada
+        reseña. El commit queda a cargo del llamador.
+        
+        Returns:
+            Hashes de las reseñas efectivamente insertadas
+        """
+        if not objs_in:
+            return []
+        
+        filas = []
+        for i, obj_in in enumerate(objs_in):
+            fila = obj_in.model_dump()
+            fila["hash_contenido"] = hashes[i] if hashes is not None else self.calcular_hash(obj_in)
+            filas.append(fila)
+        
+        stmt = (
+            pg_insert(Resena)
+            .values(filas)
+            .on_conflict_do_nothing(index_elements=[Resena.hash_contenido])
+            .returning(Resena.hash_contenido)
+        )
+        return list(db.execute(stmt).scalars())
+    
+    def crear_staging(self, db: Session) -> str:
+        """
+        Crear una tabla UNLOGGED de paso para una carga por COPY
+        
+        El nombre es único por carga, así que dos importaciones simultáneas
+        no se pisan. Se crea dentro de la transacción actual: un rollback la
+        descarta.
+        """
+        nombre = f"resenas_carga_{uuid.uuid4().hex[:12]}"
+        columnas = ", ".join(COLUMNAS_CARGA)
+        db.execute(text(
+            f"CREATE UNLOGGED TABLE {nombre} AS SELECT {columnas} FROM resenas WITH NO DATA"
+        ))
+        return nombre
+    
+    def copiar_a_staging(self, db: Session, nombre: str, *, objs_in: List[ResenaCreate]) -> int:
+        """
+        Enviar un lote a la tabla de paso con COPY FROM STDIN
+        
+        Usa la conexión psycopg2 de la sesión, dentro de su transacción.
+        
+        Returns:
+            Filas copiadas
+        """
+        if not objs_in:
+            return 0
+        
+        buffer = io.StringIO()
+        for obj_in in objs_in:
+            fila = obj_in.model_dump()
+            fila["hash_contenido"] = self.calcular_hash(obj_in)
+            buffer.write("\t".join(_valor_copy(fila[c]) for c in COLUMNAS_CARGA))
+            buffer.write("\n")
+        buffer.seek(0)
+        
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {nombre} ({', '.join(COLUMNAS_CARGA)}) FROM STDIN", buffer
+            )
+        finally:
+            cursor.close()
+        return len(objs_in)
+    
+    def fusionar_staging(self, db: Session, nombre: str) -> List[str]:
+        """
+        Pasar la tabla de paso a resenas con un solo INSERT ... SELECT y eliminarla
+        
+        DISTINCT ON descarta hashes repetidos dentro de la carga y ON CONFLICT
+        los que ya estaban en resenas. El commit queda a cargo del llamador.
+        
+        Returns:
+            Hashes de las filas insertadas en resenas
+        """
+        columnas = ", ".join(COLUMNAS_CARGA)
+        insertadas = db.execute(text(
+            f"INSERT INTO resenas ({columnas}) "
+            f"SELECT DISTINCT ON (hash_contenido) {columnas} FROM {nombre} "
+            f"ORDER BY hash_contenido "
+            f"ON CONFLICT (hash_contenido) DO NOTHING "
+            f"RETURNING hash_contenido"
+        )).scalars().all()
+        db.execute(text(f"DROP TABLE {nombre}"))
+        return insertadas
+    
+    def hashes_existentes(self, db: Session, *, hashes: Collection[str]) -> Set[str]:
+        """Cuáles de los hashes ya están en resenas (una sola consulta)"""
+        if not hashes:
+            return set()
+        return set(
+            db.execute(
+                select(Resena.hash_contenido).where(Resena.hash_contenido.in_(list(hashes)))
+            ).scalars()
+        )
+    
     def get_by_hash(self, db: Session, *, hash_contenido: str) -> Optional[Resena]:
         """Obtener reseña por hash"""
         return db.query(Resena).filter(Resena.hash_contenido == hash_contenido).first()
@@ -70,6 +223,129 @@ class CRUDResena(CRUDBase[Resena, ResenaCreate, dict]):
             .all()
         )
     
+    def reclamar_pendientes(self, db: Session, *, limit: int = 100) -> List[Any]:
+        """
+        Tomar hasta `limit` reseñas pendientes para procesar
+        
+        Las filas quedan bloqueadas (FOR UPDATE SKIP LOCKED) hasta el commit,
+        así dos procesos nunca toman la misma reseña.
+        
+        Returns:
+            Filas (id, texto_completo, texto_positivo, texto_negativo)
+        """
+        return (
+            db.query(
+                Resena.id, Resena.texto_completo, Resena.texto_positivo, Resena.texto_negativo
+            )
+            .filter(Resena.procesada == False)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+    
+    def desactualizadas(
+        self,
+        db: Session,
+        *,
+        version_sentimiento: str,
+        versiones_criterio: Dict[UUID, str],
+        despues_de: Optional[UUID] = None,
+        limit: int = 500
+    ) -> List[Any]:
+        """
+        Reseñas analizadas con otra versión NLP, en orden de id
+        
+        Una reseña está desactualizada si su sentimiento no tiene
+        `version_sentimiento` o si a algún criterio le falta una
+        clasificación con su versión actual (incluye criterios nuevos). Se
+        pagina por clave: la siguiente página empieza después del último id
+        devuelto (`despues_de`). Las filas quedan bloqueadas (SKIP LOCKED)
+        hasta el commit.
+        
+        Returns:
+            Filas (id, texto_completo, texto_positivo, texto_negativo)
+        """
+        condiciones = [Sentimiento.version_nlp.is_distinct_from(version_sentimiento)]
+        for criterio_id, version in versiones_criterio.items():
+            condiciones.append(~(
+                select(Clasificacion.id)
+                .where(
+                    Clasificacion.resena_id == Resena.id,
+                    Clasificacion.criterio_id == criterio_id,
+                    Clasificacion.version_nlp == version
+                )
+                .exists()
+            ))
+        
+        query = (
+            db.query(
+                Resena.id, Resena.texto_completo, Resena.texto_positivo, Resena.texto_negativo
+            )
+            .join(Sentimiento, Sentimiento.resena_id == Resena.id)
+            .filter(or_(*condiciones))
+        )
+        if despues_de is not None:
+            query = query.filter(Resena.id > despues_de)
+        return (
+            query.order_by(Resena.id)
+            .limit(limit)
+            .with_for_update(of=Resena, skip_locked=True)
+            .all()
+        )
+    
+    def analizadas(
+        self,
+        db: Session,
+        *,
+        ids: Optional[Collection[UUID]] = None,
+        despues_de: Optional[UUID] = None,
+        limit: Optional[int] = 500
+    ) -> List[Any]:
+        """
+        Reseñas con sentimiento (ya analizadas), en orden de id
+        
+        Con `ids` se limita a esas reseñas; sin ellos se pagina por clave
+        desde `despues_de`.
+        
+        Returns:
+            Filas (id, texto_completo, texto_positivo, texto_negativo)
+        """
+        query = (
+            db.query(
+                Resena.id, Resena.texto_completo, Resena.texto_positivo, Resena.texto_negativo
+            )
+            .join(Sentimiento, Sentimiento.resena_id == Resena.id)
+        )
+        if ids is not None:
+            query = query.filter(Resena.id.in_(list(ids)))
+        if despues_de is not None:
+            query = query.filter(Resena.id > despues_de)
+        query = query.order_by(Resena.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def contar_analizadas(self, db: Session) -> int:
+        """Cantidad de reseñas con sentimiento"""
+        return db.query(func.count(Sentimiento.id)).scalar() or 0
+    
+    def marcar_procesadas(self, db: Session, *, ids: List[UUID]) -> List[UUID]:
+        """
+        Marcar varias reseñas como procesadas con un solo UPDATE (sin commit)
+        
+        Returns:
+            Ids de las reseñas que no estaban procesadas
+        """
+        if not ids:
+            return []
+        return list(db.execute(
+            update(Resena)
+            .where(Resena.id.in_(ids), Resena.procesada == False)
+            .values(procesada=True, fecha_procesamiento=func.now())
+            .returning(Resena.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+    
     def mark_as_processed(self, db: Session, *, resena_id: UUID) -> Resena:
         """Marcar reseña como procesada"""
         resena = self.get(db, resena_id)
@@ -87,6 +363,31 @@ class CRUDSentimiento(CRUDBase[Sentimiento, SentimientoBase, dict]):
     def get_by_resena(self, db: Session, *, resena_id: UUID) -> Optional[Sentimiento]:
         """Obtener sentimiento de una reseña"""
         return db.query(Sentimiento).filter(Sentimiento.resena_id == resena_id).first()
+    
+    def create_many(self, db: Session, *, objs_in: List[Dict[str, Any]]) -> None:
+        """Insertar sentimientos en bloque, ignorando reseñas que ya tienen uno (sin commit)"""
+        if not objs_in:
+            return
+        db.execute(
+            pg_insert(Sentimiento)
+            .values(objs_in)
+            .on_conflict_do_nothing(index_elements=[Sentimiento.resena_id])
+        )
+    
+    def upsert_many(self, db: Session, *, objs_in: List[Dict[str, Any]]) -> None:
+        """Insertar o reemplazar en el lugar el sentimiento de cada reseña (sin commit)"""
+        if not objs_in:
+            return
+        sentencia = pg_insert(Sentimiento).values(objs_in)
+        columnas = {
+            columna: sentencia.excluded[columna] for columna in objs_in[0] if columna != "resena_id"
+        }
+        db.execute(
+            sentencia.on_conflict_do_update(
+                index_elements=[Sentimiento.resena_id],
+                set_={**columnas, "procesado_en": func.now()}
+            )
+        )
 
 
 class CRUDClasificacion(CRUDBase[Clasificacion, ClasificacionBase, dict]):
@@ -96,6 +397,46 @@ class CRUDClasificacion(CRUDBase[Clasificacion, ClasificacionBase, dict]):
         """Obtener clasificaciones de una reseña"""
         return db.query(Clasificacion).filter(Clasificacion.resena_id == resena_id).all()
     
+    def create_many(self, db: Session, *, objs_in: List[Dict[str, Any]]) -> None:
+        """Insertar clasificaciones en bloque, ignorando pares reseña-criterio existentes (sin commit)"""
+        if not objs_in:
+            return
+        db.execute(
+            pg_insert(Clasificacion)
+            .values(objs_in)
+            .on_conflict_do_nothing(constraint="uq_resena_criterio")
+        )
+    
+    def upsert_many(self, db: Session, *, objs_in: List[Dict[str, Any]]) -> None:
+        """Insertar o reemplazar en el lugar cada par reseña-criterio (sin commit)"""
+        if not objs_in:
+            return
+        sentencia = pg_insert(Clasificacion).values(objs_in)
+        columnas = {
+            columna: sentencia.excluded[columna]
+            for columna in objs_in[0]
+            if columna not in ("resena_id", "criterio_id")
+        }
+        db.execute(
+            sentencia.on_conflict_do_update(
+                constraint="uq_resena_criterio",
+                set_={**columnas, "procesado_en": func.now()}
+            )
+        )
+    
+    def actualizar_version(
+        self, db: Session, *, criterio_id: UUID, anterior: str, nueva: str
+    ) -> int:
+        """Cambiar la versión de las clasificaciones de un criterio con un solo UPDATE (sin commit)"""
+        return (
+            db.query(Clasificacion)
+            .filter(
+                Clasificacion.criterio_id == criterio_id,
+                Clasificacion.version_nlp == anterior
+            )
+            .update({Clasificacion.version_nlp: nueva}, synchronize_session=False)
+        )
+    
     def get_by_resena_and_criterio(
         self, db: Session, *, resena_id: UUID, criterio_id: UUID
     ) -> Optional[Clasificacion]:
@@ -10,6 +10,9 @@ from app.models.criterio import Criterio
 from app.models.clasificacion import Clasificacion
 from app.models.indicador_periodo import IndicadorPeriodo
 from app.models.resena_destacada import ResenaDestacada
+from app.models.estado_importacion import EstadoImportacion
+from app.models.indice_palabra import IndicePalabra
+from app.models.metrica_diaria import MetricaDiaria, MetricaDiariaCriterio
 
 __all__ = [
     "Hotel",
@@ -21,4 +24,8 @@ __all__ = [
     "Clasificacion",
     "IndicadorPeriodo",
     "ResenaDestacada",
+    "EstadoImportacion",
+    "IndicePalabra",
+    "MetricaDiaria",
+    "MetricaDiariaCriterio",
 ]
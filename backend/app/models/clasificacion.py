@@ -31,6 +31,7 @@ class Clasificacion(Base):
     
     # Metadata
     procesado_en = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()"))
+    version_nlp = sa.Column(sa.String(16), nullable=True)  # NLPService.version_clasificacion() al analizar
     
     # Relaciones
     resena = relationship("Resena", back_populates="clasificaciones")
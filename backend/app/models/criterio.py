@@ -23,6 +23,8 @@ class Criterio(Base):
     
     # Palabras clave asociadas al criterio
     palabras_clave = sa.Column(sa.ARRAY(sa.String), nullable=True)
+    # Palabras con las que están hechas las clasificaciones (para reclasificar solo el cambio)
+    palabras_clave_aplicadas = sa.Column(sa.ARRAY(sa.String), nullable=True)
     
     # Metadata
     activo = sa.Column(sa.Boolean, nullable=False, server_default=sa.text("TRUE"))
@@ -0,0 +1,37 @@
+"""
+Modelo EstadoImportacion - Marca de agua y avance de importación por archivo
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class EstadoImportacion(Base):
+    """Estado de la última importación de un archivo de scraping"""
+    __tablename__ = "estados_importacion"
+    __table_args__ = (
+        sa.Index("ix_estados_importacion_archivo", "archivo", unique=True),
+    )
+    
+    id = sa.Column(UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()"))
+    archivo = sa.Column(sa.String(255), nullable=False)  # reseñas_google.json, reseñas_booking.json...
+    
+    # Marca de agua del archivo
+    tamano = sa.Column(sa.BigInteger, nullable=False, server_default=sa.text("0"))
+    mtime = sa.Column(sa.Float, nullable=False, server_default=sa.text("0"))
+    digest = sa.Column(sa.String(64), nullable=True)  # SHA-256 del contenido
+    
+    # Avance: registros ya confirmados en la BD
+    registros_procesados = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    bytes_procesados = sa.Column(sa.BigInteger, nullable=False, server_default=sa.text("0"))  # fin del último registro confirmado
+    digest_procesado = sa.Column(sa.String(64), nullable=True)  # SHA-256 de esos bytes
+    reanudacion = sa.Column(sa.JSON, nullable=True)  # byte y contexto para retomar la lectura (lector_json)
+    completado = sa.Column(sa.Boolean, nullable=False, server_default=sa.text("FALSE"))
+    
+    # Metadata
+    creado_en = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()"))
+    actualizado_en = sa.Column(sa.DateTime(timezone=True), nullable=True, onupdate=sa.text("now()"))
+    
+    def __repr__(self):
+        return f"<EstadoImportacion(archivo='{self.archivo}', registros_procesados={self.registros_procesados})>"
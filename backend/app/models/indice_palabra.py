@@ -0,0 +1,21 @@
+"""
+Modelo IndicePalabra - Índice invertido palabra -> reseña
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class IndicePalabra(Base):
+    """Una palabra normalizada presente en el texto de una reseña"""
+    __tablename__ = "indice_palabras"
+    __table_args__ = (
+        sa.Index("ix_indice_palabras_resena", "resena_id"),
+    )
+    
+    termino = sa.Column(sa.String(64), primary_key=True)  # Sin tildes ni mayúsculas (buscador_palabras.terminos)
+    resena_id = sa.Column(UUID(as_uuid=True), sa.ForeignKey("resenas.id", ondelete="CASCADE"), primary_key=True)
+    
+    def __repr__(self):
+        return f"<IndicePalabra(termino='{self.termino}', resena_id={self.resena_id})>"
@@ -0,0 +1,71 @@
+"""
+Modelos MetricaDiaria y MetricaDiariaCriterio - Acumulados diarios para los tableros
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class MetricaDiaria(Base):
+    """Reseñas procesadas de un hotel en una plataforma y un día (UTC)"""
+    __tablename__ = "metricas_diarias"
+    __table_args__ = (
+        sa.Index("ix_metricas_diarias_dia", "dia"),
+        sa.Index(
+            "ix_metricas_diarias_periodos_pendientes", "periodos_pendientes",
+            postgresql_where=sa.text("periodos_pendientes")
+        ),
+        # Las reseñas sin fecha de publicación se acumulan con dia NULL
+        sa.UniqueConstraint(
+            "hotel_id", "plataforma_id", "dia",
+            name="uq_metrica_diaria", postgresql_nulls_not_distinct=True
+        ),
+    )
+    
+    id = sa.Column(UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()"))
+    hotel_id = sa.Column(UUID(as_uuid=True), sa.ForeignKey("hoteles.id", ondelete="CASCADE"), nullable=False)
+    plataforma_id = sa.Column(UUID(as_uuid=True), sa.ForeignKey("plataformas.id", ondelete="CASCADE"), nullable=False)
+    dia = sa.Column(sa.Date, nullable=True)
+    
+    # Reseñas y puntuación
+    total_resenas = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    con_puntuacion = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    suma_puntuacion = sa.Column(sa.Float, nullable=False, server_default=sa.text("0"))
+    
+    # Distribución de sentimientos
+    total_positivas = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    total_negativas = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    total_neutras = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    
+    # Cambió desde la última materialización de indicadores_periodo
+    periodos_pendientes = sa.Column(sa.Boolean, nullable=False, server_default=sa.text("TRUE"))
+    
+    actualizado_en = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()"))
+    
+    def __repr__(self):
+        return f"<MetricaDiaria(hotel_id={self.hotel_id}, dia={self.dia}, total_resenas={self.total_resenas})>"
+
+
+class MetricaDiariaCriterio(Base):
+    """Valoraciones de un criterio para un hotel, plataforma y día"""
+    __tablename__ = "metricas_diarias_criterio"
+    __table_args__ = (
+        sa.Index("ix_metricas_diarias_criterio_dia", "dia"),
+        sa.UniqueConstraint(
+            "hotel_id", "plataforma_id", "dia", "criterio_id",
+            name="uq_metrica_diaria_criterio", postgresql_nulls_not_distinct=True
+        ),
+    )
+    
+    id = sa.Column(UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()"))
+    hotel_id = sa.Column(UUID(as_uuid=True), sa.ForeignKey("hoteles.id", ondelete="CASCADE"), nullable=False)
+    plataforma_id = sa.Column(UUID(as_uuid=True), sa.ForeignKey("plataformas.id", ondelete="CASCADE"), nullable=False)
+    dia = sa.Column(sa.Date, nullable=True)
+    criterio_id = sa.Column(UUID(as_uuid=True), sa.ForeignKey("criterios.id", ondelete="CASCADE"), nullable=False)
+    
+    suma_valoracion = sa.Column(sa.Float, nullable=False, server_default=sa.text("0"))
+    total_clasificaciones = sa.Column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    
+    def __repr__(self):
+        return f"<MetricaDiariaCriterio(criterio_id={self.criterio_id}, dia={self.dia})>"
@@ -16,7 +16,8 @@ class Resena(Base):
         sa.Index("ix_resenas_fecha_publicacion", "fecha_publicacion"),
         sa.Index("ix_resenas_puntuacion", "puntuacion"),
         sa.Index("ix_resenas_procesada", "procesada"),
-        sa.Index("ix_resenas_hash", "hash_contenido"),
+        sa.Index("ix_resenas_hash", "hash_contenido", unique=True),
+        sa.Index("ix_resenas_creado_en", "creado_en"),
     )
     
     id = sa.Column(UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()"))
@@ -44,7 +45,7 @@ class Resena(Base):
     fecha_procesamiento = sa.Column(sa.DateTime(timezone=True), nullable=True)
     
     # Hash para evitar duplicados
-    hash_contenido = sa.Column(sa.String(64), nullable=True, index=True)
+    hash_contenido = sa.Column(sa.String(64), nullable=True)
     
     # Metadata
     creado_en = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()"))
@@ -22,7 +22,7 @@ class Sentimiento(Base):
     # Tipo de sentimiento
     tipo_sentimiento = sa.Column(sa.String(20), nullable=False)  # POSITIVO, NEGATIVO, NEUTRO
     
-    # Scores de sentimiento (VADER o TextBlob)
+    # Scores de sentimiento (VADER o léxico español, según NLP_MOTOR_SENTIMIENTO)
     score_positivo = sa.Column(sa.Float, nullable=False, server_default=sa.text("0.0"))
     score_negativo = sa.Column(sa.Float, nullable=False, server_default=sa.text("0.0"))
     score_neutro = sa.Column(sa.Float, nullable=False, server_default=sa.text("0.0"))
@@ -33,6 +33,7 @@ class Sentimiento(Base):
     
     # Metadata
     procesado_en = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()"))
+    version_nlp = sa.Column(sa.String(16), nullable=True)  # NLPService.version_sentimiento() al analizar
     
     # Relaciones
     resena = relationship("Resena", back_populates="sentimiento")
@@ -11,6 +11,7 @@ from app.db.session import get_db
 from app.crud import crud_hotel
 from app.schemas.hotel import HotelCreate, HotelUpdate, HotelRead, HotelWithStats
 from app.schemas.base import ResponseBase
+from app.services.cache_indicadores import cache_indicadores
 
 router = APIRouter()
 
@@ -66,6 +67,7 @@ def crear_hotel(hotel_in: HotelCreate, db: Session = Depends(get_db)):
         )
     
     hotel = crud_hotel.create(db, obj_in=hotel_in)
+    cache_indicadores.invalidar()
     return hotel
 
 
@@ -81,6 +83,7 @@ def actualizar_hotel(
         raise HTTPException(status_code=404, detail="Hotel no encontrado")
     
     hotel = crud_hotel.update(db, db_obj=hotel, obj_in=hotel_in)
+    cache_indicadores.invalidar()
     return hotel
 
 
@@ -93,5 +96,6 @@ def eliminar_hotel(hotel_id: UUID, db: Session = Depends(get_db)):
     
     # Soft delete
     crud_hotel.update(db, db_obj=hotel, obj_in={"activo": False})
+    cache_indicadores.invalidar()
     
     return ResponseBase(message="Hotel eliminado correctamente")
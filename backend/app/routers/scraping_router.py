@@ -1,12 +1,13 @@
 """
 Router de Scraping - Simulación de scraping (real se ejecuta diariamente)
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.schemas.scraping import ScrapingResponse, ScrapingResult
+from app.schemas.scraping import IngestaResultado, ScrapingResponse, ScrapingResult
 from app.schemas.base import ResponseBase
+from app.services.ingesta_service import ingesta_service
 from app.services.scraping_service import scraping_service
 
 router = APIRouter()
@@ -55,7 +56,10 @@ def ejecutar_scraping_manual(db: Session = Depends(get_db)):
             total_duplicadas=total_duplicadas,
             total_procesadas=resultado.get("procesadas_nlp", 0),
             errores=resultado.get("errores", []),
-            tiempo_ejecucion=resultado.get("tiempo_ejecucion", 0.0)
+            tiempo_ejecucion=resultado.get("tiempo_ejecucion", 0.0),
+            cache_resolucion=resultado.get("cache_resolucion", {}),
+            tiempos_plataforma=resultado.get("tiempos_plataforma", {}),
+            cache_nlp=resultado.get("cache_nlp", {})
         )
         
     except Exception as e:
@@ -65,6 +69,24 @@ def ejecutar_scraping_manual(db: Session = Depends(get_db)):
         )
 
 
+@router.post("/ingest", response_model=IngestaResultado)
+async def ingestar_resenas(request: Request, db: Session = Depends(get_db)):
+    """
+    Recibir reseñas de scrapers remotos en NDJSON (application/x-ndjson).
+    
+    Una reseña por línea, con "plataforma" (GOOGLE, BOOKING o AIRBNB) y los
+    campos que emite el scraper de esa plataforma. El cuerpo puede enviarse
+    por chunks: se procesa a medida que llega y se escribe por lotes.
+    """
+    try:
+        return await ingesta_service.ingestar(db, request.stream())
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error en la ingesta: {str(e)}"
+        )
+
+
 @router.get("/estado", response_model=ResponseBase)
 def obtener_estado_scraping():
     """Obtener estado del sistema de scraping"""
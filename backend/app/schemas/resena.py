@@ -53,6 +53,7 @@ class SentimientoRead(SentimientoBase):
     id: UUID
     resena_id: UUID
     procesado_en: datetime
+    version_nlp: Optional[str] = None
 
 
 class ClasificacionBase(BaseSchema):
@@ -68,6 +69,7 @@ class ClasificacionRead(ClasificacionBase):
     id: UUID
     resena_id: UUID
     procesado_en: datetime
+    version_nlp: Optional[str] = None
 
 
 class ResenaWithAnalysis(ResenaRead):
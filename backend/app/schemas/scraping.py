@@ -1,7 +1,7 @@
 """
 Schemas para Scraping
 """
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from uuid import UUID
 from datetime import datetime
 
@@ -43,3 +43,28 @@ class ScrapingResult(BaseSchema):
     total_procesadas: int
     errores: List[str] = []
     tiempo_ejecucion: float
+    cache_resolucion: Dict[str, int] = {}
+    tiempos_plataforma: Dict[str, float] = {}
+    cache_nlp: Dict[str, Any] = {}
+
+
+class IngestaLote(BaseSchema):
+    """Resultado de un lote de la ingesta NDJSON"""
+    lote: int
+    registros: int
+    nuevas: int
+    duplicadas: int
+    sin_hotel: int = 0
+    invalidos: int = 0
+
+
+class IngestaResultado(BaseSchema):
+    """Resultado de POST /scraping/ingest"""
+    registros: int
+    nuevas: int
+    duplicadas: int
+    invalidos: int
+    completo: bool = True
+    lotes: List[IngestaLote] = []
+    errores: List[str] = []
+    cache_resolucion: Dict[str, int] = {}
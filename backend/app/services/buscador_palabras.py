@@ -0,0 +1,169 @@
+"""
+Búsqueda de palabras clave de criterios con un autómata Aho-Corasick
+
+Un solo recorrido del texto devuelve las palabras clave encontradas para
+todos los criterios. La comparación ignora tildes y mayúsculas y exige
+límites de palabra ("verde" no coincide con "verdes").
+"""
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Sequence, Set, Tuple
+
+# (criterio, posición de la palabra en su lista, largo normalizado)
+Salida = Tuple[int, int, int]
+
+
+def _tabla_sin_tildes() -> Dict[int, str]:
+    """Letras latinas acentuadas -> letra base (á -> a, ñ -> n, ü -> u)"""
+    tabla = {}
+    for codigo in range(0xC0, 0x250):
+        base = "".join(
+            c for c in unicodedata.normalize("NFKD", chr(codigo)) if not unicodedata.combining(c)
+        )
+        if base and base != chr(codigo):
+            tabla[codigo] = base
+    return tabla
+
+
+_SIN_TILDES = _tabla_sin_tildes()
+
+_TERMINO = re.compile(r"\w+")
+
+# Demasiado frecuentes para el índice invertido (ya normalizadas)
+PALABRAS_VACIAS = frozenset(
+    "a al algo como con de del el en es esta este fue ha la las le lo los me mi muy "
+    "no nos o para pero por que se si sin su sus te un una uno unos y ya".split()
+)
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes (ñ -> n); conserva el resto de caracteres"""
+    texto = texto.lower()
+    return texto if texto.isascii() else texto.translate(_SIN_TILDES)
+
+
+def terminos(texto: str) -> Set[str]:
+    """Palabras normalizadas de un texto, sin palabras vacías (claves del índice invertido)"""
+    return {t for t in _TERMINO.findall(normalizar(texto)) if t not in PALABRAS_VACIAS}
+
+
+class BuscadorPalabras:
+    """Autómata compilado a partir de las palabras clave de varios criterios"""
+
+    def __init__(self, palabras_por_criterio: Sequence[Sequence[str]]):
+        self.palabras = [list(palabras) for palabras in palabras_por_criterio]
+        self._transiciones: List[Dict[str, int]] = [{}]
+        self._fallos: List[int] = [0]
+        self._salidas: List[List[Salida]] = [[]]
+
+        for criterio, palabras in enumerate(self.palabras):
+            for posicion, palabra in enumerate(palabras):
+                patron = normalizar(palabra).strip()
+                if patron:
+                    self._insertar(patron, (criterio, posicion, len(patron)))
+
+        self._enlazar()
+        self._completar()
+
+    def _insertar(self, patron: str, salida: Salida) -> None:
+        estado = 0
+        for caracter in patron:
+            siguiente = self._transiciones[estado].get(caracter)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones[estado][caracter] = siguiente
+                self._transiciones.append({})
+                self._fallos.append(0)
+                self._salidas.append([])
+            estado = siguiente
+        self._salidas[estado].append(salida)
+
+    def _enlazar(self) -> None:
+        """Enlaces de fallo por BFS; cada estado hereda las salidas de su fallo"""
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self._transiciones[estado].items():
+                cola.append(siguiente)
+                fallo = self._fallos[estado]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallos[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallos[siguiente] = destino if destino != siguiente else 0
+                self._salidas[siguiente] = self._salidas[siguiente] + self._salidas[self._fallos[siguiente]]
+
+    def _completar(self) -> None:
+        """
+        Convertir las transiciones en un autómata determinista completo
+        
+        Para cada estado se precalcula el destino de todo carácter que aparece
+        en algún patrón, siguiendo los enlaces de fallo; cualquier otro
+        carácter lleva a la raíz. Así el recorrido hace una sola búsqueda por
+        carácter.
+        """
+        alfabeto = {c for transiciones in self._transiciones for c in transiciones}
+        completas: List[Dict[str, int]] = [dict() for _ in self._transiciones]
+        completas[0] = {c: self._transiciones[0].get(c, 0) for c in alfabeto}
+
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            heredadas = completas[self._fallos[estado]]
+            propias = self._transiciones[estado]
+            completas[estado] = {c: propias.get(c, heredadas[c]) for c in alfabeto}
+            cola.extend(propias.values())
+
+        # Sin destinos a la raíz: dict.get(c, 0) los cubre
+        self._delta = [
+            {c: destino for c, destino in transiciones.items() if destino}
+            for transiciones in completas
+        ]
+
+    def buscar(self, texto: str) -> List[List[str]]:
+        """
+        Palabras clave presentes en el texto, por criterio
+
+        Returns:
+            Una lista por criterio con sus palabras encontradas, sin repetir y
+            en el orden en que el criterio las define
+        """
+        texto = normalizar(texto)
+        largo = len(texto)
+        encontradas = [set() for _ in self.palabras]
+        delta, salidas = self._delta, self._salidas
+
+        estado = 0
+        for fin, caracter in enumerate(texto):
+            estado = delta[estado].get(caracter, 0)
+            if not salidas[estado]:
+                continue
+
+            for criterio, posicion, longitud in salidas[estado]:
+                inicio = fin - longitud + 1
+                if inicio > 0 and texto[inicio - 1].isalnum():
+                    continue
+                if fin + 1 < largo and texto[fin + 1].isalnum():
+                    continue
+                encontradas[criterio].add(posicion)
+
+        return [
+            [palabras[posicion] for posicion in sorted(posiciones)]
+            for palabras, posiciones in zip(self.palabras, encontradas)
+        ]
+
+
+@lru_cache(maxsize=8)
+def _compilar(palabras_por_criterio: Tuple[Tuple[str, ...], ...]) -> BuscadorPalabras:
+    return BuscadorPalabras(palabras_por_criterio)
+
+
+def obtener_buscador(palabras_por_criterio: Sequence[Sequence[str]]) -> BuscadorPalabras:
+    """
+    Autómata para estas listas de palabras clave
+
+    Se compila una vez por combinación de listas: si un criterio cambia sus
+    palabras (o se activa o desactiva), la siguiente llamada compila uno nuevo.
+    """
+    return _compilar(tuple(tuple(palabras) for palabras in palabras_por_criterio))
@@ -0,0 +1,139 @@
+"""
+Caché de respuestas de los endpoints de indicadores
+
+Las respuestas se guardan en una CacheDosNiveles (LRU del proceso y Redis)
+con clave endpoint + versión de datos + parámetros normalizados. La versión
+es un contador global en Redis que se incrementa cuando cambian los datos
+(lotes NLP confirmados, hoteles creados o modificados, métricas
+reconstruidas): las respuestas anteriores dejan de consultarse y vencen por
+TTL o salen del LRU.
+
+Sin Redis (INDICADORES_CACHE_REDIS=False) el contador es local al proceso,
+útil solo con un proceso que además escribe los datos. Si Redis estaba
+configurado y deja de responder, la caché se omite hasta que vuelva: mejor
+recalcular que servir respuestas de una versión que ya no se puede
+comprobar. Un incremento de versión que falla se reintenta y, si sigue
+fallando, queda pendiente y se aplica en el próximo uso de la caché en el
+proceso; mientras tanto ese proceso no usa la caché.
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from app.core.cache import CacheDosNiveles
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTADOR_VERSION = "version"
+INTENTOS_INVALIDAR = 3
+
+
+def _normalizar(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, UUID):
+        return str(valor)
+    return valor
+
+
+class CacheIndicadores:
+    """Caché versionada de respuestas de indicadores"""
+
+    def __init__(self):
+        self.cache: Optional[CacheDosNiveles] = None
+        if settings.INDICADORES_CACHE_TAMANO > 0 or settings.INDICADORES_CACHE_REDIS:
+            self.cache = CacheDosNiveles(
+                prefijo="indicadores:",
+                tamano=settings.INDICADORES_CACHE_TAMANO,
+                redis_url=settings.REDIS_URL if settings.INDICADORES_CACHE_REDIS else None,
+                ttl=settings.INDICADORES_CACHE_TTL
+            )
+        self._compartida = settings.INDICADORES_CACHE_REDIS
+        self._version_local = 0
+        self._invalidacion_pendiente = False
+        self._omitidas = 0
+        self._lock = threading.Lock()
+
+    def version(self) -> Optional[int]:
+        """Versión actual de los datos (None = caché no utilizable)"""
+        if self.cache is None:
+            return None
+        if not self._compartida:
+            return self._version_local
+        if self._invalidacion_pendiente:
+            return self._incrementar_version(intentos=1, forzar=False)
+        return self.cache.leer_contador(CONTADOR_VERSION)
+
+    def invalidar(self) -> None:
+        """Nueva versión de datos: las respuestas guardadas dejan de usarse"""
+        with self._lock:
+            self._version_local += 1
+        if self.cache is not None and self._compartida:
+            self._incrementar_version(intentos=INTENTOS_INVALIDAR)
+
+    def _incrementar_version(self, intentos: int, forzar: bool = True) -> Optional[int]:
+        """Incrementar el contador compartido, dejándolo pendiente si Redis no responde"""
+        version = self.cache.incrementar_contador(
+            CONTADOR_VERSION, intentos=intentos, forzar=forzar
+        )
+        if version is None:
+            if not self._invalidacion_pendiente:
+                logger.error(
+                    "No se pudo invalidar la caché de indicadores en Redis: "
+                    "otros procesos pueden servir respuestas viejas hasta reintentarlo"
+                )
+            self._invalidacion_pendiente = True
+        else:
+            if self._invalidacion_pendiente:
+                logger.info(f"Invalidación pendiente aplicada (versión {version})")
+            self._invalidacion_pendiente = False
+        return version
+
+    def clave(self, endpoint: str, version: int, parametros: Dict[str, Any]) -> str:
+        """Clave de una respuesta: parámetros sin valores None y en orden de nombre"""
+        normalizados = {
+            nombre: _normalizar(valor)
+            for nombre, valor in parametros.items()
+            if valor is not None
+        }
+        contenido = json.dumps(normalizados, sort_keys=True, default=str)
+        return f"{endpoint}:{version}:{hashlib.sha1(contenido.encode('utf-8')).hexdigest()}"
+
+    def obtener_o_calcular(
+        self, endpoint: str, parametros: Dict[str, Any], calcular: Callable[[], Any]
+    ) -> Any:
+        """Respuesta guardada para los parámetros o, si no hay, `calcular()` (y guardarla)"""
+        version = self.version()
+        if version is None:
+            if self.cache is not None:
+                with self._lock:
+                    self._omitidas += 1
+            return calcular()
+
+        clave = self.clave(endpoint, version, parametros)
+        guardado = self.cache.obtener_muchos([clave])
+        if clave in guardado:
+            return guardado[clave]
+
+        respuesta = calcular()
+        self.cache.guardar_muchos({clave: respuesta})
+        return respuesta
+
+    def estadisticas(self) -> Dict[str, Any]:
+        if self.cache is None:
+            return {"activa": False}
+        return {
+            "activa": True,
+            "version": self.version(),
+            "invalidacion_pendiente": self._invalidacion_pendiente,
+            "omitidas": self._omitidas,
+            "niveles": self.cache.estadisticas(),
+        }
+
+
+cache_indicadores = CacheIndicadores()
@@ -0,0 +1,197 @@
+"""
+Carga por lotes de reseñas importadas
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_resena
+from app.schemas.resena import ResenaCreate
+from app.services.filtro_hashes import FiltroHashes, obtener_filtro
+from app.services.resolutor_importacion import ResolutorImportacion
+
+MODOS_CARGA = ("lotes", "copy")
+
+
+class CargadorResenas:
+    """
+    Acumula reseñas y las escribe por lotes
+
+    Cada lote se inserta con un solo INSERT ... ON CONFLICT (hash_contenido)
+    DO NOTHING RETURNING y un commit, en lugar de SELECT + INSERT + COMMIT +
+    REFRESH por reseña.
+
+    En modo "copy" (pensado para backfills grandes) los lotes se envían con
+    COPY FROM STDIN a una tabla UNLOGGED de paso y `cerrar` los pasa a
+    resenas con un único INSERT ... SELECT deduplicado. Toda la carga es una
+    sola transacción, por lo que el checkpoint solo avanza al final. Tras el
+    commit los hashes fusionados se agregan al filtro del proceso: la
+    sincronización por marca de agua no los vería, porque su creado_en es el
+    del inicio de esa transacción larga.
+
+    En modo "lotes" se usa además el filtro de hashes (SCRAPING_FILTRO_HASHES):
+    las reseñas que el filtro no descarta se verifican con un solo SELECT por
+    lote y las que ya existen no viajan en el INSERT.
+
+    `al_confirmar` recibe la posición del último registro agregado y se
+    invoca dentro de la transacción de cada lote, antes del commit.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        tamano_lote: Optional[int] = None,
+        resolutor: Optional[ResolutorImportacion] = None,
+        al_confirmar: Optional[Callable[[int], None]] = None,
+        modo: Optional[str] = None,
+        filtro: Optional[FiltroHashes] = None
+    ):
+        self.modo = modo or settings.SCRAPING_MODO_CARGA
+        if self.modo not in MODOS_CARGA:
+            raise ValueError(f"Modo de carga no soportado: {self.modo}")
+
+        self.db = db
+        self.tamano_lote = tamano_lote or settings.SCRAPING_TAMANO_LOTE
+        self.resolutor = resolutor
+        self.al_confirmar = al_confirmar
+        self.posicion = 0
+        self.nuevas = 0
+        self.duplicadas = 0
+        self.copiadas = 0
+        self.filtro = filtro
+        if self.filtro is None and self.modo == "lotes":
+            self.filtro = obtener_filtro(db)
+        self.descartadas_por_filtro = 0
+        self.verificadas = 0
+        self._staging: Optional[str] = None
+        self._pendientes: List[ResenaCreate] = []
+
+    def agregar(self, resena: ResenaCreate, posicion: int = 0) -> None:
+        """Agregar una reseña al lote, escribiéndolo si se llenó"""
+        self._pendientes.append(resena)
+        self.posicion = posicion
+        if len(self._pendientes) >= self.tamano_lote:
+            self.vaciar()
+
+    def _persistir_relaciones(self) -> None:
+        """Insertar las relaciones hotel-plataforma nuevas en la transacción actual"""
+        if self.resolutor is None:
+            return
+        reasignadas = self.resolutor.persistir_pendientes()
+        for resena in self._pendientes:
+            resena.hotel_plataforma_id = reasignadas.get(
+                resena.hotel_plataforma_id, resena.hotel_plataforma_id
+            )
+
+    def _confirmar_relaciones(self) -> None:
+        if self.resolutor is not None:
+            self.resolutor.confirmar_relaciones()
+
+    def _revertir(self) -> None:
+        """Rollback; las relaciones insertadas en la transacción vuelven a quedar pendientes"""
+        self.db.rollback()
+        if self.resolutor is not None:
+            self.resolutor.revertir_relaciones()
+
+    def vaciar(self) -> None:
+        """Escribir el lote pendiente"""
+        if not self._pendientes and not (self.resolutor and self.resolutor.tiene_pendientes()):
+            return
+
+        if self.modo == "copy":
+            self._copiar()
+            return
+
+        try:
+            # Las relaciones hotel-plataforma nuevas van en la misma transacción que el lote
+            self._persistir_relaciones()
+            nuevas, hashes = self._candidatas()
+            insertadas = crud_resena.create_many_with_hash(self.db, objs_in=nuevas, hashes=hashes)
+            if self.al_confirmar is not None:
+                self.al_confirmar(self.posicion)
+            self.db.commit()
+        except Exception:
+            self._revertir()
+            raise
+        self._confirmar_relaciones()
+
+        if self.filtro is not None:
+            for hash_contenido in insertadas:
+                self.filtro.agregar(hash_contenido)
+
+        self.nuevas += len(insertadas)
+        self.duplicadas += len(self._pendientes) - len(insertadas)
+        self._pendientes = []
+
+    def _candidatas(self) -> Tuple[List[ResenaCreate], List[str]]:
+        """Reseñas del lote que pueden ser nuevas, con sus hashes"""
+        hashes = [crud_resena.calcular_hash(resena) for resena in self._pendientes]
+        if self.filtro is None:
+            return self._pendientes, hashes
+
+        posibles = {h for h in hashes if h in self.filtro}
+        self.descartadas_por_filtro += len(hashes) - len(posibles)
+        self.verificadas += len(posibles)
+        existentes = crud_resena.hashes_existentes(self.db, hashes=posibles)
+
+        candidatas = [
+            (resena, h) for resena, h in zip(self._pendientes, hashes) if h not in existentes
+        ]
+        return [r for r, _ in candidatas], [h for _, h in candidatas]
+
+    def _copiar(self) -> None:
+        """Enviar el lote pendiente a la tabla de paso (sin commit)"""
+        try:
+            self._persistir_relaciones()
+            if self._staging is None:
+                self._staging = crud_resena.crear_staging(self.db)
+            self.copiadas += crud_resena.copiar_a_staging(
+                self.db, self._staging, objs_in=self._pendientes
+            )
+        except Exception:
+            self._revertir()
+            raise
+        self._pendientes = []
+
+    def _fusionar(self) -> None:
+        """Pasar la tabla de paso a resenas y confirmar la carga completa"""
+        insertadas: List[str] = []
+        try:
+            if self._staging is not None:
+                insertadas = crud_resena.fusionar_staging(self.db, self._staging)
+                self._staging = None
+            if self.al_confirmar is not None:
+                self.al_confirmar(self.posicion)
+            self.db.commit()
+        except Exception:
+            self._revertir()
+            raise
+        self._confirmar_relaciones()
+
+        filtro = self.filtro or obtener_filtro(self.db)
+        if filtro is not None:
+            for hash_contenido in insertadas:
+                filtro.agregar(hash_contenido)
+
+        self.nuevas = len(insertadas)
+        self.duplicadas = self.copiadas - self.nuevas
+
+    def cerrar(self) -> Dict[str, int]:
+        """Escribir lo pendiente y devolver los totales"""
+        self.vaciar()
+        if self.modo != "copy":
+            resultado = {"nuevas": self.nuevas, "duplicadas": self.duplicadas}
+            if self.filtro is not None:
+                resultado["sin_consulta"] = self.descartadas_por_filtro
+                resultado["verificadas"] = self.verificadas
+            return resultado
+
+        self._fusionar()
+        return {
+            "nuevas": self.nuevas,
+            "duplicadas": self.duplicadas,
+            "copiadas": self.copiadas,
+            "fusionadas": self.nuevas,
+            "omitidas": self.duplicadas,
+        }
@@ -0,0 +1,280 @@
+"""
+Clasificador de criterios con modelos lineales sobre TF-IDF
+
+Alternativa a la valoración por palabras clave de NLPService. Los textos se
+vectorizan con un HashingVectorizer (sin vocabulario que guardar) y pesos
+IDF; cada criterio tiene dos modelos lineales:
+
+- valoración (1 a 5): regresión sobre la puntuación de la reseña
+- confianza (0 a 1): probabilidad de que la reseña trate el criterio
+
+Los pesos de todos los criterios forman una matriz (n_features x criterios)
+y un lote entero se predice con un producto matriz dispersa x matriz. Los
+artefactos son archivos .npy que se abren con mmap: todos los procesos de
+API y Celery comparten las mismas páginas del sistema operativo.
+
+Cada entrenamiento se escribe completo en `versiones/<versión>/` y recién
+entonces se publica reemplazando el archivo `actual` (os.replace), de modo
+que un proceso nunca mezcla archivos de dos entrenamientos. Los procesos
+vuelven a leer `actual` al empezar cada ejecución
+(NLPService.refrescar_clasificador).
+
+Entrenar (desde backend/):
+    python -m app.services.clasificador_criterios
+"""
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.preprocessing import normalize
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.buscador_palabras import normalizar, obtener_buscador
+
+logger = logging.getLogger(__name__)
+
+ARCHIVO_META = "modelo.json"
+ARCHIVO_ACTUAL = "actual"
+DIR_VERSIONES = "versiones"
+VERSIONES_CONSERVADAS = 3
+N_FEATURES = 2 ** 18
+NGRAMAS = (1, 2)
+MIN_EJEMPLOS = 20
+
+# (valoracion, confianza) de un criterio, o None si el modelo no lo cubre
+Prediccion = Optional[Tuple[float, float]]
+
+
+def crear_vectorizador(n_features: int = N_FEATURES, ngramas: Sequence[int] = NGRAMAS) -> HashingVectorizer:
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=tuple(ngramas),
+        alternate_sign=False,
+        norm=None,
+        preprocessor=normalizar,
+        token_pattern=r"(?u)\b\w+\b",
+        dtype=np.float32
+    )
+
+
+class ClasificadorCriterios:
+    """Modelos entrenados, cargados con mmap desde `directorio`"""
+
+    def __init__(self, directorio: Path):
+        with open(directorio / ARCHIVO_META, encoding="utf-8") as archivo:
+            meta = json.load(archivo)
+
+        self.version: str = meta["version"]
+        self.columnas: Dict[UUID, int] = {
+            UUID(criterio_id): i for i, criterio_id in enumerate(meta["criterios"])
+        }
+        self.vectorizador = crear_vectorizador(meta["n_features"], meta["ngramas"])
+        self.idf = np.load(directorio / "idf.npy", mmap_mode="r")
+        self.pesos_valoracion = np.load(directorio / "pesos_valoracion.npy", mmap_mode="r")
+        self.pesos_relevancia = np.load(directorio / "pesos_relevancia.npy", mmap_mode="r")
+        self.sesgo_valoracion = np.array(meta["sesgo_valoracion"], dtype=np.float32)
+        self.sesgo_relevancia = np.array(meta["sesgo_relevancia"], dtype=np.float32)
+
+    def vectorizar(self, textos: Sequence[str]):
+        """Matriz dispersa TF-IDF normalizada (una fila por texto)"""
+        matriz = self.vectorizador.transform(textos).tocsr()
+        # Escalar cada valor por el IDF de su columna sin densificar
+        matriz.data *= self.idf[matriz.indices]
+        return normalize(matriz, copy=False)
+
+    def predecir(self, textos: Sequence[str], criterio_ids: Sequence[UUID]) -> List[List[Prediccion]]:
+        """
+        Valoración y confianza de cada texto para cada criterio
+
+        Returns:
+            Una lista por texto con una predicción por criterio, en el orden
+            de `criterio_ids` (None para criterios sin modelo)
+        """
+        if not textos:
+            return []
+        matriz = self.vectorizar(textos)
+        valoracion = np.clip(matriz @ self.pesos_valoracion + self.sesgo_valoracion, 1.0, 5.0)
+        confianza = 1.0 / (1.0 + np.exp(-(matriz @ self.pesos_relevancia + self.sesgo_relevancia)))
+        valoracion = np.round(valoracion.astype(np.float64), 2).tolist()
+        confianza = np.round(confianza.astype(np.float64), 2).tolist()
+
+        columnas = [self.columnas.get(criterio_id) for criterio_id in criterio_ids]
+        return [
+            [
+                None if columna is None else (fila_valoracion[columna], fila_confianza[columna])
+                for columna in columnas
+            ]
+            for fila_valoracion, fila_confianza in zip(valoracion, confianza)
+        ]
+
+
+def version_actual(directorio: Optional[str] = None) -> Optional[str]:
+    """Versión publicada en `actual`, o None si todavía no se entrenó ninguna"""
+    puntero = Path(directorio or settings.NLP_MODELO_DIR) / ARCHIVO_ACTUAL
+    try:
+        with open(puntero, encoding="utf-8") as archivo:
+            return archivo.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def cargar_clasificador(
+    directorio: Optional[str] = None, version: Optional[str] = None
+) -> Optional[ClasificadorCriterios]:
+    """
+    Clasificador entrenado (la versión publicada, o `version`), o None si no hay artefactos
+
+    Los artefactos sueltos en `directorio` (anteriores a las versiones) se
+    siguen cargando mientras no se publique ninguna.
+    """
+    directorio = Path(directorio or settings.NLP_MODELO_DIR)
+    version = version or version_actual(directorio)
+    ruta = directorio / DIR_VERSIONES / version if version else directorio
+    if not (ruta / ARCHIVO_META).exists():
+        logger.warning(f"Sin modelo de criterios en {ruta}: se usan palabras clave")
+        return None
+    return ClasificadorCriterios(ruta)
+
+
+def _publicar(directorio: Path, version: str) -> None:
+    """Apuntar `actual` a `version` y borrar las versiones más viejas"""
+    temporal = directorio / f"{ARCHIVO_ACTUAL}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        archivo.write(version)
+    os.replace(temporal, directorio / ARCHIVO_ACTUAL)
+
+    # Los procesos que todavía tienen mapeada una versión borrada la conservan
+    versiones = sorted(
+        ruta.name for ruta in (directorio / DIR_VERSIONES).iterdir()
+        if ruta.is_dir() and not ruta.name.startswith(".")
+    )
+    for vieja in versiones[:-VERSIONES_CONSERVADAS]:
+        shutil.rmtree(directorio / DIR_VERSIONES / vieja, ignore_errors=True)
+
+
+def entrenar_desde(
+    textos: Sequence[str],
+    puntuaciones: Sequence[Optional[float]],
+    criterios: Sequence[Tuple[UUID, List[str]]],
+    directorio: Path
+) -> Dict[str, int]:
+    """
+    Entrenar y guardar los modelos
+
+    La relevancia se aprende de las palabras clave de cada criterio
+    (supervisión distante) y la valoración de la puntuación de las reseñas
+    relevantes. Los criterios sin ejemplos suficientes de ambas clases
+    quedan fuera del modelo y siguen usando palabras clave.
+
+    Returns:
+        Ejemplos relevantes por criterio incluido
+    """
+    vectorizador = crear_vectorizador()
+    conteos = vectorizador.transform(textos).tocsr()
+
+    # IDF suavizado, como TfidfTransformer
+    documentos = np.bincount(conteos.indices, minlength=N_FEATURES)
+    idf = (np.log((1 + len(textos)) / (1 + documentos)) + 1).astype(np.float32)
+    matriz = conteos.copy()
+    matriz.data *= idf[matriz.indices]
+    matriz = normalize(matriz, copy=False)
+
+    encontradas = obtener_buscador([keywords for _, keywords in criterios])
+    relevantes = np.array([[bool(p) for p in encontradas.buscar(t)] for t in textos], dtype=bool)
+    puntuaciones = np.array([np.nan if p is None else p for p in puntuaciones], dtype=np.float64)
+
+    incluidos = []
+    pesos_valoracion = []
+    pesos_relevancia = []
+    sesgo_valoracion = []
+    sesgo_relevancia = []
+    ejemplos = {}
+    for columna, (criterio_id, _) in enumerate(criterios):
+        etiquetas = relevantes[:, columna]
+        con_puntuacion = etiquetas & ~np.isnan(puntuaciones)
+        if min(etiquetas.sum(), (~etiquetas).sum(), con_puntuacion.sum()) < MIN_EJEMPLOS:
+            continue
+
+        relevancia = LogisticRegression(solver="liblinear", class_weight="balanced")
+        relevancia.fit(matriz, etiquetas)
+        valoracion = Ridge(alpha=1.0)
+        valoracion.fit(matriz[con_puntuacion], puntuaciones[con_puntuacion])
+
+        incluidos.append(str(criterio_id))
+        pesos_relevancia.append(relevancia.coef_[0].astype(np.float32))
+        sesgo_relevancia.append(float(relevancia.intercept_[0]))
+        pesos_valoracion.append(valoracion.coef_.astype(np.float32))
+        sesgo_valoracion.append(float(valoracion.intercept_))
+        ejemplos[str(criterio_id)] = int(etiquetas.sum())
+
+    if not incluidos:
+        raise ValueError("Ningún criterio tiene ejemplos suficientes para entrenar")
+
+    # Todo el entrenamiento en un directorio temporal, renombrado al terminar
+    version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+    temporal = directorio / DIR_VERSIONES / f".{version}.tmp"
+    temporal.mkdir(parents=True)
+    arreglos = {
+        "idf": idf,
+        "pesos_valoracion": np.column_stack(pesos_valoracion),
+        "pesos_relevancia": np.column_stack(pesos_relevancia),
+    }
+    for nombre, arreglo in arreglos.items():
+        np.save(temporal / f"{nombre}.npy", np.ascontiguousarray(arreglo))
+
+    meta = {
+        "version": version,
+        "n_features": N_FEATURES,
+        "ngramas": list(NGRAMAS),
+        "criterios": incluidos,
+        "sesgo_valoracion": sesgo_valoracion,
+        "sesgo_relevancia": sesgo_relevancia,
+        "ejemplos": ejemplos,
+    }
+    with open(temporal / ARCHIVO_META, "w", encoding="utf-8") as archivo:
+        json.dump(meta, archivo, indent=2)
+    os.rename(temporal, directorio / DIR_VERSIONES / version)
+    _publicar(directorio, version)
+    return ejemplos
+
+
+def entrenar(db: Session, directorio: Optional[str] = None) -> Dict[str, int]:
+    """Entrenar con las reseñas de la base de datos y los criterios activos"""
+    from app.models.resena import Resena
+    from app.services.nlp_service import nlp_service
+
+    filas = db.query(
+        Resena.texto_completo, Resena.texto_positivo, Resena.texto_negativo, Resena.puntuacion
+    ).yield_per(5000)
+
+    textos = []
+    puntuaciones = []
+    for fila in filas:
+        texto = nlp_service.texto_resena(fila.texto_completo, fila.texto_positivo, fila.texto_negativo)
+        if texto.strip():
+            textos.append(nlp_service.limpiar_texto(texto))
+            puntuaciones.append(fila.puntuacion)
+
+    return entrenar_desde(
+        textos, puntuaciones, nlp_service.criterios_activos(db),
+        Path(directorio or settings.NLP_MODELO_DIR)
+    )
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(entrenar(db))
+    finally:
+        db.close()
@@ -0,0 +1,151 @@
+"""
+Control de importación incremental por archivo
+"""
+import copy
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.crud import crud_estado_importacion
+from app.models.estado_importacion import EstadoImportacion
+from app.services.lector_json import LectorJSON
+
+TAMANO_BLOQUE_DIGEST = 1024 * 1024
+
+
+def calcular_digest(archivo: Path) -> str:
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    return calcular_digests(archivo)[0]
+
+
+def calcular_digests(archivo: Path, limite: int = 0) -> Tuple[str, Optional[Any]]:
+    """
+    SHA-256 del archivo completo y, en la misma lectura, de sus primeros `limite` bytes
+
+    El segundo valor es el objeto hash del prefijo (para seguir actualizándolo),
+    o None si el archivo tiene menos de `limite` bytes.
+    """
+    sha = hashlib.sha256()
+    prefijo = hashlib.sha256() if limite == 0 else None
+    leidos = 0
+    with open(archivo, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_DIGEST), b""):
+            if prefijo is None and leidos + len(bloque) >= limite:
+                sha.update(bloque[:limite - leidos])
+                prefijo = sha.copy()
+                sha.update(bloque[limite - leidos:])
+            else:
+                sha.update(bloque)
+            leidos += len(bloque)
+    return sha.hexdigest(), prefijo
+
+
+class ControlImportacion:
+    """
+    Decide desde qué registro importar un archivo y guarda el avance
+
+    - Archivo con el mismo digest que una importación completada: se omite
+      (`sin_cambios`).
+    - Ejecución previa interrumpida o archivo modificado: se reanuda después
+      del registro `registros_procesados` solo si los bytes hasta su fin
+      (`bytes_procesados`) conservan su hash (`digest_procesado`). El lector
+      salta directamente al byte guardado en `reanudacion`, sin volver a
+      decodificar los registros anteriores.
+    - En otro caso (los scrapers reescriben el archivo completo y Google
+      agrega comentarios en medio de cada hotel) se importa desde el
+      principio y ON CONFLICT descarta las reseñas ya cargadas.
+
+    Decidir entre estos casos lee el archivo completo una vez para el
+    digest (sin decodificar JSON). El avance se guarda con `guardar_avance`
+    dentro de la transacción de cada lote, de modo que un fallo deja el
+    checkpoint en el último lote confirmado; posición y contexto salen de
+    las marcas del lector (`seguir`).
+    """
+
+    def __init__(self, db: Session, archivo: Path):
+        self.db = db
+        self.archivo = archivo
+        self.sin_cambios = False
+        self.inicio = 0
+        self._lector: Optional[LectorJSON] = None
+
+        stat = archivo.stat()
+        estado = crud_estado_importacion.get_by_archivo(db, archivo=archivo.name)
+        prefijo_valido = (
+            estado is not None and estado.digest_procesado is not None
+            and estado.reanudacion is not None
+            and stat.st_size >= estado.bytes_procesados
+        )
+        digest, prefijo = calcular_digests(
+            archivo, estado.bytes_procesados if prefijo_valido else 0
+        )
+
+        if estado is None:
+            estado = EstadoImportacion(archivo=archivo.name, registros_procesados=0)
+            db.add(estado)
+        elif estado.digest == digest and estado.completado:
+            self.sin_cambios = True
+        elif prefijo_valido and prefijo.hexdigest() == estado.digest_procesado:
+            self.inicio = estado.registros_procesados
+
+        if not self.sin_cambios and self.inicio == 0:
+            estado.registros_procesados = 0
+            estado.bytes_procesados = 0
+            estado.digest_procesado = None
+            estado.reanudacion = None
+            prefijo = hashlib.sha256()
+
+        self._sha = prefijo
+        self._bytes = estado.bytes_procesados or 0
+
+        estado.tamano = stat.st_size
+        estado.mtime = stat.st_mtime
+        estado.digest = digest
+        estado.completado = self.sin_cambios
+        db.commit()
+        self.estado = estado
+
+    @property
+    def reanudar(self) -> Optional[Dict[str, Any]]:
+        """Reanudación a pasar al lector (None = leer desde el principio)"""
+        return self.estado.reanudacion if self.inicio else None
+
+    def seguir(self, lector: LectorJSON) -> None:
+        """Usar las marcas de `lector` como desplazamiento de cada checkpoint"""
+        self._lector = lector
+
+    def _avanzar(self, registros: int) -> None:
+        """Llevar el checkpoint (registros, bytes, hash y reanudación) a la última marca"""
+        if self._lector is None or self._lector.marcas == 0:
+            self.estado.registros_procesados = max(registros, self.inicio)
+            return
+        fin = self._lector.bytes_marcados
+        if fin > self._bytes:
+            with open(self.archivo, "rb") as f:
+                f.seek(self._bytes)
+                restantes = fin - self._bytes
+                while restantes > 0:
+                    bloque = f.read(min(TAMANO_BLOQUE_DIGEST, restantes))
+                    if not bloque:
+                        break
+                    self._sha.update(bloque)
+                    restantes -= len(bloque)
+            self._bytes = fin
+        self.estado.bytes_procesados = self._bytes
+        self.estado.digest_procesado = self._sha.hexdigest()
+        # Copia: el lector sigue completando el hotel del contexto
+        self.estado.reanudacion = copy.deepcopy(self._lector.reanudacion)
+        # Registros marcados por el lector, que puede ir más allá del último agregado
+        self.estado.registros_procesados = self.inicio + self._lector.marcas
+
+    def guardar_avance(self, registros: int) -> None:
+        """Registrar el avance (sin commit: va en la transacción del lote)"""
+        self._avanzar(registros)
+
+    def completar(self, registros: int) -> None:
+        """Marcar el archivo como importado por completo"""
+        self._avanzar(registros)
+        self.estado.completado = True
+        self.db.commit()
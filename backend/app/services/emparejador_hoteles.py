@@ -0,0 +1,140 @@
+"""
+Emparejamiento aproximado de nombres de hotel scrapeados
+
+Índice invertido de trigramas sobre los nombres normalizados (sin tildes,
+minúsculas, sin palabras genéricas como "hotel"). Una búsqueda solo recorre
+las listas de los trigramas del nombre consultado, por lo que cuesta
+microsegundos para cientos de hoteles.
+"""
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+PALABRAS_GENERICAS = {
+    "hotel", "hoteles", "hostal", "hostel", "hospedaje", "apartamento", "apto",
+    "de", "del", "la", "las", "el", "los", "y", "en", "the", "by",
+}
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+_RADIO_TIERRA_KM = 6371.0
+
+
+def normalizar_nombre(nombre: str) -> str:
+    """Minúsculas, sin tildes ni signos y sin palabras genéricas"""
+    if not nombre:
+        return ""
+    texto = unicodedata.normalize("NFKD", nombre)
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    palabras = _NO_ALFANUMERICO.sub(" ", texto).split()
+    significativas = [p for p in palabras if p not in PALABRAS_GENERICAS]
+    return " ".join(significativas or palabras)
+
+
+def trigramas(texto: str) -> Set[str]:
+    """Trigramas por palabra, con relleno al estilo pg_trgm"""
+    resultado = set()
+    for palabra in texto.split():
+        relleno = f"  {palabra} "
+        for i in range(len(relleno) - 2):
+            resultado.add(relleno[i:i + 3])
+    return resultado
+
+
+def distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distancia aproximada (equirectangular), suficiente a escala de ciudad"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return _RADIO_TIERRA_KM * math.hypot(x, y)
+
+
+class EmparejadorHoteles:
+    """Resuelve un nombre scrapeado al hotel más parecido por encima de un umbral"""
+
+    def __init__(
+        self,
+        hoteles: Iterable[Tuple[UUID, str, Optional[float], Optional[float]]],
+        similitud_minima: Optional[float] = None,
+        distancia_maxima_km: Optional[float] = None
+    ):
+        """
+        Args:
+            hoteles: Tuplas (id, nombre, latitud, longitud)
+        """
+        self.similitud_minima = similitud_minima or settings.SCRAPING_SIMILITUD_MINIMA
+        self.distancia_maxima_km = distancia_maxima_km or settings.SCRAPING_DISTANCIA_MAXIMA_KM
+
+        self._ids: List[UUID] = []
+        self._coordenadas: List[Optional[Tuple[float, float]]] = []
+        self._tamanos: List[int] = []
+        self._exactos: Dict[str, UUID] = {}
+        self._indice: Dict[str, List[int]] = defaultdict(list)
+
+        for hotel_id, nombre, latitud, longitud in hoteles:
+            normalizado = normalizar_nombre(nombre)
+            if not normalizado:
+                continue
+            posicion = len(self._ids)
+            self._ids.append(hotel_id)
+            self._coordenadas.append(
+                (latitud, longitud) if latitud is not None and longitud is not None else None
+            )
+            self._exactos.setdefault(normalizado, hotel_id)
+            grams = trigramas(normalizado)
+            self._tamanos.append(len(grams))
+            for gram in grams:
+                self._indice[gram].append(posicion)
+
+    def buscar(
+        self,
+        nombre: str,
+        latitud: Optional[float] = None,
+        longitud: Optional[float] = None
+    ) -> Optional[Tuple[UUID, float]]:
+        """
+        Buscar el hotel más parecido
+
+        La similitud es el índice de Jaccard entre conjuntos de trigramas.
+        Si se conocen coordenadas de ambos lados, se descartan candidatos a más
+        de `distancia_maxima_km` y los cercanos reciben una bonificación de
+        hasta 0.1.
+
+        Returns:
+            (hotel_id, similitud) o None si ninguno supera el umbral
+        """
+        normalizado = normalizar_nombre(nombre)
+        if not normalizado:
+            return None
+
+        exacto = self._exactos.get(normalizado)
+        if exacto is not None:
+            return exacto, 1.0
+
+        grams = trigramas(normalizado)
+        comunes: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for posicion in self._indice.get(gram, ()):
+                comunes[posicion] += 1
+
+        mejor = None
+        mejor_similitud = 0.0
+        for posicion, compartidos in comunes.items():
+            similitud = compartidos / (len(grams) + self._tamanos[posicion] - compartidos)
+
+            coordenadas = self._coordenadas[posicion]
+            if coordenadas is not None and latitud is not None and longitud is not None:
+                distancia = distancia_km(latitud, longitud, *coordenadas)
+                if distancia > self.distancia_maxima_km:
+                    continue
+                similitud += 0.1 * (1 - distancia / self.distancia_maxima_km)
+
+            if similitud > mejor_similitud:
+                mejor, mejor_similitud = posicion, similitud
+
+        if mejor is None or mejor_similitud < self.similitud_minima:
+            return None
+        return self._ids[mejor], round(min(mejor_similitud, 1.0), 3)
@@ -0,0 +1,92 @@
+"""
+Normalización de fechas de reseñas scrapeadas
+
+Cada plataforma emite pocos formatos y los mismos textos se repiten miles
+de veces ("2022-09-21", "Fecha del comentario: 18 de septiembre de 2025",
+"agosto de 2025"), así que se reconocen con expresiones precompiladas y el
+resultado se memoriza. dateutil solo se usa para formatos desconocidos.
+
+Los textos sin fecha concreta ("Hace 2 semanas", "Fecha estimada no
+disponible") devuelven la hora actual, que nunca se memoriza.
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from dateutil import parser
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+
+TAMANO_MEMO = 4096
+
+_ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_DIA_MES_ANIO = re.compile(r"(\d{1,2}) de ([a-z]+) de (\d{4})")
+_MES_ANIO = re.compile(r"([a-z]+) de (\d{4})")
+_RELATIVA = re.compile(r"\bhace\b")
+
+
+@lru_cache(maxsize=TAMANO_MEMO)
+def _parsear(texto: str, dayfirst: bool) -> Optional[datetime]:
+    """Fecha absoluta contenida en el texto, o None si no la hay"""
+    texto = texto.strip().lower()
+    if not texto:
+        return None
+
+    try:
+        coincidencia = _ISO.search(texto)
+        if coincidencia:
+            anio, mes, dia = map(int, coincidencia.groups())
+            return datetime(anio, mes, dia)
+
+        coincidencia = _DIA_MES_ANIO.search(texto)
+        if coincidencia and coincidencia.group(2) in MESES:
+            return datetime(
+                int(coincidencia.group(3)), MESES[coincidencia.group(2)], int(coincidencia.group(1))
+            )
+
+        if _RELATIVA.search(texto):
+            return None
+
+        coincidencia = _MES_ANIO.search(texto)
+        if coincidencia and coincidencia.group(1) in MESES:
+            return datetime(int(coincidencia.group(2)), MESES[coincidencia.group(1)], 1)
+    except ValueError:
+        # Día o mes fuera de rango
+        return None
+
+    try:
+        return parser.parse(texto, dayfirst=dayfirst)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _fecha_o_ahora(texto: Optional[str], dayfirst: bool = False) -> datetime:
+    if not texto:
+        return datetime.utcnow()
+    return _parsear(texto, dayfirst) or datetime.utcnow()
+
+
+def parsear_fecha_google(fecha_str: str) -> datetime:
+    """Google: "2022-09-21" o "Fecha estimada no disponible" """
+    return _fecha_o_ahora(fecha_str)
+
+
+def parsear_fecha_booking(registro: str) -> datetime:
+    """Booking: "Fecha del comentario: 18 de septiembre de 2025" """
+    return _fecha_o_ahora(registro, dayfirst=True)
+
+
+def parsear_fecha_airbnb(fecha_str: str) -> datetime:
+    """Airbnb: "agosto de 2025" (día 1) o "Hace 2 semanas" (hora actual)"""
+    return _fecha_o_ahora(fecha_str)
+
+
+def estadisticas_memo() -> dict:
+    """Aciertos y fallos de la memoización"""
+    info = _parsear.cache_info()
+    return {"aciertos": info.hits, "fallos": info.misses, "tamano": info.currsize}
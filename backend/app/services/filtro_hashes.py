@@ -0,0 +1,172 @@
+"""
+Filtro de Bloom sobre los hashes de contenido de las reseñas
+
+Permite descartar sin consultar la base de datos las reseñas que seguro no
+existen; un "quizás" se verifica con una consulta. El filtro se guarda en
+disco junto con una marca de agua (el mayor `creado_en` visto) y al
+cargarlo solo se agregan las reseñas creadas después.
+"""
+import logging
+import math
+import os
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.resena import Resena
+
+logger = logging.getLogger(__name__)
+
+_CABECERA = struct.Struct("<4sBQBQQd")
+_MAGIA = b"SWBF"
+_VERSION = 1
+CAPACIDAD_MINIMA = 100_000
+# Reseñas de transacciones que confirmaron tarde pueden tener un creado_en
+# anterior a la marca; se vuelve a revisar este margen en cada sincronización
+MARGEN_SINCRONIZACION = timedelta(minutes=10)
+
+
+class FiltroHashes:
+    """Filtro de Bloom de hashes SHA-256 (hex) con marca de agua"""
+
+    def __init__(self, capacidad: int, tasa_error: Optional[float] = None):
+        tasa_error = tasa_error or settings.SCRAPING_FILTRO_TASA_ERROR
+        self.capacidad = max(capacidad, CAPACIDAD_MINIMA)
+        self.bits = math.ceil(-self.capacidad * math.log(tasa_error) / math.log(2) ** 2)
+        self.funciones = max(1, round(self.bits / self.capacidad * math.log(2)))
+        self.elementos = 0
+        self.marca: Optional[datetime] = None
+        self._tabla = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _posiciones(self, hash_contenido: str) -> Iterable[int]:
+        # El hash ya es uniforme: dos mitades de 64 bits dan las k posiciones
+        h1 = int(hash_contenido[:16], 16)
+        h2 = int(hash_contenido[16:32], 16) | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.funciones))
+
+    def __contains__(self, hash_contenido: str) -> bool:
+        tabla = self._tabla
+        return all(tabla[p >> 3] & (1 << (p & 7)) for p in self._posiciones(hash_contenido))
+
+    def agregar(self, hash_contenido: str) -> None:
+        """Agregar un hash (seguro entre hilos)"""
+        with self._lock:
+            nuevo = False
+            for p in self._posiciones(hash_contenido):
+                mascara = 1 << (p & 7)
+                if not self._tabla[p >> 3] & mascara:
+                    self._tabla[p >> 3] |= mascara
+                    nuevo = True
+            if nuevo:
+                self.elementos += 1
+
+    @property
+    def saturado(self) -> bool:
+        return self.elementos > self.capacidad
+
+    def sincronizar(self, db: Session) -> int:
+        """
+        Agregar los hashes de las reseñas creadas desde la marca de agua
+
+        Returns:
+            Filas leídas
+        """
+        consulta = db.query(Resena.hash_contenido, Resena.creado_en).filter(
+            Resena.hash_contenido.isnot(None)
+        )
+        if self.marca is not None:
+            consulta = consulta.filter(Resena.creado_en > self.marca - MARGEN_SINCRONIZACION)
+
+        leidas = 0
+        marca = self.marca
+        for hash_contenido, creado_en in consulta.yield_per(10_000):
+            self.agregar(hash_contenido)
+            if marca is None or creado_en > marca:
+                marca = creado_en
+            leidas += 1
+        self.marca = marca
+        return leidas
+
+    def guardar(self, ruta: Path) -> None:
+        """Escribir el filtro en disco (reemplazo atómico)"""
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_suffix(ruta.suffix + ".tmp")
+        with self._lock, open(temporal, "wb") as f:
+            f.write(_CABECERA.pack(
+                _MAGIA, _VERSION, self.bits, self.funciones, self.capacidad,
+                self.elementos, self.marca.timestamp() if self.marca else 0.0
+            ))
+            f.write(self._tabla)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta: Path) -> Optional["FiltroHashes"]:
+        """Leer un filtro guardado; None si no existe o no es válido"""
+        try:
+            with open(ruta, "rb") as f:
+                magia, version, bits, funciones, capacidad, elementos, marca = _CABECERA.unpack(
+                    f.read(_CABECERA.size)
+                )
+                tabla = bytearray(f.read())
+        except (OSError, struct.error):
+            return None
+
+        if magia != _MAGIA or version != _VERSION or len(tabla) != (bits + 7) // 8:
+            return None
+
+        filtro = cls.__new__(cls)
+        filtro.capacidad = capacidad
+        filtro.bits = bits
+        filtro.funciones = funciones
+        filtro.elementos = elementos
+        filtro.marca = datetime.fromtimestamp(marca, tz=timezone.utc) if marca else None
+        filtro._tabla = tabla
+        filtro._lock = threading.Lock()
+        return filtro
+
+
+_filtro: Optional[FiltroHashes] = None
+_lock_global = threading.Lock()
+
+
+def _ruta() -> Path:
+    return Path(settings.SCRAPING_FILTRO_RUTA)
+
+
+def obtener_filtro(db: Session) -> Optional[FiltroHashes]:
+    """
+    Filtro del proceso, cargado de disco (o construido) y sincronizado
+
+    Devuelve None si SCRAPING_FILTRO_HASHES está desactivado.
+    """
+    global _filtro
+    if not settings.SCRAPING_FILTRO_HASHES:
+        return None
+
+    with _lock_global:
+        if _filtro is None:
+            _filtro = FiltroHashes.cargar(_ruta())
+            if _filtro is None:
+                _filtro = FiltroHashes(db.query(Resena.id).count() * 2)
+                logger.info("Construyendo filtro de hashes (capacidad %d)", _filtro.capacidad)
+
+        _filtro.sincronizar(db)
+
+        if _filtro.saturado:
+            logger.info("Filtro de hashes saturado (%d elementos), reconstruyendo", _filtro.elementos)
+            _filtro = FiltroHashes(_filtro.elementos * 2)
+            _filtro.sincronizar(db)
+
+        return _filtro
+
+
+def guardar_filtro() -> None:
+    """Guardar el filtro del proceso, si se llegó a cargar"""
+    if _filtro is not None:
+        _filtro.guardar(_ruta())
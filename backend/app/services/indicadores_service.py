@@ -1,22 +1,42 @@
 """
 Servicio de Indicadores - C├ílculo de mítricas y estadásticas
+
+Los resúmenes, la distribución por plataforma, la comparación de hoteles y
+la tendencia leen los acumulados diarios (metricas_diarias), que el
+procesamiento NLP mantiene al marcar reseñas. Los filtros de fecha se
+aplican por día completo (UTC). Reconstruir los acumulados (desde backend/):
+    python -m app.services.indicadores_service
 """
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from uuid import UUID
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Float, Integer, Numeric, cast, func, and_, null
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from app.crud import (
     crud_hotel, crud_indicador_periodo, crud_resena_destacada,
-    crud_resena, crud_sentimiento, crud_clasificacion, crud_criterio
+    crud_resena, crud_sentimiento, crud_clasificacion, crud_criterio,
+    crud_metrica_diaria
 )
+from app.models.criterio import Criterio
+from app.models.hotel import Hotel
+from app.models.metrica_diaria import MetricaDiaria, MetricaDiariaCriterio
+from app.models.plataforma import Plataforma
 from app.models.resena import Resena
 from app.models.sentimiento import Sentimiento
 from app.models.clasificacion import Clasificacion
 from app.models.hotel_plataforma import HotelPlataforma
 from app.schemas.indicador import IndicadorPeriodoBase, IndicadoresResumen
+from app.services.cache_indicadores import cache_indicadores
+
+
+def _dia_utc(fecha: datetime):
+    """Día UTC de una fecha (las fechas sin zona horaria se toman como UTC)"""
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc)
+    return fecha.date()
 
 
 class IndicadoresService:
@@ -126,6 +146,45 @@ class IndicadoresService:
         else:
             return crud_indicador_periodo.create(db, obj_in=indicador_data)
     
+    def _filtrar_dias(self, query, columna, fecha_inicio, fecha_fin):
+        """Filtrar acumulados diarios por rango de fechas (días completos, UTC)"""
+        if fecha_inicio:
+            query = query.filter(columna >= _dia_utc(fecha_inicio))
+        if fecha_fin:
+            query = query.filter(columna <= _dia_utc(fecha_fin))
+        return query
+    
+    def _promedios_criterios(
+        self,
+        db: Session,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        hotel_ids: Optional[List[UUID]] = None
+    ) -> Dict[tuple, float]:
+        """Valoración media por (hotel_id, código de criterio) de SOSTENIBILIDAD y CALIDAD"""
+        query = (
+            db.query(
+                MetricaDiariaCriterio.hotel_id,
+                Criterio.codigo,
+                (
+                    func.sum(MetricaDiariaCriterio.suma_valoracion)
+                    / func.nullif(func.sum(MetricaDiariaCriterio.total_clasificaciones), 0)
+                ).label("promedio")
+            )
+            .join(Criterio, Criterio.id == MetricaDiariaCriterio.criterio_id)
+            .filter(Criterio.codigo.in_(("SOSTENIBILIDAD", "CALIDAD")))
+        )
+        if hotel_ids is not None:
+            query = query.filter(MetricaDiariaCriterio.hotel_id.in_(hotel_ids))
+        query = self._filtrar_dias(query, MetricaDiariaCriterio.dia, fecha_inicio, fecha_fin)
+        return {
+            (hotel_id, codigo): float(promedio)
+            for hotel_id, codigo, promedio in query.group_by(
+                MetricaDiariaCriterio.hotel_id, Criterio.codigo
+            ).all()
+            if promedio is not None
+        }
+    
     def obtener_resumen_hotel(
         self,
         db: Session,
@@ -133,28 +192,26 @@ class IndicadoresService:
         fecha_inicio: Optional[datetime] = None,
         fecha_fin: Optional[datetime] = None
     ) -> IndicadoresResumen:
-        """Obtener resumen de indicadores de un hotel"""
+        """Obtener resumen de indicadores de un hotel (desde metricas_diarias)"""
         
-        # Filtros de fecha
         query = (
-            db.query(Resena)
-            .join(HotelPlataforma)
-            .filter(
-                and_(
-                    HotelPlataforma.hotel_id == hotel_id,
-                    Resena.procesada == True
-                )
+            db.query(
+                func.sum(MetricaDiaria.total_resenas),
+                func.sum(MetricaDiaria.con_puntuacion),
+                func.sum(MetricaDiaria.suma_puntuacion),
+                func.sum(MetricaDiaria.total_positivas),
+                func.sum(MetricaDiaria.total_negativas),
+                func.sum(MetricaDiaria.total_neutras)
             )
+            .filter(MetricaDiaria.hotel_id == hotel_id)
         )
+        query = self._filtrar_dias(query, MetricaDiaria.dia, fecha_inicio, fecha_fin)
+        (
+            total_resenas, con_puntuacion, suma_puntuacion,
+            total_positivas, total_negativas, total_neutras
+        ) = query.one()
         
-        if fecha_inicio:
-            query = query.filter(Resena.fecha_publicacion >= fecha_inicio)
-        if fecha_fin:
-            query = query.filter(Resena.fecha_publicacion <= fecha_fin)
-        
-        resenas = query.all()
-        
-        if not resenas:
+        if not total_resenas:
             return IndicadoresResumen(
                 total_resenas=0,
                 promedio_sostenibilidad=0.0,
@@ -165,67 +222,114 @@ class IndicadoresService:
                 porcentaje_neutras=0.0
             )
         
-        total_resenas = len(resenas)
-        resena_ids = [r.id for r in resenas]
-        
-        # Promedio general
-        promedio_general = sum(r.puntuacion for r in resenas if r.puntuacion) / total_resenas
+        total_resenas = int(total_resenas)
+        promedios = self._promedios_criterios(
+            db, fecha_inicio, fecha_fin, hotel_ids=[hotel_id]
+        )
         
-        # Sentimientos
-        sentimientos = (
-            db.query(Sentimiento.tipo_sentimiento, func.count(Sentimiento.id))
-            .filter(Sentimiento.resena_id.in_(resena_ids))
-            .group_by(Sentimiento.tipo_sentimiento)
-            .all()
+        return IndicadoresResumen(
+            total_resenas=total_resenas,
+            promedio_sostenibilidad=round(promedios.get((hotel_id, "SOSTENIBILIDAD"), 0.0), 2),
+            promedio_calidad=round(promedios.get((hotel_id, "CALIDAD"), 0.0), 2),
+            # Solo las reseñas con puntuación, como indicadores_periodo
+            promedio_general=round(suma_puntuacion / con_puntuacion, 2) if con_puntuacion else 0.0,
+            porcentaje_positivas=round((total_positivas / total_resenas) * 100, 2),
+            porcentaje_negativas=round((total_negativas / total_resenas) * 100, 2),
+            porcentaje_neutras=round((total_neutras / total_resenas) * 100, 2)
         )
+    
+    def obtener_resumen_global(
+        self,
+        db: Session,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None
+    ) -> Dict[str, any]:
+        """Totales y promedios de los hoteles activos (desde metricas_diarias)"""
         
-        sent_counts = {tipo: count for tipo, count in sentimientos}
-        total_positivas = sent_counts.get("POSITIVO", 0)
-        total_negativas = sent_counts.get("NEGATIVO", 0)
-        total_neutras = sent_counts.get("NEUTRO", 0)
+        total_hoteles = db.query(func.count(Hotel.id)).filter(Hotel.activo == True).scalar()
         
-        # Criterios
-        criterio_sost = crud_criterio.get_by_codigo(db, codigo="SOSTENIBILIDAD")
-        criterio_cal = crud_criterio.get_by_codigo(db, codigo="CALIDAD")
+        query = (
+            db.query(func.coalesce(func.sum(MetricaDiaria.total_resenas), 0))
+            .join(Hotel, Hotel.id == MetricaDiaria.hotel_id)
+            .filter(Hotel.activo == True)
+        )
+        total_resenas = int(
+            self._filtrar_dias(query, MetricaDiaria.dia, fecha_inicio, fecha_fin).scalar()
+        )
         
-        promedio_sostenibilidad = 0.0
-        promedio_calidad = 0.0
+        if not total_resenas:
+            return {
+                "total_hoteles": total_hoteles,
+                "promedio_sostenibilidad": 0.0,
+                "promedio_calidad": 0.0,
+                "total_resenas": 0
+            }
         
-        if criterio_sost:
-            avg_sost = (
-                db.query(func.avg(Clasificacion.valoracion))
-                .filter(
-                    and_(
-                        Clasificacion.resena_id.in_(resena_ids),
-                        Clasificacion.criterio_id == criterio_sost.id
-                    )
-                )
-                .scalar()
+        # Promedio de todas las clasificaciones, no de los promedios de cada hotel
+        query = (
+            db.query(
+                Criterio.codigo,
+                func.sum(MetricaDiariaCriterio.suma_valoracion)
+                / func.nullif(func.sum(MetricaDiariaCriterio.total_clasificaciones), 0)
             )
-            promedio_sostenibilidad = float(avg_sost) if avg_sost else 0.0
-        
-        if criterio_cal:
-            avg_cal = (
-                db.query(func.avg(Clasificacion.valoracion))
-                .filter(
-                    and_(
-                        Clasificacion.resena_id.in_(resena_ids),
-                        Clasificacion.criterio_id == criterio_cal.id
-                    )
-                )
-                .scalar()
+            .join(Criterio, Criterio.id == MetricaDiariaCriterio.criterio_id)
+            .join(Hotel, Hotel.id == MetricaDiariaCriterio.hotel_id)
+            .filter(
+                Hotel.activo == True,
+                Criterio.codigo.in_(("SOSTENIBILIDAD", "CALIDAD"))
             )
-            promedio_calidad = float(avg_cal) if avg_cal else 0.0
+        )
+        promedios = {
+            codigo: float(promedio)
+            for codigo, promedio in self._filtrar_dias(
+                query, MetricaDiariaCriterio.dia, fecha_inicio, fecha_fin
+            ).group_by(Criterio.codigo).all()
+            if promedio is not None
+        }
         
-        return IndicadoresResumen(
-            total_resenas=total_resenas,
-            promedio_sostenibilidad=round(promedio_sostenibilidad, 2),
-            promedio_calidad=round(promedio_calidad, 2),
-            promedio_general=round(promedio_general, 2),
-            porcentaje_positivas=round((total_positivas / total_resenas) * 100, 2),
-            porcentaje_negativas=round((total_negativas / total_resenas) * 100, 2),
-            porcentaje_neutras=round((total_neutras / total_resenas) * 100, 2)
+        return {
+            "total_hoteles": total_hoteles,
+            "promedio_sostenibilidad": round(promedios.get("SOSTENIBILIDAD", 0.0), 1),
+            "promedio_calidad": round(promedios.get("CALIDAD", 0.0), 1),
+            "total_resenas": total_resenas
+        }
+    
+    def obtener_comparacion_hoteles(
+        self,
+        db: Session,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        limit: int = 20
+    ) -> List[Dict[str, any]]:
+        """Sostenibilidad y calidad de los primeros `limit` hoteles activos con reseñas"""
+        
+        query = (
+            db.query(Hotel.id, Hotel.nombre)
+            .join(MetricaDiaria, MetricaDiaria.hotel_id == Hotel.id)
+            .filter(Hotel.activo == True)
         )
+        hoteles = (
+            self._filtrar_dias(query, MetricaDiaria.dia, fecha_inicio, fecha_fin)
+            .group_by(Hotel.id, Hotel.nombre)
+            .having(func.sum(MetricaDiaria.total_resenas) > 0)
+            .order_by(Hotel.nombre, Hotel.id)
+            .limit(limit)
+            .all()
+        )
+        if not hoteles:
+            return []
+        
+        promedios = self._promedios_criterios(
+            db, fecha_inicio, fecha_fin, hotel_ids=[hotel_id for hotel_id, _ in hoteles]
+        )
+        return [
+            {
+                "hotel": nombre,
+                "sostenibilidad": round(promedios.get((hotel_id, "SOSTENIBILIDAD"), 0.0), 1),
+                "calidad": round(promedios.get((hotel_id, "CALIDAD"), 0.0), 1)
+            }
+            for hotel_id, nombre in hoteles
+        ]
     
     def obtener_distribucion_plataformas(
         self,
@@ -233,39 +337,226 @@ class IndicadoresService:
         fecha_inicio: Optional[datetime] = None,
         fecha_fin: Optional[datetime] = None
     ) -> List[Dict[str, any]]:
-        """Obtener distribución de reseñas por plataforma"""
-        
-        from app.models.plataforma import Plataforma
+        """Obtener distribución de reseñas por plataforma (desde metricas_diarias)"""
         
         query = (
             db.query(
                 Plataforma.codigo,
                 Plataforma.nombre,
-                func.count(Resena.id).label('total')
+                func.sum(MetricaDiaria.total_resenas).label('total')
             )
-            .join(HotelPlataforma, HotelPlataforma.plataforma_id == Plataforma.id)
-            .join(Resena, Resena.hotel_plataforma_id == HotelPlataforma.id)
-            .filter(Resena.procesada == True)
+            .join(MetricaDiaria, MetricaDiaria.plataforma_id == Plataforma.id)
         )
+        query = self._filtrar_dias(query, MetricaDiaria.dia, fecha_inicio, fecha_fin)
         
-        if fecha_inicio:
-            query = query.filter(Resena.fecha_publicacion >= fecha_inicio)
-        if fecha_fin:
-            query = query.filter(Resena.fecha_publicacion <= fecha_fin)
-        
-        query = query.group_by(Plataforma.codigo, Plataforma.nombre)
-        
-        resultados = query.all()
+        resultados = (
+            query.group_by(Plataforma.codigo, Plataforma.nombre)
+            .having(func.sum(MetricaDiaria.total_resenas) > 0)
+            .all()
+        )
         
         return [
             {
                 "plataforma": codigo,
                 "nombre": nombre,
-                "total": total
+                "total": int(total)
             }
             for codigo, nombre, total in resultados
         ]
     
+    def obtener_distribucion_sentimientos(
+        self,
+        db: Session,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """Reseñas positivas, negativas y neutras de todos los hoteles (una consulta)"""
+        
+        query = db.query(
+            func.coalesce(func.sum(MetricaDiaria.total_positivas), 0),
+            func.coalesce(func.sum(MetricaDiaria.total_negativas), 0),
+            func.coalesce(func.sum(MetricaDiaria.total_neutras), 0)
+        )
+        positivos, negativos, neutros = self._filtrar_dias(
+            query, MetricaDiaria.dia, fecha_inicio, fecha_fin
+        ).one()
+        
+        return {"positivos": int(positivos), "negativos": int(negativos), "neutros": int(neutros)}
+    
+    def materializar_periodos(
+        self,
+        db: Session,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        solo_pendientes: bool = True
+    ) -> int:
+        """
+        Llenar indicadores_periodo (semanas, meses y trimestres) y confirmar
+        
+        Por defecto solo se recalculan los períodos con reseñas procesadas
+        desde la última ejecución (ver crud_indicador_periodo.materializar).
+        
+        Returns:
+            Períodos escritos o borrados
+        """
+        try:
+            periodos = crud_indicador_periodo.materializar(
+                db, desde=desde, hasta=hasta, solo_pendientes=solo_pendientes
+            )
+            db.commit()
+            return periodos
+        except Exception:
+            db.rollback()
+            raise
+    
+    def reconstruir_metricas_diarias(self, db: Session) -> int:
+        """Recalcular metricas_diarias desde las reseñas (backfill) y confirmar"""
+        try:
+            filas = crud_metrica_diaria.reconstruir(db)
+            db.commit()
+            cache_indicadores.invalidar()
+            return filas
+        except Exception:
+            db.rollback()
+            raise
+    
+    def obtener_tabla_hoteles(
+        self,
+        db: Session,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        sostenibilidad_min: Optional[float] = None,
+        calidad_min: Optional[float] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, any]]:
+        """
+        Indicadores de cada hotel activo con reseñas, en una sola consulta
+        
+        Una subconsulta agrega las reseñas por hotel y plataforma (conteos
+        de sentimiento con FILTER y sumas de valoración por criterio); la
+        consulta exterior las junta por hotel, elige la plataforma con más
+        reseñas y aplica los mínimos como HAVING. La paginación se aplica
+        después de filtrar.
+        """
+        criterio_sost = crud_criterio.get_by_codigo(db, codigo="SOSTENIBILIDAD")
+        criterio_cal = crud_criterio.get_by_codigo(db, codigo="CALIDAD")
+        
+        columnas = [
+            HotelPlataforma.hotel_id.label("hotel_id"),
+            Hotel.nombre.label("hotel_nombre"),
+            Plataforma.codigo.label("plataforma"),
+            func.count(Resena.id).label("total"),
+        ]
+        for tipo in ("POSITIVO", "NEGATIVO", "NEUTRO"):
+            columnas.append(
+                func.count(Sentimiento.id)
+                .filter(Sentimiento.tipo_sentimiento == tipo)
+                .label(tipo.lower())
+            )
+        
+        query = (
+            db.query(*columnas)
+            .select_from(Resena)
+            .join(HotelPlataforma, HotelPlataforma.id == Resena.hotel_plataforma_id)
+            .join(Hotel, Hotel.id == HotelPlataforma.hotel_id)
+            .join(Plataforma, Plataforma.id == HotelPlataforma.plataforma_id)
+            .outerjoin(Sentimiento, Sentimiento.resena_id == Resena.id)
+        )
+        
+        # Una fila de clasificación como máximo por reseña y criterio (uq_resena_criterio)
+        for nombre, criterio in (("sost", criterio_sost), ("cal", criterio_cal)):
+            if criterio is None:
+                query = query.add_columns(
+                    cast(null(), Float).label(f"suma_{nombre}"),
+                    cast(null(), Integer).label(f"n_{nombre}")
+                )
+                continue
+            clasificacion = aliased(Clasificacion)
+            query = (
+                query.outerjoin(
+                    clasificacion,
+                    and_(
+                        clasificacion.resena_id == Resena.id,
+                        clasificacion.criterio_id == criterio.id
+                    )
+                )
+                .add_columns(
+                    func.sum(clasificacion.valoracion).label(f"suma_{nombre}"),
+                    func.count(clasificacion.id).label(f"n_{nombre}")
+                )
+            )
+        
+        query = query.filter(Hotel.activo == True, Resena.procesada == True)
+        if fecha_inicio:
+            query = query.filter(Resena.fecha_publicacion >= fecha_inicio)
+        if fecha_fin:
+            query = query.filter(Resena.fecha_publicacion <= fecha_fin)
+        
+        por_plataforma = query.group_by(
+            HotelPlataforma.hotel_id, Hotel.nombre, Plataforma.codigo
+        ).subquery()
+        
+        def promedio(nombre):
+            # 0 sin clasificaciones, como antes; redondeado para comparar con el mínimo
+            return func.coalesce(
+                func.round(
+                    cast(
+                        func.sum(por_plataforma.c[f"suma_{nombre}"])
+                        / func.nullif(func.sum(por_plataforma.c[f"n_{nombre}"]), 0),
+                        Numeric
+                    ),
+                    1
+                ),
+                0
+            )
+        
+        sostenibilidad = promedio("sost")
+        calidad = promedio("cal")
+        hoteles = (
+            db.query(
+                por_plataforma.c.hotel_id,
+                por_plataforma.c.hotel_nombre,
+                func.sum(por_plataforma.c.total).label("total_resenas"),
+                sostenibilidad.label("sostenibilidad"),
+                calidad.label("calidad"),
+                func.sum(por_plataforma.c.positivo).label("positivo"),
+                func.sum(por_plataforma.c.negativo).label("negativo"),
+                func.sum(por_plataforma.c.neutro).label("neutro"),
+                func.array_agg(
+                    aggregate_order_by(por_plataforma.c.plataforma, por_plataforma.c.total.desc())
+                )[1].label("plataforma")
+            )
+            .group_by(por_plataforma.c.hotel_id, por_plataforma.c.hotel_nombre)
+        )
+        if sostenibilidad_min is not None:
+            hoteles = hoteles.having(sostenibilidad >= sostenibilidad_min)
+        if calidad_min is not None:
+            hoteles = hoteles.having(calidad >= calidad_min)
+        
+        hoteles = (
+            hoteles.order_by(por_plataforma.c.hotel_nombre, por_plataforma.c.hotel_id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        
+        resultado = []
+        for fila in hoteles:
+            conteos = {"POSITIVO": fila.positivo, "NEGATIVO": fila.negativo, "NEUTRO": fila.neutro}
+            # Sin sentimientos: NEUTRO
+            sentimiento = max(conteos, key=conteos.get) if any(conteos.values()) else "NEUTRO"
+            resultado.append({
+                "hotel_id": str(fila.hotel_id),
+                "hotel_nombre": fila.hotel_nombre,
+                "sostenibilidad": float(fila.sostenibilidad),
+                "calidad": float(fila.calidad),
+                "total_resenas": int(fila.total_resenas),
+                "sentimiento": sentimiento.lower(),
+                "plataforma": (fila.plataforma or "google").lower()
+            })
+        return resultado
+    
     def obtener_resenas_destacadas(
         self,
         db: Session,
@@ -313,36 +604,38 @@ class IndicadoresService:
         hotel_id: UUID,
         meses: int = 12
     ) -> List[Dict[str, any]]:
-        """Obtener tendencia de indicadores por mes"""
+        """Obtener tendencia de indicadores por mes (desde metricas_diarias)"""
         
         fecha_fin = datetime.utcnow()
         fecha_inicio = fecha_fin - timedelta(days=meses * 30)
         
-        # Agrupar por mes
+        mes = func.date_trunc('month', MetricaDiaria.dia).label('mes')
         resultados = (
             db.query(
-                func.date_trunc('month', Resena.fecha_publicacion).label('mes'),
-                func.count(Resena.id).label('total_resenas'),
-                func.avg(Resena.puntuacion).label('promedio')
+                mes,
+                func.sum(MetricaDiaria.total_resenas).label('total_resenas'),
+                (
+                    func.sum(MetricaDiaria.suma_puntuacion)
+                    / func.nullif(func.sum(MetricaDiaria.con_puntuacion), 0)
+                ).label('promedio')
             )
-            .join(HotelPlataforma)
             .filter(
                 and_(
-                    HotelPlataforma.hotel_id == hotel_id,
-                    Resena.fecha_publicacion >= fecha_inicio,
-                    Resena.fecha_publicacion <= fecha_fin,
-                    Resena.procesada == True
+                    MetricaDiaria.hotel_id == hotel_id,
+                    MetricaDiaria.dia >= fecha_inicio.date(),
+                    MetricaDiaria.dia <= fecha_fin.date()
                 )
             )
-            .group_by('mes')
-            .order_by('mes')
+            .group_by(mes)
+            .having(func.sum(MetricaDiaria.total_resenas) > 0)
+            .order_by(mes)
             .all()
         )
         
         return [
             {
                 "mes": mes.strftime("%Y-%m") if mes else "",
-                "total_resenas": total,
+                "total_resenas": int(total),
                 "promedio": round(float(promedio), 2) if promedio else 0.0
             }
             for mes, total, promedio in resultados
@@ -350,3 +643,13 @@ class IndicadoresService:
 
 
 indicadores_service = IndicadoresService()
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"metricas_diarias: {indicadores_service.reconstruir_metricas_diarias(db)} filas")
+    finally:
+        db.close()
@@ -0,0 +1,166 @@
+"""
+Servicio de Ingesta - Recepción continua de reseñas en NDJSON
+"""
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.carga_resenas import CargadorResenas
+from app.services.filtro_hashes import FiltroHashes, guardar_filtro, obtener_filtro
+from app.services.resolutor_importacion import ResolutorImportacion
+from app.services.scraping_service import scraping_service
+
+PLATAFORMAS_INGESTA = ("GOOGLE", "BOOKING", "AIRBNB")
+MAX_ERRORES_REPORTADOS = 50
+
+
+class IngestaService:
+    """
+    Ingesta de reseñas enviadas por scrapers remotos
+
+    Cada línea del cuerpo es un registro JSON con "plataforma" y los campos
+    que emite el scraper de esa plataforma (para Google, "hotel" y "url" del
+    hotel junto a los del comentario). El cuerpo se lee por bloques; cada vez
+    que se junta un lote se escribe en un hilo y no se lee más hasta que
+    termina, así la memoria queda acotada a un lote y un cliente rápido
+    espera a la base de datos.
+    """
+
+    async def ingestar(self, db: Session, flujo: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Ingestar un flujo NDJSON
+
+        Returns:
+            Totales, resultado por lote y errores de las líneas rechazadas
+        """
+        tamano_lote = settings.SCRAPING_INGESTA_LOTE
+        max_linea = settings.SCRAPING_INGESTA_MAX_LINEA
+
+        resolutor = await run_in_threadpool(ResolutorImportacion, db)
+        filtro = await run_in_threadpool(obtener_filtro, db)
+        resultado = {"registros": 0, "invalidos": 0, "lotes": [], "errores": [], "completo": True}
+        lote: List[Tuple[str, Dict[str, Any]]] = []
+        numero_linea = 0
+        resto = b""
+
+        async def escribir() -> None:
+            nonlocal lote
+            resumen = await run_in_threadpool(
+                self._escribir_lote, db, resolutor, filtro, lote, len(resultado["lotes"]) + 1
+            )
+            resultado["lotes"].append(resumen)
+            lote = []
+
+        async for bloque in flujo:
+            resto += bloque
+            *lineas, resto = resto.split(b"\n")
+
+            for linea in lineas:
+                numero_linea += 1
+                self._agregar(resultado, lote, numero_linea, linea)
+                if len(lote) >= tamano_lote:
+                    await escribir()
+
+            # Una línea sin fin acotado detiene la ingesta; lo ya leído se escribe
+            if len(resto) > max_linea:
+                numero_linea += 1
+                resultado["registros"] += 1
+                self._rechazar(resultado, numero_linea, "línea demasiado larga")
+                resultado["completo"] = False
+                resto = b""
+                break
+
+        if resto.strip():
+            numero_linea += 1
+            self._agregar(resultado, lote, numero_linea, resto)
+        if lote:
+            await escribir()
+
+        resultado["nuevas"] = sum(l["nuevas"] for l in resultado["lotes"])
+        resultado["duplicadas"] = sum(l["duplicadas"] for l in resultado["lotes"])
+        resultado["cache_resolucion"] = resolutor.estadisticas()
+        await run_in_threadpool(guardar_filtro)
+        return resultado
+
+    def _agregar(
+        self,
+        resultado: Dict[str, Any],
+        lote: List[Tuple[str, Dict[str, Any]]],
+        numero_linea: int,
+        linea: bytes
+    ) -> None:
+        """Decodificar una línea y sumarla al lote, o registrarla como inválida"""
+        if not linea.strip():
+            return
+        resultado["registros"] += 1
+
+        try:
+            registro = json.loads(linea)
+        except UnicodeDecodeError:
+            self._rechazar(resultado, numero_linea, "texto no es UTF-8 válido")
+            return
+        except json.JSONDecodeError as e:
+            self._rechazar(resultado, numero_linea, f"JSON inválido ({e.msg})")
+            return
+
+        codigo = registro.get("plataforma") if isinstance(registro, dict) else None
+        if not isinstance(codigo, str) or codigo.upper() not in PLATAFORMAS_INGESTA:
+            self._rechazar(resultado, numero_linea, "plataforma ausente o no soportada")
+            return
+
+        lote.append((codigo.upper(), registro))
+
+    def _rechazar(self, resultado: Dict[str, Any], numero_linea: int, motivo: str) -> None:
+        resultado["invalidos"] += 1
+        if len(resultado["errores"]) < MAX_ERRORES_REPORTADOS:
+            resultado["errores"].append(f"Línea {numero_linea}: {motivo}")
+
+    def _escribir_lote(
+        self,
+        db: Session,
+        resolutor: ResolutorImportacion,
+        filtro: Optional[FiltroHashes],
+        lote: List[Tuple[str, Dict[str, Any]]],
+        numero: int
+    ) -> Dict[str, int]:
+        """Resolver y escribir un lote en una transacción (se ejecuta en un hilo)"""
+        cargador = CargadorResenas(
+            db, tamano_lote=len(lote) + 1, resolutor=resolutor, modo="lotes", filtro=filtro
+        )
+        sin_hotel = 0
+        invalidos = 0
+
+        for codigo, registro in lote:
+            plataforma = resolutor.plataforma(codigo)
+            if plataforma is None:
+                sin_hotel += 1
+                continue
+
+            hp_id = scraping_service.resolver_relacion(resolutor, codigo, plataforma.id, registro)
+            if not hp_id:
+                sin_hotel += 1
+                continue
+
+            try:
+                resena_data = scraping_service.construir_resena(codigo, hp_id, registro)
+            except Exception:
+                invalidos += 1
+                continue
+
+            cargador.agregar(resena_data)
+
+        resumen = cargador.cerrar()
+        return {
+            "lote": numero,
+            "registros": len(lote),
+            "nuevas": resumen["nuevas"],
+            "duplicadas": resumen["duplicadas"],
+            "sin_hotel": sin_hotel,
+            "invalidos": invalidos,
+        }
+
+
+ingesta_service = IngestaService()
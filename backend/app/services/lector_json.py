@@ -0,0 +1,308 @@
+"""
+Lectura incremental de los JSON generados por los scrapers
+
+Los archivos se recorren por bloques y solo se decodifica un registro
+(comentario, reseña) a la vez, de modo que la memoria usada no depende
+del tamaño del archivo.
+
+Antes de entregar cada registro los lectores lo marcan (`LectorJSON.marcar`)
+con el desplazamiento en bytes donde termina y una `reanudacion`: el byte
+desde el que continuar y el contexto necesario (ciudad, hotel). Pasando esa
+reanudación como `reanudar`, el lector salta directamente a ese byte en
+lugar de volver a decodificar los registros anteriores.
+"""
+import io
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, Tuple
+
+from app.core.exceptions import ScrapingException
+
+TAMANO_BLOQUE = 64 * 1024
+
+_NO_ESPACIO = re.compile(r"[^ \t\r\n]")
+_FIN_VALOR = frozenset(" \t\r\n,:]}")
+_decoder = json.JSONDecoder()
+
+# Dónde retoma `elementos`/`miembros`: al abrir el contenedor, sobre un
+# elemento ya posicionado o antes del separador que sigue a un elemento
+INICIO, ELEMENTO, SEPARADOR = "inicio", "elemento", "separador"
+
+
+class LectorJSON:
+    """
+    Recorre un documento JSON sin cargarlo completo en memoria
+
+    `miembros` y `elementos` navegan objetos y arrays; en cada paso el lector
+    queda posicionado sobre el valor actual, que el llamador debe consumir
+    con `valor` o descendiendo con otro `miembros`/`elementos`.
+
+    `marcar` guarda la posición actual como desplazamiento en bytes desde el
+    inicio del archivo (UTF-8, sin traducción de saltos de línea). Las
+    posiciones se calculan de forma incremental, por lo que deben pedirse en
+    orden creciente.
+    """
+
+    def __init__(
+        self, archivo: TextIO, tamano_bloque: int = TAMANO_BLOQUE, bytes_inicio: int = 0
+    ):
+        self._archivo = archivo
+        self._tamano_bloque = tamano_bloque
+        self._buffer = ""
+        self._pos = 0
+        self._agotado = False
+        self._bytes_base = bytes_inicio  # bytes anteriores al buffer
+        self._cursor = 0  # posición del buffer con bytes ya contados
+        self._cursor_bytes = 0
+        self.marcas = 0
+        self.bytes_marcados = bytes_inicio
+        self.reanudacion: Optional[Dict[str, Any]] = None
+
+    def posicion_bytes(self) -> int:
+        """Desplazamiento en bytes de la posición actual"""
+        self._cursor_bytes += len(self._buffer[self._cursor:self._pos].encode("utf-8"))
+        self._cursor = self._pos
+        return self._bytes_base + self._cursor_bytes
+
+    def marcar(self, contexto: Dict[str, Any], desde: Optional[int] = None) -> None:
+        """
+        Marcar el fin del registro que se va a entregar
+
+        Args:
+            contexto: Estado del lector de formato para retomar después del registro
+            desde: Byte desde el que retomar, si no es el fin del registro
+        """
+        self.bytes_marcados = self.posicion_bytes()
+        self.marcas += 1
+        self.reanudacion = {
+            "desde": self.bytes_marcados if desde is None else desde,
+            "contexto": contexto,
+        }
+
+    def _leer_bloque(self) -> bool:
+        """Agregar un bloque al buffer, descartando lo ya consumido"""
+        if self._agotado:
+            return False
+        bloque = self._archivo.read(self._tamano_bloque)
+        if not bloque:
+            self._agotado = True
+            return False
+        self._bytes_base = self.posicion_bytes()
+        self._cursor = self._cursor_bytes = 0
+        self._buffer = self._buffer[self._pos:] + bloque
+        self._pos = 0
+        return True
+
+    def siguiente(self) -> str:
+        """Devolver el siguiente carácter significativo sin consumirlo ("" al final)"""
+        while True:
+            match = _NO_ESPACIO.search(self._buffer, self._pos)
+            if match:
+                self._pos = match.start()
+                return self._buffer[self._pos]
+            self._pos = len(self._buffer)
+            if not self._leer_bloque():
+                return ""
+
+    def consumir(self, esperado: str) -> None:
+        """Consumir un carácter estructural"""
+        if self.siguiente() != esperado:
+            raise ScrapingException(f"JSON inválido: se esperaba '{esperado}'")
+        self._pos += 1
+
+    def valor(self) -> Any:
+        """Decodificar el valor actual completo"""
+        self.siguiente()
+        while True:
+            try:
+                valor, fin = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._leer_bloque():
+                    continue
+                raise ScrapingException("JSON inválido o truncado")
+            # Un número cortado por el bloque ("1" o "1.") continúa en el siguiente
+            if (
+                (fin == len(self._buffer) or self._buffer[fin] not in _FIN_VALOR)
+                and self._leer_bloque()
+            ):
+                continue
+            self._pos = fin
+            return valor
+
+    def elementos(self, desde: str = INICIO) -> Iterator[None]:
+        """Recorrer un array; en cada paso el lector queda sobre un elemento"""
+        if desde == INICIO:
+            self.consumir("[")
+            if self.siguiente() == "]":
+                self._pos += 1
+                return
+        while True:
+            if desde == SEPARADOR:
+                desde = ELEMENTO
+            else:
+                yield
+            separador = self.siguiente()
+            self._pos += 1
+            if separador == "]":
+                return
+            if separador != ",":
+                raise ScrapingException("JSON inválido: se esperaba ',' o ']'")
+
+    def miembros(self, desde: str = INICIO) -> Iterator[str]:
+        """Recorrer un objeto; entrega cada clave dejando el lector sobre su valor"""
+        if desde == INICIO:
+            self.consumir("{")
+            if self.siguiente() == "}":
+                self._pos += 1
+                return
+        while True:
+            if desde == SEPARADOR:
+                desde = INICIO
+            else:
+                clave = self.valor()
+                if not isinstance(clave, str):
+                    raise ScrapingException("JSON inválido: clave de objeto no textual")
+                self.consumir(":")
+                yield clave
+            separador = self.siguiente()
+            self._pos += 1
+            if separador == "}":
+                return
+            if separador != ",":
+                raise ScrapingException("JSON inválido: se esperaba ',' o '}'")
+
+
+AlAbrir = Optional[Callable[[LectorJSON], None]]
+Reanudacion = Optional[Dict[str, Any]]
+
+
+def _abrir(archivo: Path, reanudar: Reanudacion) -> TextIO:
+    binario = open(archivo, "rb")
+    if reanudar:
+        binario.seek(reanudar["desde"])
+    # Sin traducción de saltos de línea, para que las marcas sean bytes reales
+    return io.TextIOWrapper(binario, encoding="utf-8", newline="")
+
+
+def _lector(f: TextIO, al_abrir: AlAbrir, reanudar: Reanudacion) -> LectorJSON:
+    lector = LectorJSON(f, bytes_inicio=reanudar["desde"] if reanudar else 0)
+    if al_abrir is not None:
+        al_abrir(lector)
+    return lector
+
+
+def _registros(lector: LectorJSON, desde: str = INICIO) -> Iterator[Dict[str, Any]]:
+    """Elementos de un array de registros, marcando cada uno"""
+    for _ in lector.elementos(desde):
+        registro = lector.valor()
+        lector.marcar({})
+        yield registro
+
+
+def _hotel(
+    lector: LectorJSON, ciudad: str, contexto: Dict[str, Any], saltar: int = 0
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Comentarios de un hotel; con `contexto` se retoma dentro de su array de comentarios
+
+    Si "comentarios" aparece antes que "nombre" se retienen hasta terminar
+    el hotel; sus marcas retoman desde el inicio del hotel saltando los ya
+    entregados, pero cubren el hotel completo.
+    """
+    if "hotel" in contexto:
+        hotel = contexto["hotel"]
+        inicio = None
+        for _ in lector.elementos(SEPARADOR):
+            comentario = lector.valor()
+            lector.marcar({"ciudad": ciudad, "hotel": hotel})
+            yield hotel, comentario
+        miembros = lector.miembros(SEPARADOR)
+    else:
+        hotel = {"ciudad": ciudad}
+        inicio = lector.posicion_bytes()
+        miembros = lector.miembros()
+
+    retenidos = []
+    for clave in miembros:
+        if clave != "comentarios" or lector.siguiente() != "[":
+            hotel[clave] = lector.valor()
+            continue
+        for _ in lector.elementos():
+            comentario = lector.valor()
+            if "nombre" in hotel:
+                lector.marcar({"ciudad": ciudad, "hotel": hotel})
+                yield hotel, comentario
+            else:
+                retenidos.append(comentario)
+
+    for entregados, comentario in enumerate(retenidos[saltar:], start=saltar + 1):
+        lector.marcar({"ciudad": ciudad, "saltar": entregados}, desde=inicio)
+        yield hotel, comentario
+
+
+def _hoteles(
+    lector: LectorJSON, ciudad: str, contexto: Dict[str, Any]
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Comentarios de la lista de hoteles de una ciudad (retomando según `contexto`)"""
+    saltar = contexto.get("saltar", 0)
+    if "hotel" in contexto:
+        yield from _hotel(lector, ciudad, contexto)
+        elementos = lector.elementos(SEPARADOR)
+    else:
+        elementos = lector.elementos(ELEMENTO if "saltar" in contexto else INICIO)
+    for _ in elementos:
+        yield from _hotel(lector, ciudad, {}, saltar)
+        saltar = 0
+
+
+def leer_google(
+    archivo: Path, al_abrir: AlAbrir = None, reanudar: Reanudacion = None
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Entregar pares (hotel, comentario) del formato ciudad -> hoteles -> comentarios
+
+    El dict del hotel es el mismo objeto para todos sus comentarios e incluye
+    la ciudad. Si "comentarios" aparece antes que "nombre", los comentarios
+    de ese hotel se retienen hasta terminar de leerlo.
+
+    `al_abrir` recibe el lector para consultar sus marcas; `reanudar` es la
+    `reanudacion` de una marca anterior (igual en los demás lectores).
+    """
+    with _abrir(archivo, reanudar) as f:
+        lector = _lector(f, al_abrir, reanudar)
+        if reanudar:
+            contexto = reanudar["contexto"]
+            yield from _hoteles(lector, contexto["ciudad"], contexto)
+            ciudades = lector.miembros(SEPARADOR)
+        else:
+            ciudades = lector.miembros()
+        for ciudad in ciudades:
+            yield from _hoteles(lector, ciudad, {})
+
+
+def leer_booking(
+    archivo: Path, al_abrir: AlAbrir = None, reanudar: Reanudacion = None
+) -> Iterator[Dict[str, Any]]:
+    """Entregar los registros del array `comentarios_parciales` de Booking"""
+    with _abrir(archivo, reanudar) as f:
+        lector = _lector(f, al_abrir, reanudar)
+        if reanudar:
+            yield from _registros(lector, SEPARADOR)
+            miembros = lector.miembros(SEPARADOR)
+        else:
+            miembros = lector.miembros()
+        for clave in miembros:
+            if clave != "comentarios_parciales" or lector.siguiente() != "[":
+                lector.valor()
+                continue
+            yield from _registros(lector)
+
+
+def leer_airbnb(
+    archivo: Path, al_abrir: AlAbrir = None, reanudar: Reanudacion = None
+) -> Iterator[Dict[str, Any]]:
+    """Entregar las reseñas de la lista plana de Airbnb"""
+    with _abrir(archivo, reanudar) as f:
+        lector = _lector(f, al_abrir, reanudar)
+        yield from _registros(lector, SEPARADOR if reanudar else INICIO)
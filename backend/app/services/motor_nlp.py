@@ -0,0 +1,84 @@
+"""
+Motor NLP multiproceso
+
+Reparte el análisis (VADER + palabras clave, CPU puro) entre varios procesos.
+Cada proceso carga el analizador una sola vez al iniciar; los procesos solo
+reciben tuplas (id, texto) y devuelven diccionarios, la escritura en la base
+de datos queda en el proceso padre.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+Tarea = Tuple[UUID, str]
+Resultado = Tuple[UUID, Dict[str, Any], List[Dict[str, Any]]]
+
+# Servicio NLP del proceso trabajador
+_servicio = None
+
+
+def _inicializar(version_clasificador: Optional[str] = None) -> None:
+    global _servicio
+    from app.services.nlp_service import nlp_service
+    # La versión del padre, aunque entretanto se haya publicado otra
+    nlp_service.refrescar_clasificador(version_clasificador)
+    nlp_service.precargar()
+    _servicio = nlp_service
+
+
+def _analizar(tareas: List[Tarea], criterios: List[Tuple[UUID, List[str]]]) -> List[Resultado]:
+    return _servicio.analizar_tareas(tareas, criterios)
+
+
+def puede_crear_procesos() -> bool:
+    """Los procesos daemon (p. ej. hijos prefork de Celery) no pueden tener hijos"""
+    return not multiprocessing.current_process().daemon
+
+
+class MotorNLPParalelo:
+    """
+    Pool de procesos para analizar reseñas
+
+    Usar como context manager para cerrar el pool al terminar.
+    """
+
+    def __init__(
+        self,
+        procesos: Optional[int] = None,
+        tamano_tarea: Optional[int] = None,
+        version_clasificador: Optional[str] = None
+    ):
+        self.procesos = procesos or settings.NLP_PROCESOS
+        self.tamano_tarea = tamano_tarea or settings.NLP_TAMANO_TAREA
+        # spawn: los hijos no heredan conexiones ni hilos del proceso padre
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar,
+            initargs=(version_clasificador,)
+        )
+
+    def analizar(
+        self, tareas: List[Tarea], criterios: List[Tuple[UUID, List[str]]]
+    ) -> List[Resultado]:
+        """Analizar las tareas en paralelo, conservando el orden"""
+        trozos = [
+            tareas[i:i + self.tamano_tarea] for i in range(0, len(tareas), self.tamano_tarea)
+        ]
+        resultados = []
+        for parcial in self._executor.map(_analizar, trozos, repeat(criterios)):
+            resultados.extend(parcial)
+        return resultados
+
+    def cerrar(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "MotorNLPParalelo":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cerrar()
@@ -1,34 +1,115 @@
 """
 Servicio de NLP - Procesamiento de lenguaje natural
 """
+import hashlib
+import json
+import logging
 import re
-from typing import Dict, List, Optional
+import threading
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
 from datetime import datetime
+from uuid import UUID
 
 from sqlalchemy.orm import Session
-from textblob import TextBlob
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
 
+from app.core.cache import CacheDosNiveles
 from app.core.config import settings
 from app.core.exceptions import NLPException
-from app.crud import crud_resena, crud_sentimiento, crud_clasificacion, crud_criterio
+from app.crud import (
+    crud_resena, crud_sentimiento, crud_clasificacion, crud_criterio, crud_indice_palabras,
+    crud_metrica_diaria
+)
+from app.models.criterio import Criterio
 from app.models.resena import Resena
 from app.schemas.resena import SentimientoBase, ClasificacionBase
+from app.services.buscador_palabras import obtener_buscador, terminos
+from app.services.cache_indicadores import cache_indicadores
+from app.services.motor_nlp import MotorNLPParalelo, puede_crear_procesos
 
+logger = logging.getLogger(__name__)
 
-# Descargar recursos NLTK si no existen
-try:
-    nltk.data.find('vader_lexicon')
-except LookupError:
-    nltk.download('vader_lexicon', quiet=True)
+_URL = re.compile(r'http\S+|www.\S+')
+_CARACTERES_ESPECIALES = re.compile(r'[^\w\s.,;:!?├ííáó├║ñ├╝]')
+_ESPACIOS = re.compile(r'\s+')
+
+# Cambiarla invalida los resultados guardados en la caché
+VERSION_NLP = "2"
+MOTORES_SENTIMIENTO = ("vader", "lexico")
+CLASIFICADORES = ("palabras", "modelo")
+
+# Copia del léxico VADER de NLTK: se carga sin nltk_data ni red
+RUTA_LEXICO_VADER = Path(__file__).resolve().parent / "recursos" / "vader_lexicon.txt"
+
+
+def _huella(*partes: Any) -> str:
+    """Hash corto de una configuración serializable a JSON"""
+    configuracion = json.dumps(partes, ensure_ascii=False, default=str)
+    return hashlib.sha1(configuracion.encode("utf-8")).hexdigest()[:12]
+
+
+@lru_cache(maxsize=8)
+def _version_cache(
+    motor: str, clasificador: str, palabras_por_criterio: Tuple[Tuple[str, ...], ...]
+) -> str:
+    return _huella(VERSION_NLP, motor, clasificador, palabras_por_criterio)
+
+
+class ContextoAnalisis:
+    """
+    Análisis compartido de un texto
+    
+    El texto se limpia una sola vez y los scores VADER se calculan la
+    primera vez que se piden. Todos los criterios de una reseña usan el
+    mismo contexto.
+    """
+    
+    def __init__(self, servicio: "NLPService", texto: str):
+        self._servicio = servicio
+        self.texto = texto
+        self.texto_limpio = servicio.limpiar_texto(texto)
+        self._scores: Optional[Dict[str, float]] = None
+    
+    @property
+    def scores(self) -> Dict[str, float]:
+        if self._scores is None:
+            self._scores = self._servicio.puntuar(self.texto_limpio)
+        return self._scores
+    
+    @scores.setter
+    def scores(self, scores: Dict[str, float]) -> None:
+        self._scores = scores
 
 
 class NLPService:
-    """Servicio de procesamiento de lenguaje natural"""
+    """
+    Servicio de procesamiento de lenguaje natural
+    
+    Crear la instancia es barato: el analizador de sentimiento y el
+    clasificador de criterios se cargan la primera vez que se usan, o antes
+    con precargar().
+    """
     
     def __init__(self):
-        self.sia = SentimentIntensityAnalyzer()
+        self.motor_sentimiento = settings.NLP_MOTOR_SENTIMIENTO
+        if self.motor_sentimiento not in MOTORES_SENTIMIENTO:
+            raise ValueError(f"Motor de sentimiento no soportado: {self.motor_sentimiento}")
+        self.tipo_clasificador = settings.NLP_CLASIFICADOR
+        if self.tipo_clasificador not in CLASIFICADORES:
+            raise ValueError(f"Clasificador no soportado: {self.tipo_clasificador}")
+        
+        self._sia = None
+        self._lexico = None
+        self._clasificador = None
+        self._clasificador_cargado = False
+        self._lock_recursos = threading.Lock()
+        
+        self.cache = self._crear_cache()
+        self._consultas_cache = 0
+        self._aciertos_cache = 0
         # Palabras clave para sostenibilidad
         self.sostenibilidad_keywords = [
             'sostenible', 'ecológico', 'reciclaje', 'energáa solar',
@@ -44,24 +125,146 @@ class NLPService:
             'desayuno', 'comida', 'restaurante', 'piscina', 'gym'
         ]
     
+    @property
+    def sia(self):
+        """Analizador VADER (importa NLTK al primer uso)"""
+        if self._sia is None:
+            with self._lock_recursos:
+                if self._sia is None:
+                    from nltk.sentiment import SentimentIntensityAnalyzer
+                    self._sia = SentimentIntensityAnalyzer(lexicon_file=RUTA_LEXICO_VADER.as_uri())
+        return self._sia
+    
+    @property
+    def lexico(self):
+        """Léxico español vectorizado, o None si el motor configurado es VADER"""
+        if self.motor_sentimiento != "lexico":
+            return None
+        if self._lexico is None:
+            with self._lock_recursos:
+                if self._lexico is None:
+                    from app.services.sentimiento_lexico import LexicoSentimiento
+                    self._lexico = LexicoSentimiento()
+        return self._lexico
+    
+    @property
+    def clasificador(self):
+        """Clasificador entrenado; None con palabras clave o sin artefactos"""
+        if self.tipo_clasificador != "modelo":
+            return None
+        if not self._clasificador_cargado:
+            with self._lock_recursos:
+                if not self._clasificador_cargado:
+                    from app.services.clasificador_criterios import cargar_clasificador
+                    self._clasificador = cargar_clasificador()
+                    self._clasificador_cargado = True
+        return self._clasificador
+    
+    def refrescar_clasificador(self, version: Optional[str] = None) -> bool:
+        """
+        Cargar la versión publicada del clasificador (o `version`) si cambió
+        
+        Se llama al empezar cada ejecución, no en medio de un lote: todas las
+        reseñas de una ejecución se valoran y etiquetan con el mismo modelo.
+        
+        Returns:
+            True si se cargó otra versión
+        """
+        if self.tipo_clasificador != "modelo":
+            return False
+        from app.services.clasificador_criterios import cargar_clasificador, version_actual
+        
+        version = version or version_actual()
+        if version is None:
+            return False
+        with self._lock_recursos:
+            anterior = self._clasificador.version if self._clasificador is not None else None
+            if self._clasificador_cargado and anterior == version:
+                return False
+            self._clasificador = cargar_clasificador(version=version)
+            self._clasificador_cargado = True
+        logger.info(f"Clasificador de criterios: versión {version} (antes {anterior})")
+        return True
+    
+    def _motor(self, procesos: int):
+        """Pool de análisis con la misma versión del clasificador que este proceso"""
+        if procesos <= 1:
+            return nullcontext()
+        clasificador = self.clasificador
+        return MotorNLPParalelo(
+            procesos, version_clasificador=clasificador.version if clasificador is not None else None
+        )
+    
+    def precargar(self) -> Dict[str, Any]:
+        """
+        Cargar los recursos NLP configurados antes del primer análisis
+        
+        Pensado para el arranque de workers: en el proceso principal de
+        Celery, antes del fork, los hijos heredan los recursos ya cargados.
+        
+        Returns:
+            Recursos cargados y segundos que tomó
+        """
+        inicio = time.perf_counter()
+        if self.lexico is None:
+            self.sia
+        clasificador = self.clasificador
+        # Compilar el analizador y el autómata de palabras por defecto
+        self.puntuar(self.limpiar_texto("Excelente servicio"))
+        obtener_buscador([self.sostenibilidad_keywords, self.calidad_keywords])
+        return {
+            "motor_sentimiento": self.motor_sentimiento,
+            "clasificador": clasificador.version if clasificador is not None else "palabras",
+            "segundos": round(time.perf_counter() - inicio, 3),
+        }
+    
+    def version_sentimiento(self) -> str:
+        """Versión de los sentimientos: cambia con VERSION_NLP, el motor o los umbrales"""
+        return _huella(
+            VERSION_NLP,
+            self.motor_sentimiento,
+            settings.SENTIMENT_THRESHOLD_POSITIVE,
+            settings.SENTIMENT_THRESHOLD_NEGATIVE
+        )
+    
+    def version_clasificacion(self, criterio_keywords: List[str]) -> str:
+        """Versión de las clasificaciones de un criterio: además, modelo y palabras clave"""
+        return _huella(
+            self.version_sentimiento(),
+            self.clasificador.version if self.clasificador is not None else "palabras",
+            list(criterio_keywords)
+        )
+    
+    def _crear_cache(self) -> Optional[CacheDosNiveles]:
+        if settings.NLP_CACHE_TAMANO <= 0 and not settings.NLP_CACHE_REDIS:
+            return None
+        return CacheDosNiveles(
+            prefijo="nlp:",
+            tamano=settings.NLP_CACHE_TAMANO,
+            redis_url=settings.REDIS_URL if settings.NLP_CACHE_REDIS else None,
+            ttl=settings.NLP_CACHE_TTL
+        )
+    
     def limpiar_texto(self, texto: str) -> str:
         """Limpiar y normalizar texto"""
         if not texto:
             return ""
-        # Convertir a min├║sculas
+        # Convertir a minúsculas
         texto = texto.lower()
         # Eliminar URLs
-        texto = re.sub(r'http\S+|www.\S+', '', texto)
-        # Eliminar caracteres especiales pero mantener espacios y puntuación b├ísica
-        texto = re.sub(r'[^\w\s.,;:!?├ííáó├║ñ├╝]', '', texto)
-        # Eliminar espacios m├║ltiples
-        texto = re.sub(r'\s+', ' ', texto)
+        texto = _URL.sub('', texto)
+        # Eliminar caracteres especiales pero mantener espacios y puntuación básica
+        texto = _CARACTERES_ESPECIALES.sub('', texto)
+        # Eliminar espacios múltiples
+        texto = _ESPACIOS.sub(' ', texto)
         return texto.strip()
     
-    def analizar_sentimiento(self, texto: str) -> Dict[str, float]:
-        """Analizar sentimiento usando VADER"""
-        texto_limpio = self.limpiar_texto(texto)
-        
+    def crear_contexto(self, texto: str) -> "ContextoAnalisis":
+        """Contexto de análisis de un texto, para compartir entre criterios"""
+        return ContextoAnalisis(self, texto)
+    
+    def puntuar(self, texto_limpio: str) -> Dict[str, float]:
+        """Scores de sentimiento de un texto ya limpio, con el motor configurado"""
         if not texto_limpio:
             return {
                 'positivo': 0.0,
@@ -70,6 +273,9 @@ class NLPService:
                 'compuesto': 0.0
             }
         
+        if self.lexico is not None:
+            return self.lexico.puntuar(texto_limpio)
+        
         # VADER scores
         scores = self.sia.polarity_scores(texto_limpio)
         
@@ -80,11 +286,21 @@ class NLPService:
             'compuesto': scores['compound']
         }
     
+    def puntuar_lote(self, textos_limpios: List[str]) -> List[Dict[str, float]]:
+        """Scores de varios textos limpios; el motor léxico los calcula juntos"""
+        if self.lexico is not None:
+            return self.lexico.puntuar_lote(textos_limpios)
+        return [self.puntuar(texto) for texto in textos_limpios]
+    
+    def analizar_sentimiento(self, texto: str) -> Dict[str, float]:
+        """Analizar sentimiento con el motor configurado"""
+        return self.puntuar(self.limpiar_texto(texto))
+    
     def clasificar_sentimiento(self, score_compuesto: float) -> str:
         """Clasificar sentimiento basado en score compuesto"""
-        if score_compuesto >= settings.NLP_POSITIVE_THRESHOLD:
+        if score_compuesto >= settings.SENTIMENT_THRESHOLD_POSITIVE:
             return "POSITIVO"
-        elif score_compuesto <= settings.NLP_NEGATIVE_THRESHOLD:
+        elif score_compuesto <= settings.SENTIMENT_THRESHOLD_NEGATIVE:
             return "NEGATIVO"
         else:
             return "NEUTRO"
@@ -96,18 +312,33 @@ class NLPService:
         return min(max_score * 1.5, 1.0)
     
     def clasificar_por_criterio(
-        self, texto: str, criterio_keywords: List[str]
+        self,
+        texto: Union[str, "ContextoAnalisis"],
+        criterio_keywords: List[str],
+        palabras_detectadas: Optional[List[str]] = None
     ) -> Dict[str, any]:
-        """Clasificar texto seg├║n palabras clave de un criterio"""
-        texto_limpio = self.limpiar_texto(texto)
-        palabras_detectadas = []
+        """
+        Clasificar texto según palabras clave de un criterio
         
-        # Buscar palabras clave
-        for keyword in criterio_keywords:
-            if keyword.lower() in texto_limpio:
-                palabras_detectadas.append(keyword)
+        Acepta un ContextoAnalisis para no volver a limpiar ni puntuar el
+        texto en cada criterio, y las palabras ya detectadas si se buscaron
+        con el autómata de todos los criterios.
+        """
+        contexto = texto if isinstance(texto, ContextoAnalisis) else self.crear_contexto(texto)
+        if palabras_detectadas is None:
+            palabras_detectadas = obtener_buscador([criterio_keywords]).buscar(contexto.texto_limpio)[0]
         
         # Si no hay palabras clave, valoración neutral
+        if not palabras_detectadas:
+            return self._valorar_criterio(None, [])
+        
+        # Sentimiento del texto (calculado una sola vez por contexto)
+        return self._valorar_criterio(contexto.scores, palabras_detectadas)
+    
+    def _valorar_criterio(
+        self, sentimiento: Optional[Dict[str, float]], palabras_detectadas: List[str]
+    ) -> Dict[str, any]:
+        """Valoración de un criterio a partir del sentimiento y sus palabras detectadas"""
         if not palabras_detectadas:
             return {
                 'valoracion': 3.0,
@@ -115,9 +346,6 @@ class NLPService:
                 'palabras_detectadas': []
             }
         
-        # Analizar sentimiento del texto
-        sentimiento = self.analizar_sentimiento(texto)
-        
         # Valoración basada en sentimiento (1-5)
         # compuesto va de -1 a 1, convertir a escala 1-5
         valoracion = ((sentimiento['compuesto'] + 1) / 2) * 4 + 1
@@ -132,84 +360,607 @@ class NLPService:
             'palabras_detectadas': palabras_detectadas
         }
     
+    def texto_resena(
+        self,
+        texto_completo: Optional[str],
+        texto_positivo: Optional[str] = None,
+        texto_negativo: Optional[str] = None
+    ) -> str:
+        """Texto a analizar: el completo o, en Booking, positivo + negativo"""
+        texto = texto_completo or ""
+        if not texto and (texto_positivo or texto_negativo):
+            texto = f"{texto_positivo or ''} {texto_negativo or ''}"
+        return texto
+    
+    def palabras_criterio(self, criterio: Criterio) -> List[str]:
+        """Palabras clave de un criterio, con las palabras por defecto"""
+        if criterio.codigo == "SOSTENIBILIDAD":
+            keywords = criterio.palabras_clave or self.sostenibilidad_keywords
+        elif criterio.codigo == "CALIDAD":
+            keywords = criterio.palabras_clave or self.calidad_keywords
+        else:
+            keywords = criterio.palabras_clave or []
+        return list(keywords)
+    
+    def criterios_activos(self, db: Session) -> List[Tuple[UUID, List[str]]]:
+        """Criterios activos como (id, palabras clave), con las palabras por defecto"""
+        return [
+            (criterio.id, self.palabras_criterio(criterio))
+            for criterio in crud_criterio.get_active(db)
+        ]
+    
+    def analizar_resena(
+        self, texto: str, criterios: List[Tuple[UUID, List[str]]]
+    ) -> Tuple[Dict[str, any], List[Dict[str, any]]]:
+        """
+        Analizar una reseña sin tocar la base de datos
+        
+        Returns:
+            (sentimiento, clasificaciones) como diccionarios listos para
+            insertar, sin resena_id
+        """
+        return self._analizar_contexto(self.crear_contexto(texto), criterios)
+    
+    def _analizar_contexto(
+        self,
+        contexto: "ContextoAnalisis",
+        criterios: List[Tuple[UUID, List[str]]],
+        predicciones: Optional[List[Optional[Tuple[float, float]]]] = None
+    ) -> Tuple[Dict[str, any], List[Dict[str, any]]]:
+        # Un recorrido del texto encuentra las palabras de todos los criterios
+        encontradas = obtener_buscador([keywords for _, keywords in criterios]).buscar(
+            contexto.texto_limpio
+        )
+        if predicciones is None and self.clasificador is not None:
+            predicciones = self.clasificador.predecir(
+                [contexto.texto_limpio], [criterio_id for criterio_id, _ in criterios]
+            )[0]
+        return self._construir_resultado(contexto.scores, encontradas, criterios, predicciones)
+    
+    def _construir_resultado(
+        self,
+        scores: Dict[str, float],
+        encontradas: List[List[str]],
+        criterios: List[Tuple[UUID, List[str]]],
+        predicciones: Optional[List[Optional[Tuple[float, float]]]] = None
+    ) -> Tuple[Dict[str, any], List[Dict[str, any]]]:
+        """
+        Sentimiento y clasificaciones a partir de los scores y las palabras por criterio
+        
+        `predicciones` trae (valoracion, confianza) por criterio, del
+        clasificador o de la caché; los criterios sin predicción se valoran
+        por palabras clave.
+        """
+        sentimiento = SentimientoBase(
+            tipo_sentimiento=self.clasificar_sentimiento(scores['compuesto']),
+            score_positivo=scores['positivo'],
+            score_negativo=scores['negativo'],
+            score_neutro=scores['neutro'],
+            score_compuesto=scores['compuesto'],
+            confianza=self.calcular_confianza(scores)
+        ).model_dump()
+        
+        clasificaciones = []
+        for i, ((criterio_id, _), palabras) in enumerate(zip(criterios, encontradas)):
+            prediccion = predicciones[i] if predicciones else None
+            if prediccion is None:
+                resultado = self._valorar_criterio(scores, palabras)
+            else:
+                resultado = {
+                    'valoracion': prediccion[0],
+                    'confianza': prediccion[1],
+                    'palabras_detectadas': palabras
+                }
+            clasificaciones.append(ClasificacionBase(
+                criterio_id=criterio_id,
+                valoracion=resultado['valoracion'],
+                confianza=resultado['confianza'],
+                palabras_detectadas=resultado['palabras_detectadas']
+            ).model_dump())
+        
+        return sentimiento, clasificaciones
+    
+    def analizar_tareas(
+        self, tareas: List[Tuple[UUID, str]], criterios: List[Tuple[UUID, List[str]]]
+    ) -> List[Tuple[UUID, Dict[str, any], List[Dict[str, any]]]]:
+        """
+        Analizar tuplas (id, texto); las que fallan se omiten
+        
+        Con el motor léxico los scores de todas las tareas se calculan en una
+        sola pasada vectorizada antes de clasificar, y con el clasificador
+        entrenado las valoraciones de todos los criterios salen de un solo
+        producto de matrices.
+        """
+        contextos = [self.crear_contexto(texto) for _, texto in tareas]
+        limpios = [contexto.texto_limpio for contexto in contextos]
+        if self.lexico is not None and contextos:
+            for contexto, scores in zip(contextos, self.puntuar_lote(limpios)):
+                contexto.scores = scores
+        
+        if self.clasificador is not None and contextos:
+            predicciones = self.clasificador.predecir(
+                limpios, [criterio_id for criterio_id, _ in criterios]
+            )
+        else:
+            predicciones = [None] * len(contextos)
+        
+        resultados = []
+        for (resena_id, _), contexto, prediccion in zip(tareas, contextos, predicciones):
+            try:
+                sentimiento, clasificaciones = self._analizar_contexto(
+                    contexto, criterios, prediccion
+                )
+            except Exception as e:
+                logger.warning(f"Error analizando reseña {resena_id}: {str(e)}")
+                continue
+            resultados.append((resena_id, sentimiento, clasificaciones))
+        return resultados
+    
+    def clave_cache(self, texto: str, version: str) -> str:
+        """Clave de caché: hash del texto normalizado y de la versión de configuración"""
+        contenido = f"{version}\n{self.limpiar_texto(texto)}"
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+    
+    def analizar_con_cache(
+        self,
+        tareas: List[Tuple[UUID, str]],
+        criterios: List[Tuple[UUID, List[str]]],
+        motor: Optional[MotorNLPParalelo] = None
+    ) -> List[Tuple[UUID, Dict[str, any], List[Dict[str, any]]]]:
+        """
+        Analizar tuplas (id, texto) consultando antes la caché de resultados
+        
+        Textos repetidos ("Excelente", "Muy limpio") se puntúan una sola vez:
+        los del lote se agrupan por clave y solo se analiza un representante
+        de cada clave que no esté en la caché. La caché guarda los scores y,
+        por criterio, las palabras detectadas, la valoración y la confianza;
+        la versión de la clave cambia con VERSION_NLP, el motor, el modelo
+        de criterios y las palabras clave.
+        """
+        analizar = motor.analizar if motor is not None else self.analizar_tareas
+        if self.cache is None:
+            return analizar(tareas, criterios)
+        
+        version = _version_cache(
+            self.motor_sentimiento,
+            self.clasificador.version if self.clasificador is not None else "palabras",
+            tuple(tuple(keywords) for _, keywords in criterios)
+        )
+        claves = {}
+        representantes = {}
+        for resena_id, texto in tareas:
+            clave = self.clave_cache(texto, version)
+            claves[resena_id] = clave
+            representantes.setdefault(clave, (resena_id, texto))
+        
+        guardados = self.cache.obtener_muchos(representantes)
+        nuevos = {}
+        for resena_id, sentimiento, clasificaciones in analizar(
+            [tarea for clave, tarea in representantes.items() if clave not in guardados], criterios
+        ):
+            nuevos[claves[resena_id]] = {
+                "scores": {
+                    "positivo": sentimiento["score_positivo"],
+                    "negativo": sentimiento["score_negativo"],
+                    "neutro": sentimiento["score_neutro"],
+                    "compuesto": sentimiento["score_compuesto"],
+                },
+                "palabras": [c["palabras_detectadas"] for c in clasificaciones],
+                "valores": [[c["valoracion"], c["confianza"]] for c in clasificaciones],
+            }
+        self.cache.guardar_muchos(nuevos)
+        guardados.update(nuevos)
+        
+        self._consultas_cache += len(tareas)
+        self._aciertos_cache += len(tareas) - len(nuevos)
+        
+        resultados = []
+        for resena_id, _ in tareas:
+            # Sin entrada: el análisis del representante falló
+            guardado = guardados.get(claves[resena_id])
+            if guardado is None:
+                continue
+            sentimiento, clasificaciones = self._construir_resultado(
+                guardado["scores"], guardado["palabras"], criterios, guardado["valores"]
+            )
+            resultados.append((resena_id, sentimiento, clasificaciones))
+        return resultados
+    
+    def estadisticas_cache(self) -> Dict[str, Any]:
+        """
+        Uso de la caché de resultados
+        
+        `tasa_aciertos` cuenta las reseñas resueltas sin puntuar (caché o
+        texto repetido en el mismo lote); `niveles` detalla las consultas a
+        la memoria y a Redis.
+        """
+        if self.cache is None:
+            return {"activa": False}
+        return {
+            "activa": True,
+            "consultas": self._consultas_cache,
+            "aciertos": self._aciertos_cache,
+            "tasa_aciertos": (
+                round(self._aciertos_cache / self._consultas_cache, 4)
+                if self._consultas_cache else 0.0
+            ),
+            "niveles": self.cache.estadisticas(),
+        }
+    
+    def _tareas(self, filas: List[any]) -> List[Tuple[UUID, str]]:
+        """Tuplas (id, texto) de las filas de reseñas con texto"""
+        tareas = []
+        for fila in filas:
+            texto = self.texto_resena(fila.texto_completo, fila.texto_positivo, fila.texto_negativo)
+            if texto.strip():
+                tareas.append((fila.id, texto))
+        return tareas
+    
+    def _indexar(self, db: Session, filas: List[any]) -> int:
+        """Agregar los términos de las reseñas al índice invertido (sin commit)"""
+        return crud_indice_palabras.indexar(
+            db,
+            terminos_por_resena={
+                resena_id: terminos(self.limpiar_texto(texto))
+                for resena_id, texto in self._tareas(filas)
+            }
+        )
+    
+    def _analizar_filas(
+        self,
+        filas: List[any],
+        criterios: List[Tuple[UUID, List[str]]],
+        motor: Optional[MotorNLPParalelo] = None
+    ) -> Tuple[List[Dict[str, any]], List[Dict[str, any]]]:
+        """
+        Analizar filas (id y textos) de reseñas
+        
+        Returns:
+            (sentimientos, clasificaciones) listos para insertar, con
+            resena_id y version_nlp
+        """
+        resultados = self.analizar_con_cache(self._tareas(filas), criterios, motor)
+        
+        version = self.version_sentimiento()
+        versiones = {
+            criterio_id: self.version_clasificacion(keywords) for criterio_id, keywords in criterios
+        }
+        sentimientos = []
+        clasificaciones = []
+        for resena_id, sentimiento, clasificaciones_resena in resultados:
+            sentimiento['resena_id'] = resena_id
+            sentimiento['version_nlp'] = version
+            sentimientos.append(sentimiento)
+            for clasificacion in clasificaciones_resena:
+                clasificacion['resena_id'] = resena_id
+                clasificacion['version_nlp'] = versiones[clasificacion['criterio_id']]
+                clasificaciones.append(clasificacion)
+        return sentimientos, clasificaciones
+    
+    def _procesar_lote(
+        self,
+        db: Session,
+        filas: List[any],
+        criterios: List[Tuple[UUID, List[str]]],
+        motor: Optional[MotorNLPParalelo] = None
+    ) -> int:
+        """
+        Analizar un lote de reseñas y escribir los resultados (sin commit)
+        
+        Sentimientos y clasificaciones van en un INSERT cada uno y todas las
+        reseñas del lote se marcan procesadas con un solo UPDATE. Las reseñas
+        sin texto (o cuyo análisis falla) también se marcan, sin resultados,
+        para que no vuelvan a reclamarse.
+        
+        Los resultados se buscan primero en la caché. Con un `motor` el
+        análisis de los textos restantes se reparte entre sus procesos; la
+        escritura siempre ocurre aquí. Los términos de cada reseña se
+        agregan al índice invertido y las reseñas recién marcadas, a los
+        acumulados diarios (metricas_diarias) en la misma transacción.
+        
+        Returns:
+            Reseñas analizadas
+        """
+        sentimientos, clasificaciones = self._analizar_filas(filas, criterios, motor)
+        crud_sentimiento.create_many(db, objs_in=sentimientos)
+        crud_clasificacion.create_many(db, objs_in=clasificaciones)
+        self._indexar(db, filas)
+        marcadas = crud_resena.marcar_procesadas(db, ids=[fila.id for fila in filas])
+        crud_metrica_diaria.acumular(db, resena_ids=marcadas)
+        return len(sentimientos)
+    
     def procesar_resena(self, db: Session, resena: Resena) -> bool:
         """Procesar una reseña completa: sentimiento y clasificaciones"""
         try:
-            # Obtener texto completo
-            texto = resena.texto_completo or ""
-            if not texto and (resena.texto_positivo or resena.texto_negativo):
-                texto = f"{resena.texto_positivo or ''} {resena.texto_negativo or ''}"
-            
-            if not texto.strip():
-                return False
-            
-            # 1. An├ílisis de sentimiento
-            scores = self.analizar_sentimiento(texto)
-            tipo_sentimiento = self.clasificar_sentimiento(scores['compuesto'])
-            confianza = self.calcular_confianza(scores)
-            
-            # Crear sentimiento
-            sentimiento_data = SentimientoBase(
-                tipo_sentimiento=tipo_sentimiento,
-                score_positivo=scores['positivo'],
-                score_negativo=scores['negativo'],
-                score_neutro=scores['neutro'],
-                score_compuesto=scores['compuesto'],
-                confianza=confianza
-            )
-            
-            # Guardar sentimiento
-            sentimiento_dict = sentimiento_data.model_dump()
-            sentimiento_dict['resena_id'] = resena.id
-            crud_sentimiento.create(db, obj_in=sentimiento_dict)
-            
-            # 2. Clasificación por criterios
-            criterios = crud_criterio.get_active(db)
+            self.refrescar_clasificador()
+            analizadas = self._procesar_lote(db, [resena], self.criterios_activos(db))
+            db.commit()
+            cache_indicadores.invalidar()
+            return analizadas > 0
+        except Exception as e:
+            db.rollback()
+            raise NLPException(f"Error procesando reseña {resena.id}: {str(e)}")
+    
+    def procesar_pendientes(
+        self,
+        db: Session,
+        limit: Optional[int] = 100,
+        tamano_lote: Optional[int] = None,
+        procesos: Optional[int] = None
+    ) -> int:
+        """
+        Procesar reseñas pendientes por lotes
+        
+        Cada lote se reclama con FOR UPDATE SKIP LOCKED, se analiza en memoria
+        y se confirma con un solo commit. Con más de un proceso el análisis
+        usa un MotorNLPParalelo y cada lote se agranda en proporción, salvo
+        dentro de un proceso daemon (hijos prefork de Celery), donde se
+        analiza en serie.
+        
+        Args:
+            limit: Máximo de reseñas a reclamar (None = hasta agotar la cola)
+            tamano_lote: Reseñas por lote (por defecto NLP_TAMANO_LOTE)
+            procesos: Procesos de análisis (por defecto NLP_PROCESOS)
+        
+        Returns:
+            Reseñas analizadas
+        """
+        tamano_lote = tamano_lote or settings.NLP_TAMANO_LOTE
+        procesos = self._procesos(procesos)
+        self.refrescar_clasificador()
+        
+        criterios = self.criterios_activos(db)
+        procesadas = 0
+        restantes = limit
+        
+        with self._motor(procesos) as motor:
+            tamano_lote *= procesos
             
-            for criterio in criterios:
-                if criterio.codigo == "SOSTENIBILIDAD":
-                    keywords = criterio.palabras_clave or self.sostenibilidad_keywords
-                elif criterio.codigo == "CALIDAD":
-                    keywords = criterio.palabras_clave or self.calidad_keywords
-                else:
-                    keywords = criterio.palabras_clave or []
+            while restantes is None or restantes > 0:
+                cantidad = tamano_lote if restantes is None else min(tamano_lote, restantes)
+                filas = crud_resena.reclamar_pendientes(db, limit=cantidad)
+                if not filas:
+                    break
                 
-                resultado = self.clasificar_por_criterio(texto, keywords)
+                try:
+                    procesadas += self._procesar_lote(db, filas, criterios, motor)
+                    db.commit()
+                    cache_indicadores.invalidar()
+                except Exception as e:
+                    db.rollback()
+                    raise NLPException(f"Error procesando lote de reseñas: {str(e)}")
                 
-                # Crear clasificación
-                clasificacion_data = ClasificacionBase(
-                    criterio_id=criterio.id,
-                    valoracion=resultado['valoracion'],
-                    confianza=resultado['confianza'],
-                    palabras_detectadas=resultado['palabras_detectadas']
+                if restantes is not None:
+                    restantes -= len(filas)
+        
+        if procesadas:
+            logger.info(f"Caché NLP: {self.estadisticas_cache()}")
+        return procesadas
+    
+    def _procesos(self, procesos: Optional[int]) -> int:
+        """Procesos de análisis a usar (1 dentro de un proceso daemon)"""
+        procesos = procesos or settings.NLP_PROCESOS
+        if procesos > 1 and not puede_crear_procesos():
+            logger.warning("Proceso daemon: el análisis NLP se ejecuta en serie")
+            procesos = 1
+        return procesos
+    
+    def reprocesar_desactualizadas(
+        self,
+        db: Session,
+        limit: Optional[int] = None,
+        tamano_lote: Optional[int] = None,
+        procesos: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Volver a analizar solo las reseñas con resultados de otra versión
+        
+        Recorre las reseñas analizadas por páginas de id (sin OFFSET) y,
+        para las desactualizadas, reemplaza sentimiento y clasificaciones en
+        el lugar (INSERT ... ON CONFLICT DO UPDATE) con un commit por lote.
+        No se borra nada ni se toca `procesada`: los tableros siguen viendo
+        el resultado anterior de cada reseña hasta que se actualiza. Los
+        acumulados diarios restan el resultado anterior y suman el nuevo en
+        la misma transacción.
+        
+        Args:
+            limit: Máximo de reseñas a revisar (None = todas)
+            tamano_lote: Reseñas por lote (por defecto NLP_TAMANO_LOTE)
+            procesos: Procesos de análisis (por defecto NLP_PROCESOS)
+        
+        Returns:
+            Versión actual y reseñas revisadas y actualizadas
+        """
+        tamano_lote = tamano_lote or settings.NLP_TAMANO_LOTE
+        procesos = self._procesos(procesos)
+        self.refrescar_clasificador()
+        
+        criterios = self.criterios_activos(db)
+        version = self.version_sentimiento()
+        versiones = {
+            criterio_id: self.version_clasificacion(keywords) for criterio_id, keywords in criterios
+        }
+        revisadas = 0
+        actualizadas = 0
+        ultimo_id = None
+        
+        with self._motor(procesos) as motor:
+            tamano_lote *= procesos
+            
+            while limit is None or revisadas < limit:
+                cantidad = tamano_lote if limit is None else min(tamano_lote, limit - revisadas)
+                filas = crud_resena.desactualizadas(
+                    db,
+                    version_sentimiento=version,
+                    versiones_criterio=versiones,
+                    despues_de=ultimo_id,
+                    limit=cantidad
                 )
+                if not filas:
+                    break
+                ultimo_id = filas[-1].id
                 
-                # Guardar clasificación
-                clasificacion_dict = clasificacion_data.model_dump()
-                clasificacion_dict['resena_id'] = resena.id
-                crud_clasificacion.create(db, obj_in=clasificacion_dict)
-            
-            # 3. Marcar reseña como procesada
-            crud_resena.mark_as_processed(db, resena_id=resena.id)
-            
-            return True
-            
-        except Exception as e:
-            raise NLPException(f"Error procesando reseña {resena.id}: {str(e)}")
+                try:
+                    sentimientos, clasificaciones = self._analizar_filas(filas, criterios, motor)
+                    ids = [fila.id for fila in filas]
+                    crud_metrica_diaria.acumular(db, resena_ids=ids, signo=-1)
+                    crud_sentimiento.upsert_many(db, objs_in=sentimientos)
+                    crud_clasificacion.upsert_many(db, objs_in=clasificaciones)
+                    crud_metrica_diaria.acumular(db, resena_ids=ids)
+                    db.commit()
+                    cache_indicadores.invalidar()
+                except Exception as e:
+                    db.rollback()
+                    raise NLPException(f"Error reprocesando lote de reseñas: {str(e)}")
+                
+                revisadas += len(filas)
+                actualizadas += len(sentimientos)
+        
+        logger.info(f"Reproceso NLP {version}: {actualizadas} de {revisadas} reseñas actualizadas")
+        return {"version": version, "revisadas": revisadas, "actualizadas": actualizadas}
     
-    def procesar_pendientes(self, db: Session, limit: int = 100) -> int:
-        """Procesar todas las reseñas pendientes"""
-        resenas = crud_resena.get_pending_processing(db, limit=limit)
-        procesadas = 0
+    def indexar_existentes(self, db: Session, tamano_lote: int = 5000) -> int:
+        """
+        Llenar el índice invertido con las reseñas ya analizadas
         
-        for resena in resenas:
-            try:
-                if self.procesar_resena(db, resena):
-                    procesadas += 1
-            except Exception:
-                continue
+        Se ejecuta una vez después de crear el índice; las reseñas nuevas se
+        indexan al procesarlas. Un commit por lote.
         
-        return procesadas
+        Returns:
+            Reseñas recorridas
+        """
+        recorridas = 0
+        for filas in self._lotes_analizadas(db, None, tamano_lote):
+            self._indexar(db, filas)
+            db.commit()
+            recorridas += len(filas)
+        return recorridas
+    
+    def _lotes_analizadas(
+        self, db: Session, ids: Optional[Set[UUID]], tamano_lote: int
+    ) -> Iterator[List[any]]:
+        """Reseñas analizadas por lotes: las de `ids` o, con None, todas (por clave)"""
+        if ids is not None:
+            ordenados = sorted(ids)
+            for inicio in range(0, len(ordenados), tamano_lote):
+                filas = crud_resena.analizadas(
+                    db, ids=ordenados[inicio:inicio + tamano_lote], limit=None
+                )
+                if filas:
+                    yield filas
+            return
+        
+        ultimo_id = None
+        while True:
+            filas = crud_resena.analizadas(db, despues_de=ultimo_id, limit=tamano_lote)
+            if not filas:
+                return
+            ultimo_id = filas[-1].id
+            yield filas
+    
+    def _candidatas(self, db: Session, cambiadas: Set[str]) -> Optional[Set[UUID]]:
+        """
+        Reseñas que contienen alguna de las palabras clave cambiadas
+        
+        Una palabra clave de varias palabras ("energía solar") solo puede
+        aparecer en reseñas con todos sus términos. Devuelve None si alguna
+        palabra clave no tiene términos indexables (solo palabras vacías):
+        entonces hay que revisar todas las reseñas.
+        """
+        candidatas = set()
+        for palabra in cambiadas:
+            terminos_palabra = terminos(palabra)
+            if not terminos_palabra:
+                return None
+            candidatas |= crud_indice_palabras.resenas_con_terminos(db, terminos=terminos_palabra)
+        return candidatas
+    
+    def reclasificar_cambios_palabras(
+        self, db: Session, tamano_lote: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Reclasificar solo las reseñas afectadas por cambios de palabras clave
+        
+        Cada criterio guarda en `palabras_clave_aplicadas` las palabras con
+        las que están hechas sus clasificaciones. Si difieren de las
+        actuales, el índice invertido da las reseñas que contienen alguna
+        palabra agregada o quitada y solo esas se vuelven a clasificar para
+        ese criterio. El resto de sus clasificaciones no cambia de valor y
+        pasa a la versión nueva con un solo UPDATE, para que
+        reprocesar_desactualizadas no las tome por desactualizadas. Un
+        criterio sin palabras aplicadas (primera ejecución) solo las
+        registra.
+        
+        El índice debe estar lleno (indexar_existentes) para que las
+        reseñas anteriores a él se tengan en cuenta.
+        
+        Returns:
+            Por código de criterio: palabras agregadas y quitadas, reseñas
+            reclasificadas (`tocadas`) y reseñas analizadas (`total`)
+        """
+        tamano_lote = tamano_lote or settings.NLP_TAMANO_LOTE
+        self.refrescar_clasificador()
+        reporte = {}
+        total = None
+        
+        for criterio in crud_criterio.get_active(db):
+            actuales = self.palabras_criterio(criterio)
+            aplicadas = criterio.palabras_clave_aplicadas
+            if aplicadas is None:
+                criterio.palabras_clave_aplicadas = actuales
+                db.commit()
+                continue
+            if list(aplicadas) == actuales:
+                continue
+            
+            agregadas = sorted(set(actuales) - set(aplicadas))
+            quitadas = sorted(set(aplicadas) - set(actuales))
+            candidatas = self._candidatas(db, set(agregadas) | set(quitadas))
+            criterios = [(criterio.id, actuales)]
+            version = self.version_clasificacion(actuales)
+            if total is None:
+                total = crud_resena.contar_analizadas(db)
+            
+            try:
+                tocadas = 0
+                for filas in self._lotes_analizadas(db, candidatas, tamano_lote):
+                    ids = [fila.id for fila in filas]
+                    crud_metrica_diaria.acumular(db, resena_ids=ids, signo=-1)
+                    clasificaciones = []
+                    for resena_id, _, clasificaciones_resena in self.analizar_con_cache(
+                        self._tareas(filas), criterios
+                    ):
+                        for clasificacion in clasificaciones_resena:
+                            clasificacion['resena_id'] = resena_id
+                            clasificacion['version_nlp'] = version
+                            clasificaciones.append(clasificacion)
+                    crud_clasificacion.upsert_many(db, objs_in=clasificaciones)
+                    crud_metrica_diaria.acumular(db, resena_ids=ids)
+                    tocadas += len(filas)
+                
+                crud_clasificacion.actualizar_version(
+                    db,
+                    criterio_id=criterio.id,
+                    anterior=self.version_clasificacion(list(aplicadas)),
+                    nueva=version
+                )
+                criterio.palabras_clave_aplicadas = actuales
+                db.commit()
+                cache_indicadores.invalidar()
+            except Exception as e:
+                db.rollback()
+                raise NLPException(f"Error reclasificando el criterio {criterio.codigo}: {str(e)}")
+            
+            reporte[criterio.codigo] = {
+                "agregadas": agregadas,
+                "quitadas": quitadas,
+                "tocadas": tocadas,
+                "total": total,
+            }
+            logger.info(
+                f"Criterio {criterio.codigo}: {tocadas} de {total} reseñas reclasificadas"
+            )
+        return reporte
 
 
 nlp_service = NLPService()
@@ -0,0 +1,209 @@
+"""
+Resolución de hotel, plataforma y hotel_plataforma durante una importación
+"""
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_hotel_plataforma
+from app.models.hotel import Hotel
+from app.models.hotel_plataforma import HotelPlataforma
+from app.models.plataforma import Plataforma
+from app.services.emparejador_hoteles import EmparejadorHoteles
+
+
+class ResolutorImportacion:
+    """
+    Caché de búsquedas para una ejecución de importación
+
+    Carga una sola vez los hoteles activos, las plataformas y los pares
+    hotel-plataforma existentes. Las relaciones que faltan reciben un ID
+    generado en memoria y se insertan en bloque con `persistir_pendientes`,
+    que el cargador invoca antes de escribir cada lote de reseñas. Quedan
+    sin confirmar hasta que el cargador llama a `confirmar_relaciones` tras
+    el commit; si la transacción se revierte, `revertir_relaciones` las
+    vuelve a dejar pendientes, para que sus IDs se inserten con el
+    siguiente lote en lugar de quedar sin fila.
+
+    Los nombres que no coinciden exactamente se resuelven con
+    `EmparejadorHoteles` (si SCRAPING_EMPAREJAMIENTO_DIFUSO está activo). Cada
+    nombre se resuelve una sola vez por ejecución, y cada identificador
+    externo (room_id de Airbnb, place id de Google, slug de Booking) queda
+    asociado a su relación, de modo que las filas siguientes no vuelven a
+    buscar.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.aciertos = 0
+        self.fallos = 0
+        self.hoteles_no_encontrados = 0
+        self.relaciones_creadas = 0
+        self.coincidencias_aproximadas = 0
+
+        hoteles = db.query(
+            Hotel.id, Hotel.nombre, Hotel.latitud, Hotel.longitud
+        ).filter(Hotel.activo == True).all()
+        self._hoteles: Dict[str, UUID] = {nombre: hotel_id for hotel_id, nombre, _, _ in hoteles}
+        self._emparejador = (
+            EmparejadorHoteles(hoteles) if settings.SCRAPING_EMPAREJAMIENTO_DIFUSO else None
+        )
+        self._nombres_resueltos: Dict[str, Optional[UUID]] = {}
+        self._plataformas: Dict[str, Plataforma] = {
+            p.codigo: p for p in db.query(Plataforma).all()
+        }
+        self._relaciones: Dict[Tuple[UUID, UUID], UUID] = {
+            (hotel_id, plataforma_id): hp_id
+            for hp_id, hotel_id, plataforma_id in db.query(
+                HotelPlataforma.id, HotelPlataforma.hotel_id, HotelPlataforma.plataforma_id
+            ).all()
+        }
+        self._externos: Dict[Tuple[UUID, str], Optional[UUID]] = {
+            (plataforma_id, identificador): hp_id
+            for hp_id, plataforma_id, identificador in db.query(
+                HotelPlataforma.id, HotelPlataforma.plataforma_id,
+                HotelPlataforma.identificador_externo
+            ).filter(HotelPlataforma.identificador_externo.isnot(None)).all()
+        }
+        self._pendientes: List[Dict[str, Any]] = []
+        self._sin_confirmar: List[Dict[str, Any]] = []
+
+    def plataforma(self, codigo: str) -> Optional[Plataforma]:
+        """Obtener plataforma por código"""
+        return self._plataformas.get(codigo)
+
+    def hotel_id(
+        self,
+        nombre: str,
+        latitud: Optional[float] = None,
+        longitud: Optional[float] = None
+    ) -> Optional[UUID]:
+        """Obtener el ID de un hotel activo por nombre exacto o aproximado"""
+        hotel_id = self._hoteles.get(nombre)
+        if hotel_id is not None or self._emparejador is None:
+            return hotel_id
+
+        if nombre in self._nombres_resueltos:
+            return self._nombres_resueltos[nombre]
+
+        coincidencia = self._emparejador.buscar(nombre, latitud, longitud)
+        if coincidencia is not None:
+            hotel_id = coincidencia[0]
+            self.coincidencias_aproximadas += 1
+        self._nombres_resueltos[nombre] = hotel_id
+        return hotel_id
+
+    def hotel_plataforma_id(
+        self,
+        nombre_hotel: str,
+        plataforma_id: UUID,
+        url: str = "",
+        identificador_externo: Optional[str] = None,
+        latitud: Optional[float] = None,
+        longitud: Optional[float] = None
+    ) -> Optional[UUID]:
+        """Obtener (o programar la creación de) la relación hotel-plataforma"""
+        clave_externa = (plataforma_id, identificador_externo) if identificador_externo else None
+        if clave_externa in self._externos:
+            hp_id = self._externos[clave_externa]
+            if hp_id is None:
+                self.fallos += 1
+                self.hoteles_no_encontrados += 1
+            else:
+                self.aciertos += 1
+            return hp_id
+
+        hp_id = self._relacion(nombre_hotel, plataforma_id, url, identificador_externo, latitud, longitud)
+        if clave_externa is not None:
+            self._externos[clave_externa] = hp_id
+        return hp_id
+
+    def _relacion(
+        self,
+        nombre_hotel: str,
+        plataforma_id: UUID,
+        url: str,
+        identificador_externo: Optional[str],
+        latitud: Optional[float],
+        longitud: Optional[float]
+    ) -> Optional[UUID]:
+        hotel_id = self.hotel_id(nombre_hotel, latitud, longitud)
+        if hotel_id is None:
+            self.fallos += 1
+            self.hoteles_no_encontrados += 1
+            return None
+
+        clave = (hotel_id, plataforma_id)
+        hp_id = self._relaciones.get(clave)
+        if hp_id is not None:
+            self.aciertos += 1
+            return hp_id
+
+        self.fallos += 1
+        hp_id = uuid.uuid4()
+        self._relaciones[clave] = hp_id
+        self._pendientes.append({
+            "id": hp_id,
+            "hotel_id": hotel_id,
+            "plataforma_id": plataforma_id,
+            "url_hotel": url,
+            "identificador_externo": identificador_externo,
+        })
+        return hp_id
+
+    def tiene_pendientes(self) -> bool:
+        return bool(self._pendientes)
+
+    def persistir_pendientes(self) -> Dict[UUID, UUID]:
+        """
+        Insertar en bloque las relaciones pendientes (sin commit)
+
+        Returns:
+            Mapeo ID provisional -> ID real para las relaciones que otro
+            proceso creó entretanto
+        """
+        if not self._pendientes:
+            return {}
+
+        pendientes, self._pendientes = self._pendientes, []
+        insertadas = set(crud_hotel_plataforma.create_many(self.db, objs_in=pendientes))
+
+        reasignadas = {}
+        for fila in pendientes:
+            if fila["id"] in insertadas:
+                self._sin_confirmar.append(fila)
+                continue
+            existente = crud_hotel_plataforma.get_by_hotel_and_plataforma(
+                self.db, hotel_id=fila["hotel_id"], plataforma_id=fila["plataforma_id"]
+            )
+            self._relaciones[(fila["hotel_id"], fila["plataforma_id"])] = existente.id
+            reasignadas[fila["id"]] = existente.id
+
+        if reasignadas:
+            for clave, hp_id in self._externos.items():
+                if hp_id in reasignadas:
+                    self._externos[clave] = reasignadas[hp_id]
+        return reasignadas
+
+    def confirmar_relaciones(self) -> None:
+        """Dar por confirmadas las relaciones insertadas (tras el commit)"""
+        self.relaciones_creadas += len(self._sin_confirmar)
+        self._sin_confirmar = []
+
+    def revertir_relaciones(self) -> None:
+        """Volver a dejar pendientes las relaciones insertadas (tras un rollback)"""
+        self._pendientes = self._sin_confirmar + self._pendientes
+        self._sin_confirmar = []
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Aciertos y fallos de la caché durante la ejecución"""
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "hoteles_no_encontrados": self.hoteles_no_encontrados,
+            "relaciones_creadas": self.relaciones_creadas,
+            "coincidencias_aproximadas": self.coincidencias_aproximadas,
+        }
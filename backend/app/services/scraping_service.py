@@ -1,19 +1,32 @@
 """
 Servicio de Scraping - Importación y procesamiento de reseñas
 """
-import json
-from typing import Dict, List
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
 from datetime import datetime
 from pathlib import Path
-from dateutil import parser
 
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.exceptions import ScrapingException
-from app.crud import crud_hotel, crud_plataforma, crud_hotel_plataforma, crud_resena
+from app.db.session import SessionLocal
 from app.schemas.resena import ResenaCreate
+from app.services.carga_resenas import CargadorResenas
+from app.services.control_importacion import ControlImportacion
+from app.services.fechas import parsear_fecha_airbnb, parsear_fecha_booking, parsear_fecha_google
+from app.services.filtro_hashes import guardar_filtro
+from app.services.lector_json import leer_airbnb, leer_booking, leer_google
 from app.services.nlp_service import nlp_service
+from app.services.resolutor_importacion import ResolutorImportacion
+
+# Identificadores estables dentro de las URLs scrapeadas
+_GOOGLE_PLACE_ID = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)")
+_GOOGLE_COORDENADAS = re.compile(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)")
+_BOOKING_SLUG = re.compile(r"booking\.com/hotel/([a-z]{2}/[^./?]+)")
 
 
 class ScrapingService:
@@ -22,52 +35,6 @@ class ScrapingService:
     def __init__(self):
         self.scraping_dir = Path(__file__).parent.parent / "scraping"
     
-    def parsear_fecha_google(self, fecha_str: str) -> datetime:
-        """Parsear fecha de Google Reviews"""
-        if not fecha_str or fecha_str == "Fecha estimada no disponible":
-            return datetime.utcnow()
-        try:
-            return parser.parse(fecha_str)
-        except:
-            return datetime.utcnow()
-    
-    def parsear_fecha_booking(self, registro: str) -> datetime:
-        """Parsear fecha de Booking"""
-        # "Fecha del comentario: 18 de septiembre de 2025"
-        if not registro:
-            return datetime.utcnow()
-        try:
-            fecha_parte = registro.split(": ")[-1]
-            return parser.parse(fecha_parte, dayfirst=True)
-        except:
-            return datetime.utcnow()
-    
-    def parsear_fecha_airbnb(self, fecha_str: str) -> datetime:
-        """Parsear fecha de Airbnb"""
-        # "agosto de 2025" o "Hace 2 semanas"
-        if not fecha_str:
-            return datetime.utcnow()
-        
-        if "Hace" in fecha_str:
-            return datetime.utcnow()  # Aproximación
-        
-        try:
-            # Mapeo de meses en español
-            meses = {
-                'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4,
-                'mayo': 5, 'junio': 6, 'julio': 7, 'agosto': 8,
-                'septiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
-            }
-            
-            for mes_nombre, mes_num in meses.items():
-                if mes_nombre in fecha_str.lower():
-                    año = fecha_str.split()[-1]
-                    return datetime(int(año), mes_num, 1)
-            
-            return datetime.utcnow()
-        except:
-            return datetime.utcnow()
-    
     def normalizar_puntuacion(self, puntuacion: any, plataforma: str) -> float:
         """Normalizar puntuación a escala 1-5"""
         if plataforma == "GOOGLE":
@@ -88,223 +55,326 @@ class ScrapingService:
         
         return 3.0
     
-    def importar_desde_google(self, db: Session, hotel_id: str) -> Dict[str, int]:
+    def extraer_identificador(self, url: str, plataforma: str) -> Optional[str]:
+        """Identificador del hotel en la plataforma a partir de su URL"""
+        if not url:
+            return None
+        patron = _GOOGLE_PLACE_ID if plataforma == "GOOGLE" else _BOOKING_SLUG
+        coincidencia = patron.search(url)
+        return coincidencia.group(1) if coincidencia else None
+    
+    def extraer_coordenadas_google(self, url: str) -> Tuple[Optional[float], Optional[float]]:
+        """Latitud y longitud (!3d...!4d...) de una URL de Google Maps"""
+        coincidencia = _GOOGLE_COORDENADAS.search(url or "")
+        if not coincidencia:
+            return None, None
+        return float(coincidencia.group(1)), float(coincidencia.group(2))
+    
+    def resolver_relacion(
+        self,
+        resolutor: ResolutorImportacion,
+        codigo: str,
+        plataforma_id: UUID,
+        registro: Dict[str, Any]
+    ) -> Optional[UUID]:
+        """
+        Relación hotel-plataforma de un registro en el formato de su scraper
+        
+        Para Google el registro es el hotel ("nombre", "url"); se acepta
+        también "hotel" como en los registros de Booking.
+        """
+        if codigo == "GOOGLE":
+            url = registro.get("url", "")
+            latitud, longitud = self.extraer_coordenadas_google(url)
+            return resolutor.hotel_plataforma_id(
+                registro.get("nombre") or registro.get("hotel", ""), plataforma_id,
+                url=url,
+                identificador_externo=self.extraer_identificador(url, "GOOGLE"),
+                latitud=latitud,
+                longitud=longitud
+            )
+        
+        if codigo == "BOOKING":
+            url = registro.get("url", "")
+            return resolutor.hotel_plataforma_id(
+                registro.get("hotel", ""), plataforma_id,
+                url=url,
+                identificador_externo=self.extraer_identificador(url, "BOOKING")
+            )
+        
+        if codigo == "AIRBNB":
+            return resolutor.hotel_plataforma_id(
+                registro.get("titulo_alojamiento", ""), plataforma_id,
+                url=registro.get("url_alojamiento", ""),
+                identificador_externo=str(registro.get("room_id", "")) or None
+            )
+        
+        raise ScrapingException(f"Plataforma no soportada: {codigo}")
+    
+    def construir_resena(
+        self, codigo: str, hp_id: UUID, registro: Dict[str, Any]
+    ) -> ResenaCreate:
+        """Construir la reseña a partir de un registro en el formato de su scraper"""
+        if codigo == "GOOGLE":
+            return ResenaCreate(
+                hotel_plataforma_id=hp_id,
+                nombre_autor=registro.get("usuario", "Anónimo"),
+                texto_completo=registro.get("texto", ""),
+                puntuacion=self.normalizar_puntuacion(
+                    registro.get("puntuacion", "3/5"), "GOOGLE"
+                ),
+                fecha_publicacion=parsear_fecha_google(registro.get("fecha", ""))
+            )
+        
+        if codigo == "BOOKING":
+            return ResenaCreate(
+                hotel_plataforma_id=hp_id,
+                nombre_autor=registro.get("usuario", "Anónimo"),
+                texto_positivo=registro.get("positivo", ""),
+                texto_negativo=registro.get("negativo", ""),
+                puntuacion=self.normalizar_puntuacion(
+                    registro.get("puntuacion", "5,0"), "BOOKING"
+                ),
+                fecha_publicacion=parsear_fecha_booking(registro.get("Registro", ""))
+            )
+        
+        if codigo == "AIRBNB":
+            comentario = registro.get("comentario", "")
+            if comentario == "N/A":
+                comentario = ""
+            
+            return ResenaCreate(
+                hotel_plataforma_id=hp_id,
+                nombre_autor=registro.get("nombre", "Anónimo"),
+                ubicacion_autor=registro.get("ubicacion", ""),
+                texto_completo=comentario,
+                puntuacion=float(registro.get("puntuacion", 5)),
+                fecha_publicacion=parsear_fecha_airbnb(registro.get("fecha", "")),
+                tipo_estadia=registro.get("tipo_estadia", "")
+            )
+        
+        raise ScrapingException(f"Plataforma no soportada: {codigo}")
+    
+    def _abrir_control(self, db: Session, archivo: Path) -> Optional[ControlImportacion]:
+        """Control de importación incremental del archivo, si está habilitado"""
+        if not settings.SCRAPING_INCREMENTAL:
+            return None
+        return ControlImportacion(db, archivo)
+    
+    def _cerrar_carga(
+        self,
+        cargador: CargadorResenas,
+        control: Optional[ControlImportacion],
+        total_registros: int
+    ) -> Dict[str, int]:
+        """Escribir el último lote y marcar el archivo como completado"""
+        resultado = cargador.cerrar()
+        if control:
+            control.completar(total_registros)
+            resultado["desde_registro"] = control.inicio
+        return resultado
+    
+    def importar_desde_google(
+        self,
+        db: Session,
+        hotel_id: str = None,
+        resolutor: Optional[ResolutorImportacion] = None,
+        modo_carga: Optional[str] = None
+    ) -> Dict[str, int]:
         """Importar reseñas desde JSON de Google"""
         archivo = self.scraping_dir / "reseñas_google.json"
         
         if not archivo.exists():
             raise ScrapingException(f"Archivo no encontrado: {archivo}")
         
-        with open(archivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        resolutor = resolutor or ResolutorImportacion(db)
         
         # Obtener plataforma Google
-        plataforma = crud_plataforma.get_by_codigo(db, codigo="GOOGLE")
+        plataforma = resolutor.plataforma("GOOGLE")
         if not plataforma:
             raise ScrapingException("Plataforma GOOGLE no encontrada en base de datos")
         
-        total_nuevas = 0
-        total_duplicadas = 0
-        
-        # Iterar por ciudades
-        for ciudad, hoteles in data.items():
-            for hotel_data in hoteles:
-                nombre_hotel = hotel_data.get("nombre", "")
-                
-                # Buscar hotel por nombre
-                hotel = crud_hotel.get_by_nombre(db, nombre=nombre_hotel)
-                if not hotel:
-                    continue
-                
-                # Obtener o crear relación hotel-plataforma
-                hp = crud_hotel_plataforma.get_by_hotel_and_plataforma(
-                    db, hotel_id=hotel.id, plataforma_id=plataforma.id
-                )
-                if not hp:
-                    from app.schemas.plataforma import HotelPlataformaCreate
-                    hp_data = HotelPlataformaCreate(
-                        hotel_id=hotel.id,
-                        plataforma_id=plataforma.id,
-                        url_hotel=hotel_data.get("url", "")
-                    )
-                    hp = crud_hotel_plataforma.create(db, obj_in=hp_data)
-                
-                # Procesar comentarios
-                for comentario in hotel_data.get("comentarios", []):
-                    try:
-                        resena_data = ResenaCreate(
-                            hotel_plataforma_id=hp.id,
-                            nombre_autor=comentario.get("usuario", "Anónimo"),
-                            texto_completo=comentario.get("texto", ""),
-                            puntuacion=self.normalizar_puntuacion(
-                                comentario.get("puntuacion", "3/5"), "GOOGLE"
-                            ),
-                            fecha_publicacion=self.parsear_fecha_google(
-                                comentario.get("fecha", "")
-                            )
-                        )
-                        
-                        # Crear con hash para evitar duplicados
-                        resena = crud_resena.create_with_hash(db, obj_in=resena_data)
-                        
-                        if resena.procesada:
-                            total_duplicadas += 1
-                        else:
-                            total_nuevas += 1
-                            
-                    except Exception:
-                        continue
+        control = self._abrir_control(db, archivo)
+        if control and control.sin_cambios:
+            return {"nuevas": 0, "duplicadas": 0, "sin_cambios": True}
+        desde = control.inicio if control else 0
+        
+        cargador = CargadorResenas(
+            db, resolutor=resolutor,
+            al_confirmar=control.guardar_avance if control else None,
+            modo=modo_carga
+        )
+        hotel_actual = None
+        hp_id = None
+        posicion = desde
+        
+        # Recorrer (hotel, comentario) sin cargar el archivo completo
+        for posicion, (hotel_data, comentario) in enumerate(
+            leer_google(
+                archivo,
+                al_abrir=control.seguir if control else None,
+                reanudar=control.reanudar if control else None
+            ),
+            start=desde + 1
+        ):
+            if hotel_data is not hotel_actual:
+                hotel_actual = hotel_data
+                hp_id = self.resolver_relacion(resolutor, "GOOGLE", plataforma.id, hotel_data)
+            
+            if not hp_id:
+                continue
+            
+            try:
+                resena_data = self.construir_resena("GOOGLE", hp_id, comentario)
+            except Exception:
+                continue
+            
+            # Se escribe por lotes, deduplicando por hash
+            cargador.agregar(resena_data, posicion)
         
-        return {"nuevas": total_nuevas, "duplicadas": total_duplicadas}
+        return self._cerrar_carga(cargador, control, posicion)
     
-    def importar_desde_booking(self, db: Session) -> Dict[str, int]:
+    def importar_desde_booking(
+        self,
+        db: Session,
+        resolutor: Optional[ResolutorImportacion] = None,
+        modo_carga: Optional[str] = None
+    ) -> Dict[str, int]:
         """Importar reseñas desde JSON de Booking"""
         archivo = self.scraping_dir / "reseñas_booking.json"
         
         if not archivo.exists():
             raise ScrapingException(f"Archivo no encontrado: {archivo}")
         
-        with open(archivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        resolutor = resolutor or ResolutorImportacion(db)
         
-        plataforma = crud_plataforma.get_by_codigo(db, codigo="BOOKING")
+        plataforma = resolutor.plataforma("BOOKING")
         if not plataforma:
             raise ScrapingException("Plataforma BOOKING no encontrada")
         
-        total_nuevas = 0
-        total_duplicadas = 0
+        control = self._abrir_control(db, archivo)
+        if control and control.sin_cambios:
+            return {"nuevas": 0, "duplicadas": 0, "sin_cambios": True}
+        desde = control.inicio if control else 0
+        
+        cargador = CargadorResenas(
+            db, resolutor=resolutor,
+            al_confirmar=control.guardar_avance if control else None,
+            modo=modo_carga
+        )
+        posicion = desde
         
-        for comentario_data in data.get("comentarios_parciales", []):
-            nombre_hotel = comentario_data.get("hotel", "")
-            hotel = crud_hotel.get_by_nombre(db, nombre=nombre_hotel)
+        for posicion, comentario_data in enumerate(
+            leer_booking(
+                archivo,
+                al_abrir=control.seguir if control else None,
+                reanudar=control.reanudar if control else None
+            ),
+            start=desde + 1
+        ):
+            hp_id = self.resolver_relacion(resolutor, "BOOKING", plataforma.id, comentario_data)
             
-            if not hotel:
+            if not hp_id:
                 continue
             
-            hp = crud_hotel_plataforma.get_by_hotel_and_plataforma(
-                db, hotel_id=hotel.id, plataforma_id=plataforma.id
-            )
-            if not hp:
-                from app.schemas.plataforma import HotelPlataformaCreate
-                hp_data = HotelPlataformaCreate(
-                    hotel_id=hotel.id,
-                    plataforma_id=plataforma.id,
-                    url_hotel=comentario_data.get("url", "")
-                )
-                hp = crud_hotel_plataforma.create(db, obj_in=hp_data)
-            
             try:
-                resena_data = ResenaCreate(
-                    hotel_plataforma_id=hp.id,
-                    nombre_autor=comentario_data.get("usuario", "Anónimo"),
-                    texto_positivo=comentario_data.get("positivo", ""),
-                    texto_negativo=comentario_data.get("negativo", ""),
-                    puntuacion=self.normalizar_puntuacion(
-                        comentario_data.get("puntuacion", "5,0"), "BOOKING"
-                    ),
-                    fecha_publicacion=self.parsear_fecha_booking(
-                        comentario_data.get("Registro", "")
-                    )
-                )
-                
-                resena = crud_resena.create_with_hash(db, obj_in=resena_data)
-                
-                if resena.procesada:
-                    total_duplicadas += 1
-                else:
-                    total_nuevas += 1
-                    
+                resena_data = self.construir_resena("BOOKING", hp_id, comentario_data)
             except Exception:
                 continue
+            
+            cargador.agregar(resena_data, posicion)
         
-        return {"nuevas": total_nuevas, "duplicadas": total_duplicadas}
+        return self._cerrar_carga(cargador, control, posicion)
     
-    def importar_desde_airbnb(self, db: Session) -> Dict[str, int]:
+    def importar_desde_airbnb(
+        self,
+        db: Session,
+        resolutor: Optional[ResolutorImportacion] = None,
+        modo_carga: Optional[str] = None
+    ) -> Dict[str, int]:
         """Importar reseñas desde JSON de Airbnb"""
         archivo = self.scraping_dir / "reseñas_airbnb.json"
         
         if not archivo.exists():
             raise ScrapingException(f"Archivo no encontrado: {archivo}")
         
-        with open(archivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        resolutor = resolutor or ResolutorImportacion(db)
         
-        plataforma = crud_plataforma.get_by_codigo(db, codigo="AIRBNB")
+        plataforma = resolutor.plataforma("AIRBNB")
         if not plataforma:
             raise ScrapingException("Plataforma AIRBNB no encontrada")
         
-        total_nuevas = 0
-        total_duplicadas = 0
+        control = self._abrir_control(db, archivo)
+        if control and control.sin_cambios:
+            return {"nuevas": 0, "duplicadas": 0, "sin_cambios": True}
+        desde = control.inicio if control else 0
         
-        # Agrupar por alojamiento
-        alojamientos = {}
-        for resena_data in data:
-            room_id = resena_data.get("room_id", "")
-            titulo = resena_data.get("titulo_alojamiento", "")
-            
-            if room_id not in alojamientos:
-                alojamientos[room_id] = {
-                    "titulo": titulo,
-                    "url": resena_data.get("url_alojamiento", ""),
-                    "resenas": []
-                }
-            alojamientos[room_id]["resenas"].append(resena_data)
+        cargador = CargadorResenas(
+            db, resolutor=resolutor,
+            al_confirmar=control.guardar_avance if control else None,
+            modo=modo_carga
+        )
+        posicion = desde
         
-        # Procesar cada alojamiento
-        for room_id, aloj_data in alojamientos.items():
-            # Buscar hotel por nombre similar
-            titulo = aloj_data["titulo"]
-            hotel = crud_hotel.get_by_nombre(db, nombre=titulo)
+        for posicion, resena_raw in enumerate(
+            leer_airbnb(
+                archivo,
+                al_abrir=control.seguir if control else None,
+                reanudar=control.reanudar if control else None
+            ),
+            start=desde + 1
+        ):
+            # El resolutor recuerda cada room_id: solo el primero busca por nombre
+            hp_id = self.resolver_relacion(resolutor, "AIRBNB", plataforma.id, resena_raw)
             
-            if not hotel:
-                # Intentar buscar por nombre parcial
+            if not hp_id:
                 continue
             
-            hp = crud_hotel_plataforma.get_by_hotel_and_plataforma(
-                db, hotel_id=hotel.id, plataforma_id=plataforma.id
-            )
-            if not hp:
-                from app.schemas.plataforma import HotelPlataformaCreate
-                hp_data = HotelPlataformaCreate(
-                    hotel_id=hotel.id,
-                    plataforma_id=plataforma.id,
-                    url_hotel=aloj_data["url"],
-                    identificador_externo=room_id
-                )
-                hp = crud_hotel_plataforma.create(db, obj_in=hp_data)
+            try:
+                resena_data = self.construir_resena("AIRBNB", hp_id, resena_raw)
+            except Exception:
+                continue
             
-            for resena_raw in aloj_data["resenas"]:
-                try:
-                    comentario = resena_raw.get("comentario", "")
-                    if comentario == "N/A":
-                        comentario = ""
-                    
-                    resena_data = ResenaCreate(
-                        hotel_plataforma_id=hp.id,
-                        nombre_autor=resena_raw.get("nombre", "Anónimo"),
-                        ubicacion_autor=resena_raw.get("ubicacion", ""),
-                        texto_completo=comentario,
-                        puntuacion=float(resena_raw.get("puntuacion", 5)),
-                        fecha_publicacion=self.parsear_fecha_airbnb(
-                            resena_raw.get("fecha", "")
-                        ),
-                        tipo_estadia=resena_raw.get("tipo_estadia", "")
-                    )
-                    
-                    resena = crud_resena.create_with_hash(db, obj_in=resena_data)
-                    
-                    if resena.procesada:
-                        total_duplicadas += 1
-                    else:
-                        total_nuevas += 1
-                        
-                except Exception:
-                    continue
-        
-        return {"nuevas": total_nuevas, "duplicadas": total_duplicadas}
+            cargador.agregar(resena_data, posicion)
+        
+        return self._cerrar_carga(cargador, control, posicion)
     
-    def ejecutar_scraping_completo(self, db: Session) -> Dict[str, any]:
-        """Ejecutar scraping completo de todas las plataformas"""
+    def _importar_en_sesion(
+        self,
+        clave: str,
+        importar: Callable,
+        tiempos: Dict[str, float],
+        modo_carga: Optional[str] = None
+    ) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Importar una plataforma con su propia sesión (modo paralelo)"""
+        inicio = time.perf_counter()
+        db = SessionLocal()
+        try:
+            resolutor = ResolutorImportacion(db)
+            resultado = importar(db, resolutor=resolutor, modo_carga=modo_carga)
+            return resultado, resolutor.estadisticas()
+        finally:
+            db.close()
+            tiempos[clave] = round(time.perf_counter() - inicio, 3)
+    
+    def ejecutar_scraping_completo(
+        self,
+        db: Session,
+        paralelo: Optional[bool] = None,
+        modo_carga: Optional[str] = None
+    ) -> Dict[str, any]:
+        """
+        Ejecutar scraping completo de todas las plataformas
+        
+        En modo paralelo cada plataforma se importa en su propio hilo con una
+        sesión independiente (SCRAPING_WORKERS hilos como máximo); el NLP se
+        ejecuta al final sobre la sesión recibida.
+        
+        `modo_carga` ("lotes" o "copy") reemplaza a SCRAPING_MODO_CARGA.
+        """
+        if paralelo is None:
+            paralelo = settings.SCRAPING_PARALELO
+        
         inicio = datetime.utcnow()
         resultados = {
             "google": {"nuevas": 0, "duplicadas": 0},
@@ -312,36 +382,64 @@ class ScrapingService:
             "airbnb": {"nuevas": 0, "duplicadas": 0},
             "errores": []
         }
+        importadores = {
+            "google": ("Google", self.importar_desde_google),
+            "booking": ("Booking", self.importar_desde_booking),
+            "airbnb": ("Airbnb", self.importar_desde_airbnb),
+        }
+        tiempos = {}
+        cache_resolucion = {}
         
-        # Google
-        try:
-            resultados["google"] = self.importar_desde_google(db, hotel_id=None)
-        except Exception as e:
-            resultados["errores"].append(f"Google: {str(e)}")
+        if paralelo:
+            with ThreadPoolExecutor(max_workers=settings.SCRAPING_WORKERS) as executor:
+                futuros = {
+                    executor.submit(
+                        self._importar_en_sesion, clave, importar, tiempos, modo_carga
+                    ): clave
+                    for clave, (_, importar) in importadores.items()
+                }
+                for futuro in as_completed(futuros):
+                    clave = futuros[futuro]
+                    try:
+                        resultados[clave], estadisticas = futuro.result()
+                    except Exception as e:
+                        resultados["errores"].append(f"{importadores[clave][0]}: {str(e)}")
+                        continue
+                    for nombre, valor in estadisticas.items():
+                        cache_resolucion[nombre] = cache_resolucion.get(nombre, 0) + valor
+        else:
+            # Hoteles, plataformas y relaciones se cargan una sola vez por ejecución
+            resolutor = ResolutorImportacion(db)
+            
+            for clave, (nombre, importar) in importadores.items():
+                inicio_plataforma = time.perf_counter()
+                try:
+                    resultados[clave] = importar(db, resolutor=resolutor, modo_carga=modo_carga)
+                except Exception as e:
+                    resultados["errores"].append(f"{nombre}: {str(e)}")
+                tiempos[clave] = round(time.perf_counter() - inicio_plataforma, 3)
+            
+            cache_resolucion = resolutor.estadisticas()
         
-        # Booking
-        try:
-            resultados["booking"] = self.importar_desde_booking(db)
-        except Exception as e:
-            resultados["errores"].append(f"Booking: {str(e)}")
+        resultados["cache_resolucion"] = cache_resolucion
         
-        # Airbnb
         try:
-            resultados["airbnb"] = self.importar_desde_airbnb(db)
-        except Exception as e:
-            resultados["errores"].append(f"Airbnb: {str(e)}")
+            guardar_filtro()
+        except OSError as e:
+            resultados["errores"].append(f"Filtro de hashes: {str(e)}")
         
         # Procesar NLP
         try:
             procesadas = nlp_service.procesar_pendientes(db, limit=500)
             resultados["procesadas_nlp"] = procesadas
+            resultados["cache_nlp"] = nlp_service.estadisticas_cache()
         except Exception as e:
             resultados["errores"].append(f"NLP: {str(e)}")
         
         fin = datetime.utcnow()
         resultados["tiempo_ejecucion"] = (fin - inicio).total_seconds()
+        resultados["tiempos_plataforma"] = tiempos
         
         return resultados
 
-
 scraping_service = ScrapingService()
@@ -0,0 +1,175 @@
+"""
+Análisis de sentimiento con un léxico español y NumPy
+
+Alternativa a VADER (léxico inglés de NLTK) para reseñas en español. El
+léxico se carga en arreglos indexados por id de palabra; un lote de textos
+se tokeniza a un solo arreglo de ids y la polaridad, las negaciones, los
+intensificadores y el contraste ("pero") se calculan con operaciones
+vectorizadas sobre todo el lote. Sigue las reglas y constantes de VADER y
+devuelve el mismo diccionario positivo/negativo/neutro/compuesto.
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.buscador_palabras import normalizar
+
+RUTA_LEXICO = Path(__file__).resolve().parent / "recursos" / "lexico_es.tsv"
+
+_PALABRA = re.compile(r"\w+")
+
+# Constantes de VADER
+VENTANA_NEGACION = 3
+FACTOR_NEGACION = -0.74
+PESO_ANTES_CONTRASTE = 0.5
+PESO_DESPUES_CONTRASTE = 1.5
+AUMENTO_EXCLAMACION = 0.292
+MAX_EXCLAMACIONES = 4
+ALFA = 15
+
+
+def _sumar_por_documento(documento: np.ndarray, valores: np.ndarray, cantidad: int) -> np.ndarray:
+    # Sin palabras en el lote bincount devuelve enteros
+    return np.bincount(documento, weights=valores, minlength=cantidad).astype(np.float64)
+
+
+class LexicoSentimiento:
+    """
+    Léxico de polaridad en arreglos: id de palabra -> valor
+
+    El id 0 es cualquier palabra fuera del léxico (polaridad 0).
+    """
+
+    def __init__(self, ruta: Path = RUTA_LEXICO):
+        self.vocabulario: Dict[str, int] = {}
+        polaridad = [0.0]
+        intensidad = [0.0]
+        negacion = [False]
+        contraste = [False]
+
+        with open(ruta, encoding="utf-8") as archivo:
+            for numero, linea in enumerate(archivo, 1):
+                linea = linea.strip()
+                if not linea or linea.startswith("#"):
+                    continue
+                try:
+                    tipo, palabra, valor = linea.split("\t")
+                    valor = float(valor)
+                except ValueError:
+                    raise ValueError(f"{ruta.name}, línea {numero}: formato inválido")
+
+                palabra = normalizar(palabra)
+                if palabra in self.vocabulario:
+                    continue
+                self.vocabulario[palabra] = len(polaridad)
+                polaridad.append(valor if tipo == "pol" else 0.0)
+                intensidad.append(valor if tipo == "int" else 0.0)
+                negacion.append(tipo == "neg")
+                contraste.append(tipo == "con")
+
+        self.polaridad = np.array(polaridad, dtype=np.float64)
+        self.intensidad = np.array(intensidad, dtype=np.float64)
+        self.negacion = np.array(negacion, dtype=bool)
+        self.contraste = np.array(contraste, dtype=bool)
+
+    def tokenizar(self, textos: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ids de palabra de todo el lote en un solo arreglo
+
+        Returns:
+            (ids concatenados, cantidad de palabras de cada texto)
+        """
+        buscar = self.vocabulario.get
+        ids: List[int] = []
+        largos = np.empty(len(textos), dtype=np.int64)
+        for i, texto in enumerate(textos):
+            palabras = _PALABRA.findall(normalizar(texto))
+            ids.extend([buscar(palabra, 0) for palabra in palabras])
+            largos[i] = len(palabras)
+        return np.array(ids, dtype=np.int32), largos
+
+    def _en_ventana(self, marcas: np.ndarray, documento: np.ndarray) -> np.ndarray:
+        """Palabras con una marca en alguna de las VENTANA_NEGACION anteriores del mismo texto"""
+        resultado = np.zeros(len(marcas), dtype=bool)
+        for distancia in range(1, VENTANA_NEGACION + 1):
+            resultado[distancia:] |= (
+                marcas[:-distancia] & (documento[distancia:] == documento[:-distancia])
+            )
+        return resultado
+
+    def puntuar_lote(self, textos: Sequence[str]) -> List[Dict[str, float]]:
+        """Scores de cada texto, en el formato de NLPService.puntuar"""
+        cantidad = len(textos)
+        ids, largos = self.tokenizar(textos)
+        documento = np.repeat(np.arange(cantidad), largos)
+        mismo_documento = documento[1:] == documento[:-1]
+
+        valencia = self.polaridad[ids]
+
+        # Intensificador en la palabra anterior: suma a la magnitud
+        aumento = np.zeros_like(valencia)
+        aumento[1:] = self.intensidad[ids[:-1]] * mismo_documento
+        valencia += np.sign(valencia) * aumento
+
+        # Negación en alguna de las palabras anteriores de la ventana. En
+        # español la doble negación refuerza ("no me gustó nada"): una
+        # negación dentro de la ventana de otra no vuelve a invertir.
+        es_negacion = self.negacion[ids]
+        negacion_efectiva = es_negacion & ~self._en_ventana(es_negacion, documento)
+        valencia[self._en_ventana(negacion_efectiva, documento)] *= FACTOR_NEGACION
+
+        # Contraste: lo anterior al primer "pero" pesa menos, lo posterior más
+        es_contraste = self.contraste[ids]
+        if es_contraste.any():
+            acumulado = np.cumsum(es_contraste)
+            inicio = np.cumsum(largos) - largos
+            base = np.concatenate(([0], acumulado))[inicio]
+            anteriores = acumulado - es_contraste - base[documento]
+            con_contraste = _sumar_por_documento(documento, es_contraste, cantidad) > 0
+            valencia *= np.where(
+                anteriores > 0,
+                PESO_DESPUES_CONTRASTE,
+                np.where(con_contraste[documento], PESO_ANTES_CONTRASTE, 1.0)
+            )
+
+        suma = _sumar_por_documento(documento, valencia, cantidad)
+        suma_positiva = _sumar_por_documento(
+            documento, np.where(valencia > 0, valencia + 1, 0.0), cantidad
+        )
+        suma_negativa = _sumar_por_documento(
+            documento, np.where(valencia < 0, valencia - 1, 0.0), cantidad
+        )
+        neutras = _sumar_por_documento(documento, valencia == 0, cantidad)
+
+        # Signos de exclamación refuerzan la polaridad dominante
+        exclamaciones = np.array(
+            [min(texto.count("!"), MAX_EXCLAMACIONES) for texto in textos], dtype=np.float64
+        ) * AUMENTO_EXCLAMACION
+        exclamaciones[suma == 0] = 0.0
+        suma += np.sign(suma) * exclamaciones
+        domina_positivo = suma_positiva > np.abs(suma_negativa)
+        suma_positiva += np.where(domina_positivo, exclamaciones, 0.0)
+        suma_negativa -= np.where(domina_positivo, 0.0, exclamaciones)
+
+        compuesto = np.clip(suma / np.sqrt(suma * suma + ALFA), -1.0, 1.0)
+        total = suma_positiva + np.abs(suma_negativa) + neutras
+        sin_palabras = total == 0
+        total[sin_palabras] = 1.0
+        positivo = np.abs(suma_positiva / total)
+        negativo = np.abs(suma_negativa / total)
+        neutro = np.where(sin_palabras, 1.0, np.abs(neutras / total))
+
+        return [
+            {'positivo': pos, 'negativo': neg, 'neutro': neu, 'compuesto': comp}
+            for pos, neg, neu, comp in zip(
+                np.round(positivo, 3).tolist(),
+                np.round(negativo, 3).tolist(),
+                np.round(neutro, 3).tolist(),
+                np.round(compuesto, 4).tolist()
+            )
+        ]
+
+    def puntuar(self, texto: str) -> Dict[str, float]:
+        return self.puntuar_lote([texto])[0]
@@ -7,14 +7,17 @@ Este módulo define:
 - Tarea de procesamiento de NLP
 """
 
+from datetime import date
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.services.scraping_service import ScrapingService
-from app.services.nlp_service import NLPService
+from app.services.nlp_service import nlp_service
 from app.crud.crud_resena import crud_resena
 import logging
 
@@ -42,6 +45,16 @@ celery_app.conf.update(
     worker_max_tasks_per_child=100,
 )
 
+@worker_init.connect
+def precargar_nlp(**kwargs):
+    """Cargar los recursos NLP en el proceso principal, antes del fork de los hijos"""
+    try:
+        logger.info(f"Recursos NLP precargados: {nlp_service.precargar()}")
+    except Exception as e:
+        # Sin precarga, cada hijo los carga en su primera tarea
+        logger.warning(f"No se pudieron precargar los recursos NLP: {str(e)}")
+
+
 # Configuración del scheduler (Beat)
 celery_app.conf.beat_schedule = {
     'scraping-diario': {
@@ -64,10 +77,10 @@ def ejecutar_scraping_diario():
     
     db: Session = SessionLocal()
     try:
-        scraping_service = ScrapingService(db)
+        scraping_service = ScrapingService()
         
-        # Ejecutar scraping de todas las plataformas
-        resultados = scraping_service.importar_desde_json()
+        # Ejecutar scraping de todas las plataformas (en paralelo si SCRAPING_PARALELO)
+        resultados = scraping_service.ejecutar_scraping_completo(db)
         
         logger.info(f"Ô£à Scraping completado: {resultados}")
         
@@ -102,48 +115,26 @@ def procesar_nlp_nuevas_resenas():
     
     db: Session = SessionLocal()
     try:
-        nlp_service = NLPService()
-        
-        # Obtener reseñas sin an├ílisis de sentimiento
-        resenas_sin_procesar = crud_resena.get_sin_sentimiento(db)
-        
-        procesadas = 0
-        errores = 0
-        
-        for resena in resenas_sin_procesar:
-            try:
-                # Analizar sentimiento
-                resultado_sentimiento = nlp_service.analizar_sentimiento(resena.comentario)
-                
-                # Clasificar por criterios
-                clasificaciones = nlp_service.clasificar_por_criterios(resena.comentario)
-                
-                # Actualizar reseña con an├ílisis
-                crud_resena.actualizar_analisis_nlp(
-                    db=db,
-                    resena_id=resena.id,
-                    sentimiento_data=resultado_sentimiento,
-                    clasificaciones=clasificaciones
-                )
-                
-                procesadas += 1
-                
-            except Exception as e:
-                logger.error(f"Error procesando reseña {resena.id}: {str(e)}")
-                errores += 1
-        
-        db.commit()
-        
-        logger.info(f"Ô£à NLP completado: {procesadas} procesadas, {errores} errores")
+        # Primero los cambios de palabras clave, para clasificar lo nuevo ya con ellas
+        reclasificadas = nlp_service.reclasificar_cambios_palabras(db)
+        
+        # Toda la cola, por lotes con un commit cada uno
+        procesadas = nlp_service.procesar_pendientes(db, limit=None)
+        
+        logger.info(f"NLP completado: {procesadas} reseñas analizadas")
+        
+        # Períodos afectados por las reseñas recién procesadas
+        calcular_indicadores.delay()
         
         return {
             "status": "success",
             "procesadas": procesadas,
-            "errores": errores
+            "reclasificadas": reclasificadas,
+            "cache": nlp_service.estadisticas_cache()
         }
         
     except Exception as e:
-        logger.error(f"ÔØî Error en procesamiento NLP: {str(e)}")
+        logger.error(f"Error en procesamiento NLP: {str(e)}")
         db.rollback()
         return {
             "status": "error",
@@ -153,6 +144,59 @@ def procesar_nlp_nuevas_resenas():
         db.close()
 
 
+@celery_app.task(name='app.workers.queue.reprocesar_nlp_desactualizadas')
+def reprocesar_nlp_desactualizadas(limit=None):
+    """
+    Tarea que vuelve a analizar las reseñas con resultados de otra versión NLP
+    
+    Se lanza a mano después de cambiar umbrales, motor, modelo o palabras
+    clave. Actualiza sentimientos y clasificaciones en el lugar, por lotes.
+    """
+    logger.info("Reprocesando reseñas con versión NLP desactualizada")
+    
+    db: Session = SessionLocal()
+    try:
+        resultado = nlp_service.reprocesar_desactualizadas(db, limit=limit)
+        return {"status": "success", **resultado}
+        
+    except Exception as e:
+        logger.error(f"Error reprocesando NLP: {str(e)}")
+        db.rollback()
+        return {
+            "status": "error",
+            "mensaje": f"Error en reproceso NLP: {str(e)}"
+        }
+    finally:
+        db.close()
+
+
+@celery_app.task(name='app.workers.queue.reclasificar_palabras_clave')
+def reclasificar_palabras_clave(indexar=False):
+    """
+    Tarea que reclasifica solo las reseñas afectadas por cambios de palabras clave
+    
+    Con `indexar` llena antes el índice invertido con las reseñas ya
+    analizadas (una vez, después de la migración que lo crea).
+    """
+    logger.info("Reclasificando cambios de palabras clave")
+    
+    db: Session = SessionLocal()
+    try:
+        indexadas = nlp_service.indexar_existentes(db) if indexar else 0
+        criterios = nlp_service.reclasificar_cambios_palabras(db)
+        return {"status": "success", "indexadas": indexadas, "criterios": criterios}
+        
+    except Exception as e:
+        logger.error(f"Error reclasificando palabras clave: {str(e)}")
+        db.rollback()
+        return {
+            "status": "error",
+            "mensaje": f"Error en reclasificación: {str(e)}"
+        }
+    finally:
+        db.close()
+
+
 @celery_app.task(name='app.workers.queue.ejecutar_scraping_manual')
 def ejecutar_scraping_manual():
     """
@@ -165,34 +209,71 @@ def ejecutar_scraping_manual():
     return ejecutar_scraping_diario()
 
 
-@celery_app.task(name='app.workers.queue.calcular_indicadores')
-def calcular_indicadores():
+@celery_app.task(name='app.workers.queue.reconstruir_metricas_diarias')
+def reconstruir_metricas_diarias():
     """
-    Tarea para recalcular todos los indicadores y mítricas
+    Tarea que recalcula los acumulados diarios de los tableros desde las reseñas
     
-    Esta tarea puede ejecutarse despuís del an├ílisis NLP
-    para actualizar todos los indicadores del sistema.
+    Para el backfill después de la migración o tras cambios de datos fuera
+    del procesamiento NLP (reseñas borradas, hoteles fusionados).
     """
-    logger.info("­ƒôè Recalculando indicadores")
+    logger.info("Reconstruyendo métricas diarias")
     
     db: Session = SessionLocal()
     try:
-        from app.services.indicadores_service import IndicadoresService
+        from app.services.indicadores_service import indicadores_service
+        
+        filas = indicadores_service.reconstruir_metricas_diarias(db)
+        return {"status": "success", "filas": filas}
         
-        indicadores_service = IndicadoresService(db)
+    except Exception as e:
+        logger.error(f"Error reconstruyendo métricas diarias: {str(e)}")
+        return {
+            "status": "error",
+            "mensaje": f"Error: {str(e)}"
+        }
+    finally:
+        db.close()
+
+
+@celery_app.task(name='app.workers.queue.calcular_indicadores')
+def calcular_indicadores(desde=None, hasta=None, completo=False):
+    """
+    Tarea que materializa los indicadores por período de todos los hoteles activos
+    
+    Llena indicadores_periodo (semanas, meses y trimestres) desde los
+    acumulados diarios con unas pocas sentencias. Se encadena después del
+    análisis NLP y solo recalcula los períodos con reseñas nuevas o
+    reanalizadas; con `completo` recalcula todos los del rango.
+    
+    Args:
+        desde: Fecha ISO (YYYY-MM-DD) del primer día a considerar
+        hasta: Fecha ISO del último día a considerar
+        completo: Recalcular también los períodos sin cambios
+    """
+    logger.info("Materializando indicadores por período")
+    
+    db: Session = SessionLocal()
+    try:
+        from app.services.indicadores_service import indicadores_service
         
-        # Aquá se pueden agregar llamadas a mítodos especáficos
-        # de c├ílculo de indicadores seg├║n la lógica de negocio
+        periodos = indicadores_service.materializar_periodos(
+            db,
+            desde=date.fromisoformat(desde) if desde else None,
+            hasta=date.fromisoformat(hasta) if hasta else None,
+            solo_pendientes=not completo
+        )
         
-        logger.info("Ô£à Indicadores recalculados")
+        logger.info(f"Indicadores recalculados: {periodos} períodos")
         
         return {
             "status": "success",
-            "mensaje": "Indicadores actualizados"
+            "mensaje": "Indicadores actualizados",
+            "periodos": periodos
         }
         
     except Exception as e:
-        logger.error(f"ÔØî Error calculando indicadores: {str(e)}")
+        logger.error(f"Error calculando indicadores: {str(e)}")
         return {
             "status": "error",
             "mensaje": f"Error: {str(e)}"
@@ -0,0 +1,102 @@
+"""
+Microbenchmark: parseo de fechas de reseñas
+
+Compara las funciones anteriores de ScrapingService (dateutil por reseña y
+recorrido del diccionario de meses) con app.services.fechas sobre las
+fechas reales de los JSON scrapeados.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_fechas [directorio_json]
+"""
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dateutil import parser
+
+from app.services import fechas
+from app.services.lector_json import leer_airbnb, leer_booking, leer_google
+
+DIRECTORIO_POR_DEFECTO = Path(__file__).resolve().parents[2] / "frontend" / "src" / "data-scraping"
+REPETICIONES = 3
+
+
+# --- Implementaciones anteriores (copiadas de ScrapingService) ---
+
+def anterior_google(fecha_str):
+    if not fecha_str or fecha_str == "Fecha estimada no disponible":
+        return datetime.utcnow()
+    try:
+        return parser.parse(fecha_str)
+    except Exception:
+        return datetime.utcnow()
+
+
+def anterior_booking(registro):
+    if not registro:
+        return datetime.utcnow()
+    try:
+        return parser.parse(registro.split(": ")[-1], dayfirst=True)
+    except Exception:
+        return datetime.utcnow()
+
+
+def anterior_airbnb(fecha_str):
+    if not fecha_str or "Hace" in fecha_str:
+        return datetime.utcnow()
+    meses = {
+        'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4,
+        'mayo': 5, 'junio': 6, 'julio': 7, 'agosto': 8,
+        'septiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
+    }
+    try:
+        for mes_nombre, mes_num in meses.items():
+            if mes_nombre in fecha_str.lower():
+                return datetime(int(fecha_str.split()[-1]), mes_num, 1)
+        return datetime.utcnow()
+    except Exception:
+        return datetime.utcnow()
+
+
+def cronometrar(funcion, textos):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        for texto in textos:
+            funcion(texto)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    directorio = Path(sys.argv[1]) if len(sys.argv) > 1 else DIRECTORIO_POR_DEFECTO
+
+    corpus = {
+        "google": (
+            [c.get("fecha", "") for _, c in leer_google(directorio / "reseñas_google.json")],
+            anterior_google, fechas.parsear_fecha_google,
+        ),
+        "booking": (
+            [r.get("Registro", "") for r in leer_booking(directorio / "reseñas_booking.json")],
+            anterior_booking, fechas.parsear_fecha_booking,
+        ),
+        "airbnb": (
+            [r.get("fecha", "") for r in leer_airbnb(directorio / "reseñas_airbnb.json")],
+            anterior_airbnb, fechas.parsear_fecha_airbnb,
+        ),
+    }
+
+    print(f"{'plataforma':<10} {'fechas':>7} {'únicas':>7} {'anterior':>10} {'nuevo':>10} {'x':>6}")
+    for plataforma, (textos, anterior, nuevo) in corpus.items():
+        t_anterior = cronometrar(anterior, textos)
+        t_nuevo = cronometrar(nuevo, textos)
+        print(
+            f"{plataforma:<10} {len(textos):>7} {len(set(textos)):>7} "
+            f"{t_anterior * 1000:>8.1f}ms {t_nuevo * 1000:>8.1f}ms {t_anterior / t_nuevo:>6.1f}"
+        )
+    print(f"memo: {fechas.estadisticas_memo()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Microbenchmark: análisis NLP por reseña
+
+Compara el flujo anterior de procesar_resena (limpiar y puntuar el texto en
+analizar_sentimiento y otra vez en cada criterio con coincidencias) con
+NLPService.analizar_resena, que usa un ContextoAnalisis por reseña, sobre
+las reseñas reales de los JSON scrapeados.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_nlp [directorio_json] [max_resenas]
+"""
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from app.services.lector_json import leer_airbnb, leer_booking, leer_google
+from app.services.nlp_service import nlp_service
+
+DIRECTORIO_POR_DEFECTO = Path(__file__).resolve().parents[2] / "frontend" / "src" / "data-scraping"
+REPETICIONES = 3
+
+
+def anterior_clasificar_por_criterio(texto, criterio_keywords):
+    """Copia de NLPService.clasificar_por_criterio antes del contexto"""
+    texto_limpio = nlp_service.limpiar_texto(texto)
+    palabras_detectadas = [k for k in criterio_keywords if k.lower() in texto_limpio]
+    if not palabras_detectadas:
+        return {'valoracion': 3.0, 'confianza': 0.0, 'palabras_detectadas': []}
+    sentimiento = nlp_service.analizar_sentimiento(texto)
+    valoracion = max(1.0, min(5.0, ((sentimiento['compuesto'] + 1) / 2) * 4 + 1))
+    return {
+        'valoracion': round(valoracion, 2),
+        'confianza': round(min(len(palabras_detectadas) * 0.2, 1.0), 2),
+        'palabras_detectadas': palabras_detectadas
+    }
+
+
+def anterior(textos, criterios):
+    for texto in textos:
+        scores = nlp_service.analizar_sentimiento(texto)
+        nlp_service.clasificar_sentimiento(scores['compuesto'])
+        nlp_service.calcular_confianza(scores)
+        for _, keywords in criterios:
+            anterior_clasificar_por_criterio(texto, keywords)
+
+
+def nuevo(textos, criterios):
+    for texto in textos:
+        nlp_service.analizar_resena(texto, criterios)
+
+
+def cargar_corpus(directorio: Path):
+    textos = [c.get("texto", "") for _, c in leer_google(directorio / "reseñas_google.json")]
+    textos += [
+        nlp_service.texto_resena(None, r.get("positivo"), r.get("negativo"))
+        for r in leer_booking(directorio / "reseñas_booking.json")
+    ]
+    textos += [r.get("comentario", "") for r in leer_airbnb(directorio / "reseñas_airbnb.json")]
+    return [t for t in textos if t and t.strip() and t != "N/A"]
+
+
+def cronometrar(funcion, textos, criterios):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion(textos, criterios)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    directorio = Path(sys.argv[1]) if len(sys.argv) > 1 else DIRECTORIO_POR_DEFECTO
+    maximo = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    textos = cargar_corpus(directorio)[:maximo]
+    criterios = [
+        (uuid.uuid4(), nlp_service.sostenibilidad_keywords),
+        (uuid.uuid4(), nlp_service.calidad_keywords),
+    ]
+
+    # Mismo sentimiento en ambos caminos (las palabras detectadas difieren:
+    # el autómata exige límites de palabra e ignora tildes)
+    for texto in textos[:500]:
+        sentimiento, _ = nlp_service.analizar_resena(texto, criterios)
+        assert sentimiento["score_compuesto"] == nlp_service.analizar_sentimiento(texto)["compuesto"]
+
+    t_anterior = cronometrar(anterior, textos, criterios)
+    t_nuevo = cronometrar(nuevo, textos, criterios)
+    print(f"reseñas: {len(textos)}  criterios: {len(criterios)}")
+    print(f"anterior: {t_anterior:.2f}s ({len(textos) / t_anterior:.0f} reseñas/s)")
+    print(f"contexto: {t_nuevo:.2f}s ({len(textos) / t_nuevo:.0f} reseñas/s)")
+    print(f"mejora:   {t_anterior / t_nuevo:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Microbenchmark: motores de sentimiento
+
+Compara VADER (NLTK, un texto a la vez) con LexicoSentimiento (léxico
+español, lote vectorizado con NumPy) sobre las reseñas reales de los JSON
+scrapeados, ya limpias.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_sentimiento [directorio_json] [max_resenas]
+"""
+import sys
+import time
+from pathlib import Path
+
+from nltk.sentiment import SentimentIntensityAnalyzer
+
+from app.services.nlp_service import nlp_service
+from app.services.sentimiento_lexico import LexicoSentimiento
+from benchmarks.bench_nlp import DIRECTORIO_POR_DEFECTO, REPETICIONES, cargar_corpus
+
+
+def cronometrar(funcion, textos):
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion(textos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    directorio = Path(sys.argv[1]) if len(sys.argv) > 1 else DIRECTORIO_POR_DEFECTO
+    maximo = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    textos = [nlp_service.limpiar_texto(t) for t in cargar_corpus(directorio)[:maximo]]
+    sia = SentimentIntensityAnalyzer()
+    lexico = LexicoSentimiento()
+
+    # Un texto solo y dentro de un lote puntúan igual
+    lote = lexico.puntuar_lote(textos[:500])
+    assert lote == [lexico.puntuar(texto) for texto in textos[:500]]
+
+    t_vader = cronometrar(lambda ts: [sia.polarity_scores(t) for t in ts], textos)
+    t_lexico = cronometrar(lexico.puntuar_lote, textos)
+    print(f"reseñas: {len(textos)}  palabras del léxico: {len(lexico.vocabulario)}")
+    print(f"vader:  {t_vader:.2f}s ({len(textos) / t_vader:.0f} reseñas/s)")
+    print(f"lexico: {t_lexico:.2f}s ({len(textos) / t_lexico:.0f} reseñas/s)")
+    print(f"mejora: {t_vader / t_lexico:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Consultas de los endpoints de indicadores
+
+Requieren una base PostgreSQL con las migraciones aplicadas, indicada en
+TEST_DATABASE_URL; sin ella se omiten, así que un `pytest` sin esa
+variable no ejecuta ninguna (solo las informa como skipped). Cada prueba
+corre dentro de una transacción que se revierte al final.
+"""
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import Session
+
+from app.crud import crud_metrica_diaria
+from app.models import (
+    Clasificacion, Criterio, Hotel, HotelPlataforma, Plataforma, Resena, Sentimiento
+)
+from app.services.indicadores_service import indicadores_service
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL no configurada"
+)
+
+# Día sin datos reales, para que las sumas solo cuenten las reseñas de la prueba
+DIA_PRUEBA = datetime(1999, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(TEST_DATABASE_URL)
+    conexion = engine.connect()
+    transaccion = conexion.begin()
+    sesion = Session(bind=conexion, join_transaction_mode="create_savepoint")
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+        transaccion.rollback()
+        conexion.close()
+        engine.dispose()
+
+
+def _criterio(db, codigo: str) -> Criterio:
+    criterio = db.query(Criterio).filter(Criterio.codigo == codigo).first()
+    if criterio is None:
+        criterio = Criterio(codigo=codigo, nombre=codigo.capitalize())
+        db.add(criterio)
+        db.flush()
+    return criterio
+
+
+@pytest.fixture
+def resenas_procesadas(db):
+    """Reseñas analizadas de un hotel, ya sumadas a los acumulados diarios"""
+    sufijo = uuid.uuid4().hex[:8]
+    plataforma = Plataforma(codigo=f"TEST_{sufijo}", nombre="Plataforma de prueba")
+    hotel = Hotel(nombre=f"Hotel de prueba {sufijo}")
+    db.add_all([plataforma, hotel])
+    db.flush()
+    relacion = HotelPlataforma(hotel_id=hotel.id, plataforma_id=plataforma.id)
+    db.add(relacion)
+    db.flush()
+    sostenibilidad = _criterio(db, "SOSTENIBILIDAD")
+    calidad = _criterio(db, "CALIDAD")
+
+    tipos = ["POSITIVO"] * 3 + ["NEGATIVO"] * 2 + ["NEUTRO"]
+    resenas = [
+        Resena(
+            hotel_plataforma_id=relacion.id,
+            texto_completo=f"reseña {sufijo} {i}",
+            puntuacion=4.0,
+            fecha_publicacion=DIA_PRUEBA,
+            procesada=True,
+            hash_contenido=uuid.uuid4().hex,
+        )
+        for i in range(len(tipos))
+    ]
+    db.add_all(resenas)
+    db.flush()
+    db.add_all(
+        Sentimiento(resena_id=resena.id, tipo_sentimiento=tipo)
+        for resena, tipo in zip(resenas, tipos)
+    )
+    db.add_all(
+        Clasificacion(resena_id=resena.id, criterio_id=sostenibilidad.id, valoracion=valoracion)
+        for resena, valoracion in zip(resenas, (4.0, 4.0, 2.0))
+    )
+    db.add_all(
+        Clasificacion(resena_id=resena.id, criterio_id=calidad.id, valoracion=5.0)
+        for resena in resenas
+    )
+    db.flush()
+    crud_metrica_diaria.acumular(db, resena_ids=[resena.id for resena in resenas])
+    db.flush()
+
+    total_hoteles = db.query(func.count(Hotel.id)).filter(Hotel.activo == True).scalar()
+
+    # Nada cargado en la sesión antes de medir
+    db.expunge_all()
+    return {
+        "distribucion": {"positivos": 3, "negativos": 2, "neutros": 1},
+        "resumen": {
+            "total_hoteles": total_hoteles,
+            "promedio_sostenibilidad": 3.3,
+            "promedio_calidad": 5.0,
+            "total_resenas": len(tipos),
+        },
+    }
+
+
+@contextmanager
+def medir(db):
+    """Sentencias ejecutadas y reseñas cargadas como entidades dentro del bloque"""
+    medicion = {"sentencias": [], "cargadas": []}
+
+    def contar_sentencia(conn, cursor, statement, parameters, context, executemany):
+        medicion["sentencias"].append(statement)
+
+    def registrar_carga(target, context):
+        medicion["cargadas"].append(target)
+
+    motor = db.get_bind().engine
+    event.listen(motor, "before_cursor_execute", contar_sentencia)
+    event.listen(Resena, "load", registrar_carga)
+    try:
+        yield medicion
+    finally:
+        event.remove(motor, "before_cursor_execute", contar_sentencia)
+        event.remove(Resena, "load", registrar_carga)
+
+
+def _sin_resenas_cargadas(db, medicion) -> bool:
+    return medicion["cargadas"] == [] and not any(
+        isinstance(obj, Resena) for obj in db.identity_map.values()
+    )
+
+
+def test_distribucion_sentimientos_una_consulta_sin_cargar_resenas(db, resenas_procesadas):
+    with medir(db) as medicion:
+        distribucion = indicadores_service.obtener_distribucion_sentimientos(
+            db, fecha_inicio=DIA_PRUEBA, fecha_fin=DIA_PRUEBA
+        )
+
+    assert distribucion == resenas_procesadas["distribucion"]
+    assert len(medicion["sentencias"]) <= 1, medicion["sentencias"]
+    assert _sin_resenas_cargadas(db, medicion)
+
+
+def test_resumen_global_consultas_acotadas_sin_cargar_resenas(db, resenas_procesadas):
+    with medir(db) as medicion:
+        resumen = indicadores_service.obtener_resumen_global(
+            db, fecha_inicio=DIA_PRUEBA, fecha_fin=DIA_PRUEBA
+        )
+
+    assert resumen == resenas_procesadas["resumen"]
+    # Hoteles activos, total de reseñas y promedios por criterio
+    assert len(medicion["sentencias"]) <= 3, medicion["sentencias"]
+    assert _sin_resenas_cargadas(db, medicion)